@@ -0,0 +1,97 @@
+"""
+Cold start benchmark, each scenario runs in a fresh interpreter.
+
+    python -m benchmarks.importtime --repeat 10
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from .replay import ReplayServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPEAT = 5
+
+# Statements timed in a fresh interpreter, {address} is the replay server
+SCENARIOS = [("import", "import bitcointrade"),
+             ("client", "import bitcointrade; bitcointrade.Api()"),
+             ("first_request", "import bitcointrade; api = bitcointrade.Api(); api.scheme = 'http'; "
+                               "api.host = '{address}'; api.ticker('BRLBTC')"),
+             ("import_all", "from bitcointrade import *")]
+
+# Milliseconds the fastest run of a scenario may take, checked by main and by the test suite
+# when BITCOINTRADE_IMPORT_BUDGET is set
+BUDGETS = {"import": 20.0, "client": 50.0}
+
+# Modules a scenario must not load, rarely used subsystems and heavy dependencies
+HEAVY = ["requests", "urllib3", "asyncio", "sqlite3", "numpy", "aiohttp", "httpx", "concurrent.futures"]
+FORBIDDEN = {"import": HEAVY + ["bitcointrade.api", "bitcointrade.private_api"],
+             "client": HEAVY}
+
+PROBE = """
+import sys, json, time
+start = time.perf_counter()
+{statement}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": sorted(sys.modules)}}))
+"""
+
+def measure(statement):
+    """
+    :return dict: seconds taken by statement in a fresh interpreter and modules loaded after it
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    output = subprocess.check_output([sys.executable, "-c", PROBE.format(statement=statement)], cwd=ROOT, env=env)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+def run(repeat=REPEAT, names=None):
+    """
+    :param list names: scenarios to run, all by default
+    :return dict: fastest and median milliseconds of each scenario and the forbidden modules it loaded
+    """
+    results = []
+    with ReplayServer() as server:
+        for name, statement in SCENARIOS:
+            if names is not None and name not in names:
+                continue
+            runs = [measure(statement.format(address=server.address)) for _ in range(repeat)]
+            samples = sorted(run["seconds"] * 1000 for run in runs)
+            loaded = [module for module in FORBIDDEN.get(name, []) if module in runs[0]["modules"]]
+            results.append({"name": name,
+                            "min_ms": samples[0],
+                            "median_ms": samples[len(samples) // 2],
+                            "budget_ms": BUDGETS.get(name),
+                            "forbidden": loaded})
+    return {"python": sys.version.split()[0], "results": results}
+
+def over_budget(results):
+    """
+    :return list: names of scenarios slower than their budget or loading forbidden modules
+    """
+    return [result["name"] for result in results["results"]
+            if result["forbidden"] or (result["budget_ms"] is not None and result["min_ms"] > result["budget_ms"])]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args(argv)
+    results = run(args.repeat, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    for result in results["results"]:
+        budget = "" if result["budget_ms"] is None else "budget %6.1fms" % result["budget_ms"]
+        print("%-16s min %8.2fms  median %8.2fms  %s" % (result["name"], result["min_ms"], result["median_ms"], budget))
+        if result["forbidden"]:
+            print("%-16s loaded %s" % ("", ", ".join(result["forbidden"])))
+    failed = over_budget(results)
+    if failed:
+        print("Over budget: %s" % ", ".join(failed))
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
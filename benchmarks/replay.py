@@ -0,0 +1,129 @@
+"""
+Local http server answering client requests with responses recorded in
+the vcr cassettes of the test suite.
+"""
+import os
+import glob
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from vcr.persisters.filesystem import FilesystemPersister
+from vcr.serializers import yamlserializer
+
+CASSETTES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "cassettes")
+PAIRS = ["BRLBTC", "BRLETH", "BRLLTC", "BRLBCH"]
+
+def load_responses(path=CASSETTES):
+    """
+    :return dict: recorded (status, body) by (method, path), the pair of public paths replaced by BRLBTC
+    """
+    responses = {}
+    for name in sorted(glob.glob(os.path.join(path, "*", "*.yml"))):
+        requests, recorded = FilesystemPersister.load_cassette(name, yamlserializer)
+        for request, response in zip(requests, recorded):
+            body = response["body"]["string"]
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            responses.setdefault((request.method, normalize(request.path)), (response["status"]["code"], body))
+    return responses
+
+def normalize(path):
+    parts = path.split("/")
+    if len(parts) > 3 and parts[2] == "public":
+        parts[3] = "BRLBTC"
+    return "/".join(parts)
+
+def trades_page(body, size):
+    """
+    Grows a recorded trades page to size trades, to benchmark large payloads.
+    """
+    page = json.loads(body.decode("utf-8"))
+    trades = page["data"]["trades"]
+    page["data"]["trades"] = [trades[i % len(trades)] for i in range(size)]
+    page["data"]["pagination"]["page_size"] = size
+    return json.dumps(page).encode("utf-8")
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _replay(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        status, body = self.server.replay.respond(self.command, self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_DELETE = _replay
+
+    def log_message(self, format, *args):
+        pass
+
+class ReplayServer(object):
+    """
+    Threaded keep-alive http server replaying cassettes, run in a background thread.
+
+        with ReplayServer() as server:
+            api = server.client(bitcointrade.Api)
+            api.ticker("BRLBTC")
+    """
+
+    def __init__(self, cassettes=CASSETTES, host="127.0.0.1", port=0):
+        self.responses = load_responses(cassettes)
+        self._pages = {}
+        self._server = ThreadingHTTPServer((host, port), ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return "%s:%d" % (host, port)
+
+    def respond(self, method, url):
+        """
+        :return tuple: status code and body recorded for the request, 404 if none
+        """
+        parts = urlsplit(url)
+        path = normalize(parts.path)
+        recorded = self.responses.get((method, path))
+        if recorded is None:
+            return 404, b'{"message":"Not recorded","data":null}'
+        size = parse_qs(parts.query).get("page_size")
+        if path.endswith("/trades") and size:
+            size = int(size[0])
+            if size not in self._pages:
+                self._pages[size] = trades_page(recorded[1], size)
+            return recorded[0], self._pages[size]
+        return recorded
+
+    def client(self, cls, *args, **kwargs):
+        """
+        :return: client of class cls sending its requests to this server
+        """
+        api = cls(*args, **kwargs)
+        api.scheme = "http"
+        api.host = self.address
+        return api
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,150 @@
+"""
+Offline benchmarks of the client overhead against recorded responses.
+
+    python -m benchmarks.run --iterations 500 --output results.json
+    python -m benchmarks.run --compare results.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import bitcointrade
+from bitcointrade import codec, transport
+from .replay import ReplayServer, PAIRS
+
+ITERATIONS = 200
+THRESHOLD = 0.2
+LARGE_PAGE = 1000
+
+def percentile(samples, percentile):
+    index = min(len(samples) - 1, int(len(samples) * percentile / 100.0))
+    return samples[index]
+
+def measure(name, function, iterations, operations=1):
+    """
+    Calls function iterations times after a warm up call.
+    :param int operations: requests made by each call, used for throughput
+    :return dict: throughput in operations per second and latencies of a call in milliseconds
+    """
+    function()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - call_start)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {"name": name,
+            "iterations": iterations,
+            "throughput": iterations * operations / total,
+            "mean_ms": total / iterations * 1000,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000}
+
+def scenarios(server):
+    """
+    :return list: (name, function, operations) benchmarked against server
+    """
+    api = server.client(bitcointrade.Api)
+    unpooled = server.client(bitcointrade.Api, keep_alive=False)
+    fan_out = server.client(bitcointrade.Api, max_workers=len(PAIRS))
+    private = server.client(bitcointrade.PrivateApi, "42")
+    large = api.session.get("http://%s/v2/public/BRLBTC/trades" % server.address,
+                            params={"page_size": LARGE_PAGE}).content
+    result = [("ticker", lambda: api.ticker("BRLBTC"), 1),
+              ("ticker_unpooled", lambda: unpooled.ticker("BRLBTC"), 1),
+              ("orderbook", lambda: api.orderbook("BRLBTC"), 1),
+              ("trades_page", lambda: api.trades("BRLBTC", current_page=2), 1),
+              ("trades_large_page", lambda: api.trades("BRLBTC", page_size=LARGE_PAGE), 1),
+              ("create_order", lambda: private.create_order(pair="BRLLTC", amount=0.1, type="sell",
+                                                            subtype="limited", unit_price=70000.0), 1),
+              ("get_user_orders", lambda: private.get_user_orders(pair="BRLBTC"), 1),
+              ("tickers_fan_out", lambda: fan_out.tickers(PAIRS).raise_for_errors(), len(PAIRS))]
+    for name in codec.PREFERENCE:
+        try:
+            loads = codec.get_codec(name).loads
+        except ImportError:
+            continue
+        result.append(("decode_large_page_%s" % name, lambda loads=loads: loads(large), 1))
+    clients = [api, unpooled, fan_out, private]
+    for name in list(transport.TRANSPORTS)[1:]:
+        client = server.client(bitcointrade.Api, transport=name, max_workers=len(PAIRS))
+        try:
+            client.ticker("BRLBTC")
+        except ImportError:
+            continue
+        clients.append(client)
+        result.append(("ticker_%s" % name, lambda client=client: client.ticker("BRLBTC"), 1))
+        result.append(("tickers_fan_out_%s" % name, lambda client=client: client.tickers(PAIRS).raise_for_errors(),
+                       len(PAIRS)))
+    return result, clients
+
+def run(iterations=ITERATIONS, names=None):
+    """
+    :param list names: scenarios to run, all by default
+    :return dict: environment and results of each scenario
+    """
+    results = []
+    with ReplayServer() as server:
+        benchmarks, clients = scenarios(server)
+        try:
+            for name, function, operations in benchmarks:
+                if names is None or name in names:
+                    results.append(measure(name, function, iterations, operations))
+        finally:
+            for client in clients:
+                client.close()
+    return {"version": bitcointrade.__version__,
+            "python": platform.python_version(),
+            "codec": codec.default_codec().name,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "results": results}
+
+def compare(previous, current, threshold=THRESHOLD):
+    """
+    :return tuple: rows of scenarios present in both runs, with the throughput ratio and both p99,
+        and names of scenarios whose throughput dropped by more than threshold
+    """
+    before = dict((result["name"], result) for result in previous["results"])
+    rows = []
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if old is not None:
+            rows.append({"name": result["name"], "throughput": result["throughput"],
+                         "ratio": result["throughput"] / old["throughput"],
+                         "previous_p99_ms": old["p99_ms"], "p99_ms": result["p99_ms"]})
+    regressions = [row["name"] for row in rows if row["ratio"] < 1 - threshold]
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=ITERATIONS)
+    parser.add_argument("--only", nargs="*", help="scenarios to run")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="results JSON of a previous run")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="throughput drop reported as regression")
+    args = parser.parse_args(argv)
+    current = run(args.iterations, args.only)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            rows, regressions = compare(json.load(f), current, args.threshold)
+        for row in rows:
+            print("%-28s %10.1f/s  %6.2fx  p99 %8.3fms -> %8.3fms" % (row["name"], row["throughput"], row["ratio"],
+                                                                     row["previous_p99_ms"], row["p99_ms"]))
+        if regressions:
+            print("Regressions: %s" % ", ".join(regressions))
+            return 1
+    else:
+        for result in current["results"]:
+            print("%-28s %10.1f/s  p50 %8.3fms  p99 %8.3fms" % (result["name"], result["throughput"],
+                                                               result["p50_ms"], result["p99_ms"]))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
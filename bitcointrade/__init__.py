@@ -1,7 +1,45 @@
 """Bitcointrade Api"""
 
-from .api import Api
-from .private_api import PrivateApi
+import importlib
 
 __author__ = "megarushing"
 __version__ = "0.7.0"
+
+# Public names and the module defining them, imported on first access so
+# that short-lived programs only load the subsystems they use
+EXPORTS = {"Api": "api",
+           "PrivateApi": "private_api",
+           "AsyncApi": "async_api",
+           "AsyncPrivateApi": "async_api",
+           "TradeBackfill": "backfill",
+           "ResponseCache": "cache",
+           "OrderBook": "orderbook",
+           "PriceEstimator": "estimator",
+           "TradeStore": "store",
+           "CandleEngine": "candles",
+           "RateLimiter": "ratelimit",
+           "RetryPolicy": "retry",
+           "MetricsRegistry": "metrics",
+           "SingleFlight": "singleflight",
+           "Transport": "transport",
+           "OrderTracker": "tracker",
+           "WalletHistory": "history"}
+
+SUBMODULES = ["api", "async_api", "backfill", "cache", "candles", "codec", "errors", "estimator", "history",
+              "metrics", "models", "orderbook", "private_api", "ratelimit", "retry", "simulator",
+              "singleflight", "store", "tracker", "transport", "utils"]
+
+__all__ = sorted(EXPORTS)
+
+def __getattr__(name):
+    if name in EXPORTS:
+        value = getattr(importlib.import_module("." + EXPORTS[name], __name__), name)
+    elif name in SUBMODULES:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(EXPORTS) | set(SUBMODULES))
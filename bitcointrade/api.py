@@ -1,30 +1,318 @@
-import requests
-import json
-from .utils import check_args
-from .errors import ApiError
+import time
+import threading
+import functools
+import itertools
+from collections import deque
+from .utils import Schema, BatchResult
+from . import models
+from .codec import default_codec
+from .transport import Transport, get_transport
+from .metrics import query_size
+from .errors import ApiError, RateLimitError, HTTPError
 TIMEOUT = 30
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 10
+MAX_RETRIES = 0
+
+TRADES = Schema(optional_parameters={"start_time": str, "end_time": str,
+                                     "page_size": int, "current_page": int})
 
 class Base(object):
     """Base API Class"""
 
-    def __init__(self):
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 max_retries=MAX_RETRIES, keep_alive=True, max_workers=None, cache=None,
+                 typed=False, codec=None, rate_limiter=None, retry_policy=None, metrics=None,
+                 single_flight=None, transport=None):
+        """
+        :param int pool_connections: number of host pools kept by the session
+        :param int pool_maxsize: max connections kept open per host pool
+        :param int max_retries: retries per connection on connection errors
+        :param bool keep_alive: reuse connections between calls
+        :param int max_workers: concurrent calls made by batch methods, defaults to pool_maxsize
+        :param ResponseCache cache: optional cache of GET responses, may be shared by clients
+        :param bool typed: return records such as trades and orders as models instead of dicts
+        :param Codec codec: JSON codec, defaults to the fastest installed one
+        :param RateLimiter rate_limiter: optional limiter of requests, may be shared by clients
+        :param RetryPolicy retry_policy: optional retries and hedging of GET requests
+        :param MetricsRegistry metrics: optional registry of request metrics, may be shared by clients
+        :param SingleFlight single_flight: optional coalescing of identical concurrent GET requests,
+                                           may be shared by clients
+        :param transport: requests / urllib3 / http2 or a Transport, defaults to requests.
+                          Sync clients only, asyncio clients always use aiohttp
+        """
+        self.scheme = "https"
         self.host = "api.bitcointrade.com.br"
         self.api_version = "v2"
         self.token = None
         self.headers = {"Content-Type": "application/json"}
         self.timeout = TIMEOUT
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+        self.max_workers = max_workers or pool_maxsize
+        self.cache = cache
+        self.typed = typed
+        self.codec = codec or default_codec()
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.metrics = metrics
+        self.single_flight = single_flight
+        self.transport = self._make_transport(transport)
+        self._session = None
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _make_transport(self, transport):
+        if isinstance(transport, Transport):
+            return transport
+        return get_transport(transport or "requests", pool_connections=self.pool_connections,
+                             pool_maxsize=self.pool_maxsize, max_retries=self.max_retries, keep_alive=self.keep_alive)
+
+    @property
+    def session(self):
+        """
+        Connection pool of the transport, created on first use: the requests
+        session by default, the urllib3 pool manager or the httpx client,
+        None for custom transports without one.
+        """
+        return self.transport.pool
+
+    def close(self):
+        """
+        Closes pooled connections, they are opened again if the client is used again.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.transport.close()
+
+    @property
+    def executor(self):
+        """
+        Bounded worker pool used by batch methods, created on first use.
+        """
+        with self._executor_lock:
+            if self._executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _fan_out(self, function, keys, cancel_on_error=False):
+        """
+        Calls function for every key concurrently on the worker pool.
+        :param function: callable receiving a single key
+        :param keys: iterable of keys, such as pairs
+        :param bool cancel_on_error: once a call fails, skip the calls not started yet,
+                                     their error is a CancelledError
+        :return BatchResult: results keyed by key, failures kept in errors
+        """
+        keys = list(keys)
+        futures = [self.executor.submit(function, key) for key in keys]
+        if cancel_on_error:
+            from concurrent.futures import wait, FIRST_EXCEPTION
+            _, pending = wait(futures, return_when=FIRST_EXCEPTION)
+            for future in pending:
+                future.cancel()
+        result = BatchResult()
+        for key, future in zip(keys, futures):
+            try:
+                result[key] = future.result()
+            except Exception as e:
+                result.errors[key] = e
+        return result
+
+    def _collect(self, function, key, **params):
+        """
+        Returns records of every page of a paginated call, fetched one page
+        after the other since it usually runs on the worker pool itself.
+        """
+        return list(self.iter_pages(function, key, prefetch=0, **params))
+
+    def _merge(self, function, keys, sort_key):
+        """
+        Calls function for every key concurrently and merges the lists it returns.
+        :param sort_key: function of a record giving its order in the merged list
+        :raise: exception of the first failed key
+        """
+        result = self._fan_out(function, keys)
+        result.raise_for_errors()
+        return sorted(itertools.chain.from_iterable(result.values()), key=sort_key)
+
+    def iter_pages(self, function, key, prefetch=1, **params):
+        """
+        Yields records of a paginated call one by one, walking every page.
+        The next pages are fetched in the background while the current one
+        is consumed, so at most prefetch + 1 pages are held in memory.
+        :param function: paginated method, such as self.get_user_orders
+        :param str key: field of the response holding the records, such as "orders"
+        :param int prefetch: number of pages fetched ahead, 0 disables read-ahead
+        :param \*\*params: arguments of function, current_page sets the first page
+        """
+        if "current_page" in params:
+            page = params.pop("current_page")
+            data = function(current_page=page, **params)
+        else:
+            page = 1
+            data = function(**params)
+        total_pages = data["pagination"]["total_pages"]
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < prefetch and page + len(pending) < total_pages:
+                    pending.append(self.executor.submit(function,
+                                                        current_page=page + len(pending) + 1,
+                                                        **params))
+                for record in data[key]:
+                    yield record
+                if page >= total_pages:
+                    return
+                page += 1
+                if pending:
+                    data = pending.popleft().result()
+                else:
+                    data = function(current_page=page, **params)
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
 
     def _check_response(self, response):
+        body = response.content
         try:
-            r = response.json()
-        except:
-            response.raise_for_status()
-        if not ("message" in r and "data" in r):
+            r = self.codec.loads(body)
+        except ValueError:
+            self._check_status(response.status_code, body)
+            if response.status_code >= 400:
+                raise HTTPError(response.status_code, "HTTP {}: {}".format(response.status_code, body))
+            raise ApiError("Invalid response: {}".format(body))
+        self._check_status(response.status_code, r)
+        return self._check_payload(r)
+
+    def _check_status(self, status_code, body):
+        if status_code == 429:
+            message = body.get("message") if isinstance(body, dict) else None
+            raise RateLimitError(message or "Too many requests")
+
+    def _check_payload(self, r):
+        """
+        Validates decoded response body and returns its data field.
+        """
+        if not (isinstance(r, dict) and "message" in r and "data" in r):
             raise ApiError("Invalid response: {}".format(r))
         if r["message"] != None:
             raise ApiError(r["message"])
         return r["data"]
 
+    def _cache_key(self, method, url, params):
+        return (method, url, tuple(sorted(params.items())), self.token, self.typed)
+
+    def _request(self, method, endpoint, url, params):
+        """
+        Returns decoded data for a request, served from the cache when enabled.
+        GET responses of cacheable endpoints are stored, other methods
+        invalidate the responses they affect once they are done.
+        :param str method: Http method used
+        :param str endpoint: endpoint name without pair, e.g. "public/ticker"
+        :param str url: full url of the endpoint
+        :param dict params: data sent to API, None values are dropped
+        :return dict: decoded json received
+        """
+        method = method.upper()
+        filtered = {k: v for k, v in params.items() if v != None}
+        if method != "GET":
+            if self.cache is None:
+                return self._fetch(method, endpoint, url, filtered)
+            try:
+                return self._fetch(method, endpoint, url, filtered)
+            finally:
+                self.cache.invalidate_mutation(endpoint)
+        if self.cache is None or not self.cache.cacheable(endpoint):
+            return self._coalesce(method, endpoint, url, filtered)
+        key = self._cache_key(method, url, filtered)
+        hit, data = self.cache.get(endpoint, key)
+        if hit:
+            return data
+        generation = self.cache.generation(endpoint)
+        data = self._coalesce(method, endpoint, url, filtered)
+        self.cache.set(endpoint, key, data, generation)
+        return data
+
+    def _coalesce(self, method, endpoint, url, params):
+        """
+        Fetches a GET request, sharing the identical request in flight when single_flight is enabled.
+        """
+        if self.single_flight is None:
+            return self._fetch(method, endpoint, url, params)
+        key = self._cache_key(method, url, params)
+        return self.single_flight.call(key, lambda: self._fetch(method, endpoint, url, params))
+
+    def _fetch(self, method, endpoint, url, params):
+        """
+        Sends request, retried and hedged by the retry policy for GET, and
+        converts its records to models when typed is enabled.
+        """
+        if self.retry_policy is not None and method == "GET":
+            data = self.retry_policy.call(lambda: self._attempt(method, endpoint, url, params), endpoint)
+        else:
+            data = self._attempt(method, endpoint, url, params)
+        if self.typed:
+            data = models.convert(method, endpoint, data)
+        return data
+
+    def _attempt(self, method, endpoint, url, params):
+        """
+        Sends request once the rate limiter allows it.
+        """
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._observe(method, endpoint, url, params)
+        limiter.acquire(method, endpoint)
+        try:
+            data = self._observe(method, endpoint, url, params)
+        except RateLimitError:
+            limiter.feedback(method, endpoint, throttled=True)
+            raise
+        limiter.feedback(method, endpoint, throttled=False)
+        return data
+
+    def _observe(self, method, endpoint, url, params):
+        """
+        Sends request, recording its latency and outcome when metrics are enabled.
+        """
+        metrics = self.metrics
+        if metrics is None or not metrics.enabled:
+            return self._send(method, endpoint, url, params)
+        start = time.perf_counter()
+        try:
+            data = self._send(method, endpoint, url, params)
+        except Exception as error:
+            metrics.observe(method, endpoint, time.perf_counter() - start, error)
+            raise
+        metrics.observe(method, endpoint, time.perf_counter() - start)
+        return data
+
+    def _send(self, method, endpoint, url, params):
+        """
+        Sends request through the transport and returns decoded data.
+        """
+        if method == "GET":
+            body = None
+            response = self.transport.request(method,url,params=params,timeout=self.timeout,headers=self.headers)
+        else:
+            body = self.codec.dumps(params)
+            response = self.transport.request(method,url,body=body,timeout=self.timeout,headers=self.headers)
+        if self.metrics is not None and self.metrics.enabled:
+            sent = query_size(params) if body is None else len(body)
+            self.metrics.observe_bytes(method, endpoint, sent, len(response.content))
+        return self._check_response(response)
+
     def request_api(self,method,api_type, action, **params):
         """
         Returns decoded json dict for requested action.
@@ -34,17 +322,11 @@ class Base(object):
         :param \*\*params: data sent to API.
         :return dict: decoded json received
         """
-        filtered = {k: v for k, v in params.items() if v != None}
-        url = "https://%s/%s/%s/%s" % (self.host,
+        url = "%s://%s/%s/%s/%s" % (self.scheme, self.host,
                                        self.api_version,
                                        api_type,
                                        action)
-        response = None
-        if method.upper() == "GET":
-            response = requests.get(url,params=filtered,timeout=self.timeout,headers=self.headers)
-        else:
-            response = requests.request(method,url,data=json.dumps(filtered),timeout=self.timeout,headers=self.headers)
-        return self._check_response(response)
+        return self._request(method, "%s/%s" % (api_type, action), url, params)
 
     def request_api_noaction(self,method,api_type, **params):
         """
@@ -54,16 +336,10 @@ class Base(object):
         :param \*\*params: data sent to API.
         :return dict: decoded json received
         """
-        filtered = {k: v for k, v in params.items() if v != None}
-        url = "https://%s/%s/%s" % (self.host,
+        url = "%s://%s/%s/%s" % (self.scheme, self.host,
                                        self.api_version,
                                        api_type)
-        response = None
-        if method.upper() == "GET":
-            response = requests.get(url,params=filtered,timeout=self.timeout,headers=self.headers)
-        else:
-            response = requests.request(method,url,data=json.dumps(filtered),timeout=self.timeout,headers=self.headers)
-        return self._check_response(response)
+        return self._request(method, api_type, url, params)
 
     def get_api(self, api_type, action, **params):
         """
@@ -96,15 +372,12 @@ class Api(Base):
         :param \*\*params: data sent to API encoded in url.
         :return dict: decoded json received
         """
-        filtered = {k: v for k, v in params.items() if v != None}
-        url = "https://%s/%s/%s/%s/%s" % (self.host,
+        url = "%s://%s/%s/%s/%s/%s" % (self.scheme, self.host,
                                        self.api_version,
                                        api_type,
                                        pair.upper(),
                                        action)
-
-        response = requests.get(url,params=filtered,timeout=self.timeout,headers=self.headers)
-        return self._check_response(response)
+        return self._request("GET", "%s/%s" % (api_type, action), url, params)
 
     def ticker(self,pair):
         """
@@ -120,6 +393,22 @@ class Api(Base):
         """
         return self.get_api("public",pair,'orders')
 
+    def tickers(self,pairs):
+        """
+        Returns tickers for many pairs, fetched concurrently.
+        :param list pairs: pairs to fetch, e.g. ["BRLBTC", "BRLETH"]
+        :return BatchResult: tickers keyed by pair, failures kept in errors
+        """
+        return self._fan_out(self.ticker, pairs)
+
+    def orderbooks(self,pairs):
+        """
+        Returns orderbooks for many pairs, fetched concurrently.
+        :param list pairs: pairs to fetch, e.g. ["BRLBTC", "BRLETH"]
+        :return BatchResult: orderbooks keyed by pair, failures kept in errors
+        """
+        return self._fan_out(self.orderbook, pairs)
+
     def trades(self,pair,**params):
         """
         https://apidocs.bitcointrade.com.br/#e2e31936-9ae4-4646-b918-a4c21829b46d
@@ -130,6 +419,12 @@ class Api(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_time": str, "end_time": str,
-                            "page_size": int, "current_page": int})
+        TRADES.check(params)
         return self.get_api("public",pair,'trades',**params)
+
+    def iter_trades(self,pair,prefetch=1,**params):
+        """
+        Yields every trade of the search period, walking all pages.
+        Takes the same arguments as trades, see iter_pages for prefetch.
+        """
+        return self.iter_pages(functools.partial(self.trades, pair), "trades", prefetch, **params)
@@ -0,0 +1,218 @@
+import time
+import asyncio
+import itertools
+from collections import deque
+from concurrent.futures import CancelledError
+from .api import Api
+from .private_api import PrivateApi
+from .errors import ApiError, ArgumentError, RateLimitError, HTTPError
+from .utils import BatchResult
+from . import models
+from .metrics import query_size
+
+class AsyncBase(object):
+    """
+    Mixin that turns every API call into a coroutine. Requests go through
+    a pooled aiohttp session, so many calls can be in flight from one event loop.
+    Argument validation still happens when the method is called, before the
+    coroutine is awaited. The transport argument of sync clients is not
+    supported, passing one raises ArgumentError.
+    """
+
+    def _make_transport(self, transport):
+        if transport is not None:
+            raise ArgumentError(u"Asynchronous clients send requests through aiohttp, "
+                                u"transport is only supported by sync clients")
+        return None
+
+    @property
+    def session(self):
+        """
+        Pooled aiohttp session shared by every call of this client,
+        created on first use inside the running event loop.
+        """
+        if self._session is None:
+            import aiohttp
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize,
+                                             force_close=not self.keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def close(self):
+        """
+        Closes pooled connections, the session is recreated if the client is used again.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _fan_out(self, function, keys, cancel_on_error=False):
+        """
+        Awaits function for every key concurrently, at most max_workers at a time.
+        """
+        keys = list(keys)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        failed = []
+
+        async def call(key):
+            async with semaphore:
+                if failed:
+                    raise CancelledError()
+                try:
+                    return await function(key)
+                except Exception:
+                    if cancel_on_error:
+                        failed.append(key)
+                    raise
+
+        outcomes = await asyncio.gather(*[call(key) for key in keys], return_exceptions=True)
+        result = BatchResult()
+        for key, outcome in zip(keys, outcomes):
+            if isinstance(outcome, Exception):
+                result.errors[key] = outcome
+            else:
+                result[key] = outcome
+        return result
+
+    async def _collect(self, function, key, **params):
+        return [record async for record in self.iter_pages(function, key, prefetch=0, **params)]
+
+    async def _merge(self, function, keys, sort_key):
+        result = await self._fan_out(function, keys)
+        result.raise_for_errors()
+        return sorted(itertools.chain.from_iterable(result.values()), key=sort_key)
+
+    async def iter_pages(self, function, key, prefetch=1, **params):
+        """
+        Asynchronous generator over records of a paginated call, the next
+        pages are fetched as tasks while the current one is consumed.
+        """
+        if "current_page" in params:
+            page = params.pop("current_page")
+            data = await function(current_page=page, **params)
+        else:
+            page = 1
+            data = await function(**params)
+        total_pages = data["pagination"]["total_pages"]
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < prefetch and page + len(pending) < total_pages:
+                    pending.append(asyncio.ensure_future(function(current_page=page + len(pending) + 1,
+                                                                  **params)))
+                for record in data[key]:
+                    yield record
+                if page >= total_pages:
+                    return
+                page += 1
+                if pending:
+                    data = await pending.popleft()
+                else:
+                    data = await function(current_page=page, **params)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def __enter__(self):
+        raise TypeError("Use 'async with' with asynchronous clients")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _check_response(self, response):
+        body = await response.read()
+        try:
+            r = self.codec.loads(body)
+        except ValueError:
+            self._check_status(response.status, body)
+            if response.status >= 400:
+                raise HTTPError(response.status, "HTTP {}: {}".format(response.status, body))
+            raise ApiError("Invalid response: {}".format(body))
+        self._check_status(response.status, r)
+        return self._check_payload(r)
+
+    async def _request(self, method, endpoint, url, params):
+        method = method.upper()
+        filtered = {k: v for k, v in params.items() if v != None}
+        if method != "GET":
+            if self.cache is None:
+                return await self._fetch(method, endpoint, url, filtered)
+            try:
+                return await self._fetch(method, endpoint, url, filtered)
+            finally:
+                self.cache.invalidate_mutation(endpoint)
+        if self.cache is None or not self.cache.cacheable(endpoint):
+            return await self._coalesce(method, endpoint, url, filtered)
+        key = self._cache_key(method, url, filtered)
+        hit, data = self.cache.get(endpoint, key)
+        if hit:
+            return data
+        generation = self.cache.generation(endpoint)
+        data = await self._coalesce(method, endpoint, url, filtered)
+        self.cache.set(endpoint, key, data, generation)
+        return data
+
+    async def _coalesce(self, method, endpoint, url, params):
+        if self.single_flight is None:
+            return await self._fetch(method, endpoint, url, params)
+        key = self._cache_key(method, url, params)
+        return await self.single_flight.call_async(key, lambda: self._fetch(method, endpoint, url, params))
+
+    async def _fetch(self, method, endpoint, url, params):
+        if self.retry_policy is not None and method == "GET":
+            data = await self.retry_policy.call_async(lambda: self._attempt(method, endpoint, url, params),
+                                                      endpoint)
+        else:
+            data = await self._attempt(method, endpoint, url, params)
+        if self.typed:
+            data = models.convert(method, endpoint, data)
+        return data
+
+    async def _attempt(self, method, endpoint, url, params):
+        limiter = self.rate_limiter
+        if limiter is None:
+            return await self._observe(method, endpoint, url, params)
+        await limiter.acquire_async(method, endpoint)
+        try:
+            data = await self._observe(method, endpoint, url, params)
+        except RateLimitError:
+            limiter.feedback(method, endpoint, throttled=True)
+            raise
+        limiter.feedback(method, endpoint, throttled=False)
+        return data
+
+    async def _observe(self, method, endpoint, url, params):
+        metrics = self.metrics
+        if metrics is None or not metrics.enabled:
+            return await self._send(method, endpoint, url, params)
+        start = time.perf_counter()
+        try:
+            data = await self._send(method, endpoint, url, params)
+        except Exception as error:
+            metrics.observe(method, endpoint, time.perf_counter() - start, error)
+            raise
+        metrics.observe(method, endpoint, time.perf_counter() - start)
+        return data
+
+    async def _send(self, method, endpoint, url, params):
+        if method == "GET":
+            body = None
+            request = self.session.get(url,params=params,headers=self.headers)
+        else:
+            body = self.codec.dumps(params)
+            request = self.session.request(method,url,data=body,headers=self.headers)
+        async with request as response:
+            if self.metrics is not None and self.metrics.enabled:
+                sent = query_size(params) if body is None else len(body)
+                self.metrics.observe_bytes(method, endpoint, sent, len(await response.read()))
+            return await self._check_response(response)
+
+class AsyncApi(AsyncBase, Api):
+    """Coin market informations, every method returns a coroutine."""
+
+class AsyncPrivateApi(AsyncBase, PrivateApi):
+    """Private trade API, every method returns a coroutine."""
@@ -0,0 +1,127 @@
+import os
+import json
+from datetime import timedelta
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from .utils import parse_datetime
+from .errors import ArgumentError
+
+SHARD_SIZE = timedelta(hours=6)
+SEAM_OVERLAP = timedelta(seconds=1)
+
+def trade_key(trade):
+    """
+    Identifies a trade, the API has no trade id so order codes and date are used.
+    """
+    return (trade["active_order_code"], trade["passive_order_code"], trade["date"])
+
+class TradeBackfill(object):
+    """
+    Downloads the trade history of a long period for a pair.
+    The period is split into shards which are fetched in parallel and
+    yielded back in time order, oldest trade first.
+
+    Each shard is requested slightly wider than its window and trades are
+    then assigned to the shard holding their date, dropping repeated
+    trades, so trades at the seams are neither lost nor duplicated.
+
+    When a checkpoint file is given, the last shard completely yielded
+    is recorded in it and a new backfill over the same period resumes
+    from the next shard. The shard being consumed during a crash is
+    yielded again on resume.
+    """
+
+    def __init__(self, api, pair, start_time, end_time, shard_size=SHARD_SIZE,
+                 max_workers=4, page_size=1000, checkpoint=None):
+        """
+        :param Api api: client used to fetch trades
+        :param str pair: BRLBTC / BRLETH / BRLLTC / BRLBCH
+        :param start_time: ISO-8601 string or datetime
+        :param end_time: ISO-8601 string or datetime
+        :param timedelta shard_size: length of the window fetched by each shard
+        :param int max_workers: shards fetched concurrently
+        :param int page_size: (1-1000) page size used inside each shard
+        :param str checkpoint: path of the file tracking finished shards
+        """
+        self.api = api
+        self.pair = pair
+        self.start_time = parse_datetime(start_time)
+        self.end_time = parse_datetime(end_time)
+        if self.end_time <= self.start_time:
+            raise ArgumentError(u"end_time must be after start_time")
+        self.shard_size = shard_size
+        self.max_workers = max_workers
+        self.page_size = page_size
+        self.checkpoint = checkpoint
+
+    def shards(self):
+        """
+        Returns the (start, end) windows covering the period, in time order.
+        """
+        shards = []
+        start = self.start_time
+        while start < self.end_time:
+            end = min(start + self.shard_size, self.end_time)
+            shards.append((start, end))
+            start = end
+        return shards
+
+    def _fetch(self, start, end):
+        last = end == self.end_time
+        trades = {}
+        for trade in self.api.iter_trades(self.pair,
+                                          start_time=(start - SEAM_OVERLAP).isoformat(),
+                                          end_time=(end + SEAM_OVERLAP).isoformat(),
+                                          page_size=self.page_size,
+                                          prefetch=0):
+            date = parse_datetime(trade["date"])
+            if start <= date < end or (last and date == end):
+                trades[trade_key(trade)] = (date, trade)
+        return [trade for date, trade in sorted(trades.values(), key=lambda t: t[0])]
+
+    def _state(self):
+        return {"pair": self.pair,
+                "start_time": self.start_time.isoformat(),
+                "end_time": self.end_time.isoformat(),
+                "shard_size": self.shard_size.total_seconds()}
+
+    def completed_shards(self):
+        """
+        Returns how many shards were completely yielded according to the checkpoint.
+        """
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        completed = state.pop("completed")
+        if state != self._state():
+            raise ArgumentError(u"Checkpoint {} belongs to another backfill".format(self.checkpoint))
+        return completed
+
+    def _save(self, completed):
+        if self.checkpoint is None:
+            return
+        state = self._state()
+        state["completed"] = completed
+        temporary = self.checkpoint + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.checkpoint)
+
+    def __iter__(self):
+        shards = self.shards()
+        completed = self.completed_shards()
+        remaining = deque(shards[completed:])
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while remaining or pending:
+                    while remaining and len(pending) < self.max_workers:
+                        pending.append(executor.submit(self._fetch, *remaining.popleft()))
+                    for trade in pending.popleft().result():
+                        yield trade
+                    completed += 1
+                    self._save(completed)
+            finally:
+                for future in pending:
+                    future.cancel()
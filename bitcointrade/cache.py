@@ -0,0 +1,127 @@
+import time
+import threading
+from collections import OrderedDict
+
+COINS = ["bitcoin", "ethereum", "litecoin", "bitcoincash"]
+
+# Seconds each endpoint stays cached, endpoints not listed are never cached
+DEFAULT_TTLS = {
+    "public/ticker": 1.0,
+    "market/summary": 5.0,
+    "wallets/balance": 2.0,
+    "market/user_orders/list": 1.0,
+}
+DEFAULT_TTLS.update(("%s/withdraw/fee" % coin, 60.0) for coin in COINS)
+
+# Endpoints whose cached responses are dropped after a mutating call,
+# besides the mutated endpoint itself
+INVALIDATES = {
+    "market/create_order": ["wallets/balance", "market/user_orders/list"],
+    "market/user_orders": ["wallets/balance", "market/user_orders/list"],
+}
+for coin in COINS:
+    INVALIDATES["%s/withdraw" % coin] = ["wallets/balance"]
+    INVALIDATES["%s/sync_transaction" % coin] = ["wallets/balance", "%s/deposits" % coin]
+
+MAXSIZE = 1024
+
+class ResponseCache(object):
+    """
+    Thread safe in-memory cache of decoded responses, with a TTL per endpoint
+    and least recently used eviction once maxsize entries are stored.
+    A cache may be shared by several clients, entries are keyed by token.
+    Cached data is returned as is to every caller and must not be mutated.
+    """
+
+    def __init__(self, ttls=None, maxsize=MAXSIZE, invalidates=None, clock=time.monotonic):
+        """
+        :param dict ttls: seconds to cache each endpoint, defaults to DEFAULT_TTLS
+        :param int maxsize: max number of cached responses
+        :param dict invalidates: endpoints dropped by each mutating endpoint, defaults to INVALIDATES
+        :param clock: function returning current time in seconds
+        """
+        self.ttls = DEFAULT_TTLS.copy() if ttls is None else ttls
+        self.maxsize = maxsize
+        self.invalidates = INVALIDATES if invalidates is None else invalidates
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._keys_by_endpoint = {}
+        self._generations = {}
+        self._cleared = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def cacheable(self, endpoint):
+        return endpoint in self.ttls
+
+    def generation(self, endpoint):
+        """
+        Returns a marker changed on each invalidation of endpoint, passed back
+        to set so responses fetched before an invalidation are not stored.
+        """
+        return self._cleared, self._generations.get(endpoint, 0)
+
+    def get(self, endpoint, key):
+        """
+        :return tuple: (True, data) on a hit, (False, None) on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, _, data = entry
+                if expires > self.clock():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, data
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def set(self, endpoint, key, data, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation(endpoint):
+                return
+            self._entries[key] = (self.clock() + self.ttls[endpoint], endpoint, data)
+            self._entries.move_to_end(key)
+            self._keys_by_endpoint.setdefault(endpoint, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, endpoint, _ = self._entries.pop(key)
+        self._keys_by_endpoint[endpoint].discard(key)
+
+    def invalidate(self, endpoint=None):
+        """
+        Drops cached responses of endpoint, or of every endpoint if None.
+        """
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+                self._keys_by_endpoint.clear()
+                self._cleared += 1
+                return
+            self._generations[endpoint] = self._generations.get(endpoint, 0) + 1
+            for key in self._keys_by_endpoint.pop(endpoint, ()):
+                self._entries.pop(key, None)
+
+    def invalidate_mutation(self, endpoint):
+        """
+        Drops responses affected by a mutating call to endpoint.
+        """
+        self.invalidate(endpoint)
+        for affected in self.invalidates.get(endpoint, ()):
+            self.invalidate(affected)
+
+    def stats(self):
+        """
+        :return dict: hits, misses, evictions and current size
+        """
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self._entries)}
@@ -0,0 +1,165 @@
+from .utils import require_numpy
+from .store import parse_timestamps
+
+# Interval lengths in milliseconds
+INTERVALS = {"1m": 60 * 1000,
+             "5m": 5 * 60 * 1000,
+             "15m": 15 * 60 * 1000,
+             "30m": 30 * 60 * 1000,
+             "1h": 60 * 60 * 1000,
+             "4h": 4 * 60 * 60 * 1000,
+             "1d": 24 * 60 * 60 * 1000}
+
+FIELDS = [("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"),
+          ("close", "<f8"), ("volume", "<f8"), ("trades", "<i8")]
+
+def decode(code):
+    return code.decode("ascii") if isinstance(code, bytes) else code
+
+class Bars(object):
+    """
+    OHLCV bars of one interval in growable column arrays, the last bar
+    is the open one and is the only bar changed by new trades.
+    """
+
+    def __init__(self, numpy, interval):
+        self.interval = interval
+        self.size = 0
+        self._columns = dict((field, numpy.empty(16, dtype=dtype)) for field, dtype in FIELDS)
+
+    def __len__(self):
+        return self.size
+
+    def columns(self):
+        """
+        :return dict: numpy array by field, views of the bars
+        """
+        return dict((field, values[:self.size]) for field, values in self._columns.items())
+
+    def _reserve(self, numpy, size):
+        capacity = len(self._columns["time"])
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        for field, values in self._columns.items():
+            grown = numpy.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self._columns[field] = grown
+
+    def add(self, numpy, timestamps, prices, amounts):
+        """
+        Aggregates trades sorted by time into bars, merging the first new bar
+        into the open one when they share the same period.
+        """
+        buckets = timestamps - timestamps % self.interval
+        starts = numpy.flatnonzero(numpy.concatenate(([True], buckets[1:] != buckets[:-1])))
+        ends = numpy.concatenate((starts[1:], [len(buckets)]))
+        bars = {"time": buckets[starts],
+                "open": prices[starts],
+                "high": numpy.maximum.reduceat(prices, starts),
+                "low": numpy.minimum.reduceat(prices, starts),
+                "close": prices[ends - 1],
+                "volume": numpy.add.reduceat(amounts, starts),
+                "trades": ends - starts}
+        columns = self._columns
+        if self.size and bars["time"][0] == columns["time"][self.size - 1]:
+            last = self.size - 1
+            columns["high"][last] = max(columns["high"][last], bars["high"][0])
+            columns["low"][last] = min(columns["low"][last], bars["low"][0])
+            columns["close"][last] = bars["close"][0]
+            columns["volume"][last] += bars["volume"][0]
+            columns["trades"][last] += bars["trades"][0]
+            bars = dict((field, values[1:]) for field, values in bars.items())
+        count = len(bars["time"])
+        self._reserve(numpy, self.size + count)
+        for field, values in bars.items():
+            columns[field][self.size:self.size + count] = values
+        self.size += count
+
+class CandleEngine(object):
+    """
+    Builds OHLCV candles of several intervals from trades in one pass.
+    Each update only changes the open candle and appends new ones, trades
+    older than the open candle of the smallest interval are counted as late
+    and ignored. Trades of the open candle are remembered by order codes and
+    date, so overlapping pages can be sent again: trades already counted
+    are skipped and counted as duplicates.
+
+        engine = CandleEngine(["1m", "5m", "1h"])
+        engine.update(api.trades("BRLBTC", page_size=1000)["trades"])
+        engine.candles("5m")["close"]
+    """
+
+    def __init__(self, intervals=("1m", "5m", "1h")):
+        """
+        :param list intervals: names of INTERVALS or lengths in milliseconds
+        """
+        self._numpy = require_numpy("CandleEngine")
+        self.intervals = [INTERVALS.get(interval, interval) for interval in intervals]
+        self._names = dict(zip(intervals, self.intervals))
+        self._bars = dict((interval, Bars(self._numpy, interval)) for interval in self.intervals)
+        self.last_timestamp = None
+        self.late = 0
+        self.duplicates = 0
+        self._seen = set()
+
+    def update(self, trades):
+        """
+        Adds trades to every interval.
+        :param trades: trade dicts or models as returned by Api.trades, in any
+                       order, or columns returned by TradeStore.query
+        :return int: number of trades added
+        """
+        numpy = self._numpy
+        if isinstance(trades, dict):
+            timestamps = numpy.asarray(trades["timestamp"], dtype="<i8")
+            prices = numpy.asarray(trades["unit_price"], dtype="<f8")
+            amounts = numpy.asarray(trades["amount"], dtype="<f8")
+            codes = list(zip(map(decode, trades["active_order_code"]), map(decode, trades["passive_order_code"])))
+        else:
+            if not trades:
+                return 0
+            timestamps = parse_timestamps(numpy, [trade["date"] for trade in trades])
+            prices = numpy.array([trade["unit_price"] for trade in trades], dtype="<f8")
+            amounts = numpy.array([trade["amount"] for trade in trades], dtype="<f8")
+            codes = [(trade["active_order_code"], trade["passive_order_code"]) for trade in trades]
+        order = numpy.argsort(timestamps, kind="stable")
+        timestamps, prices, amounts = timestamps[order], prices[order], amounts[order]
+        first = 0
+        open_time = self._open_time()
+        if open_time is not None:
+            first = int(numpy.searchsorted(timestamps, open_time, "left"))
+            self.late += first
+        keep = numpy.zeros(len(timestamps), dtype=bool)
+        seen = self._seen
+        for index in range(first, len(timestamps)):
+            key = codes[order[index]] + (int(timestamps[index]),)
+            if key not in seen:
+                seen.add(key)
+                keep[index] = True
+        self.duplicates += len(timestamps) - first - int(keep.sum())
+        timestamps, prices, amounts = timestamps[keep], prices[keep], amounts[keep]
+        if not len(timestamps):
+            return 0
+        for bars in self._bars.values():
+            bars.add(numpy, timestamps, prices, amounts)
+        self.last_timestamp = int(timestamps[-1])
+        if self._open_time() != open_time:
+            # The open candle rolled over, older trades can no longer be added
+            open_time = self._open_time()
+            self._seen = set(key for key in seen if key[2] >= open_time)
+        return len(timestamps)
+
+    def _open_time(self):
+        if self.last_timestamp is None:
+            return None
+        smallest = min(self.intervals)
+        return self.last_timestamp - self.last_timestamp % smallest
+
+    def candles(self, interval):
+        """
+        :param interval: name of INTERVALS or length in milliseconds
+        :return dict: numpy array by field, time is the start of the candle in milliseconds
+        """
+        return self._bars[self._names.get(interval, interval)].columns()
@@ -0,0 +1,60 @@
+import json
+from .errors import ArgumentError
+
+# Codecs tried by default_codec, fastest first
+PREFERENCE = ["orjson", "ujson", "json"]
+
+class Codec(object):
+    """
+    JSON encoder and decoder used by the clients.
+    loads takes the raw response bytes, dumps returns str or bytes
+    ready to be sent as request body. Both raise ValueError subclasses
+    on invalid input, like the json module.
+    """
+
+    def __init__(self, name, loads, dumps):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self):
+        return "Codec({!r})".format(self.name)
+
+def _orjson():
+    import orjson
+    return Codec("orjson", orjson.loads, orjson.dumps)
+
+def _ujson():
+    import ujson
+    return Codec("ujson", ujson.loads, ujson.dumps)
+
+def _json():
+    return Codec("json", json.loads, json.dumps)
+
+FACTORIES = {"orjson": _orjson, "ujson": _ujson, "json": _json}
+
+_default = None
+
+def get_codec(name):
+    """
+    :param str name: orjson / ujson / json
+    :return Codec: codec using the named library
+    :raise ImportError: if the library is not installed
+    """
+    if name not in FACTORIES:
+        raise ArgumentError(u"Codec {} is invalid. It should be one of {}".format(name, PREFERENCE))
+    return FACTORIES[name]()
+
+def default_codec():
+    """
+    Returns the fastest installed codec, falling back to the json module.
+    """
+    global _default
+    if _default is None:
+        for name in PREFERENCE:
+            try:
+                _default = get_codec(name)
+                break
+            except ImportError:
+                pass
+    return _default
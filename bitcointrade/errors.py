@@ -14,3 +14,27 @@ class ArgumentError(Exception):
 
     def __str__(self):
         return repr(self.error)
+
+
+class StaleBookError(Exception):
+    def __init__(self, error):
+        super(Exception, self).__init__(self, error)
+        self.error = error
+
+    def __str__(self):
+        return repr(self.error)
+
+
+class RateLimitError(ApiError):
+    """Raised when the server answers with HTTP 429 Too Many Requests"""
+
+
+class HTTPError(Exception):
+    """Raised for HTTP error statuses answered without a valid API body"""
+    def __init__(self, status, error):
+        super(Exception, self).__init__(self, error)
+        self.status = status
+        self.error = error
+
+    def __str__(self):
+        return repr(self.error)
@@ -0,0 +1,127 @@
+import time
+import random
+import warnings
+from .orderbook import OrderBook
+from .errors import ArgumentError, StaleBookError
+from .utils import require_numpy
+
+MAX_AGE = 5.0
+TOLERANCE = 1e-6
+
+class PriceEstimator(object):
+    """
+    Computes PrivateApi.estimated_price locally by walking a recent orderbook
+    snapshot, pricing a whole vector of amounts in one vectorized pass.
+
+    Optionally a fraction of the estimates is cross-checked against the
+    remote estimated_price endpoint. Checks and mismatches are counted and
+    a RuntimeWarning is issued for each mismatch.
+
+        estimator = PriceEstimator(api.orderbook("BRLBTC"))
+        estimator.estimate([0.1, 0.5, 1.0], "buy")
+    """
+
+    def __init__(self, snapshot=None, max_age=MAX_AGE, api=None, pair=None,
+                 cross_check=0.0, tolerance=TOLERANCE, clock=time.monotonic):
+        """
+        :param snapshot: orderbook payload or OrderBook
+        :param float max_age: seconds after which the snapshot is too old to price, None disables
+        :param PrivateApi api: client used for cross-checks
+        :param str pair: pair of the book, required for cross-checks
+        :param float cross_check: fraction (0-1) of estimates verified remotely
+        :param float tolerance: relative difference accepted by cross-checks
+        :param clock: function returning current time in seconds
+        """
+        if cross_check and (api is None or pair is None):
+            raise ArgumentError(u"Parameters api and pair are required by cross_check")
+        self.max_age = max_age
+        self.api = api
+        self.pair = pair
+        self.cross_check = cross_check
+        self.tolerance = tolerance
+        self.clock = clock
+        self.checks = 0
+        self.mismatches = 0
+        self.book = None
+        self.updated_at = None
+        self._sides = {}
+        if snapshot is not None:
+            self.update(snapshot)
+
+    def update(self, snapshot):
+        """
+        Replaces the book used for estimates and resets its age.
+        :param snapshot: orderbook payload or OrderBook
+        """
+        if isinstance(snapshot, OrderBook):
+            self.book = snapshot
+        elif self.book is None:
+            self.book = OrderBook(snapshot)
+        else:
+            self.book.update(snapshot)
+        self.updated_at = self.clock()
+        self._sides = {}
+
+    def age(self):
+        """
+        :return float: seconds since the last update
+        """
+        return self.clock() - self.updated_at
+
+    def _side(self, type):
+        if type not in self._sides:
+            numpy = require_numpy("PriceEstimator")
+            side = self.book.asks if type == "buy" else self.book.bids
+            levels = numpy.array(list(side), dtype=float).reshape(-1, 2)
+            prices, amounts = levels[:, 0], levels[:, 1]
+            cumulative_amount = numpy.concatenate(([0.0], numpy.cumsum(amounts)))
+            cumulative_cost = numpy.concatenate(([0.0], numpy.cumsum(amounts * prices)))
+            self._sides[type] = (prices, cumulative_amount, cumulative_cost)
+        return self._sides[type]
+
+    def estimate(self, amounts, type):
+        """
+        Returns the average unit price paid (buy) or received (sell) for each amount.
+        Amounts larger than the whole side of the book are priced as nan.
+        :param amounts: amount or sequence of amounts of coins
+        :param str type: buy/sell
+        :return numpy.ndarray: price for each amount
+        """
+        if type not in ("buy", "sell"):
+            raise ArgumentError(u"Value of argument type is invalid. It should be one of ['buy', 'sell']")
+        if self.book is None:
+            raise StaleBookError("No orderbook snapshot loaded")
+        if self.max_age is not None and self.age() > self.max_age:
+            raise StaleBookError("Orderbook snapshot is {:.1f}s old".format(self.age()))
+        numpy = require_numpy("PriceEstimator")
+        amounts = numpy.atleast_1d(numpy.asarray(amounts, dtype=float))
+        prices, cumulative_amount, cumulative_cost = self._side(type)
+        if not len(prices):
+            return numpy.full(amounts.shape, numpy.nan)
+        # index of the level where each amount stops, every level before it is filled
+        level = numpy.clip(numpy.searchsorted(cumulative_amount, amounts, side="left") - 1,
+                           0, len(prices) - 1)
+        cost = cumulative_cost[level] + (amounts - cumulative_amount[level]) * prices[level]
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            result = cost / amounts
+        result[amounts > cumulative_amount[-1]] = numpy.nan
+        result[amounts <= 0] = numpy.nan
+        if self.cross_check and random.random() < self.cross_check:
+            self._verify(float(amounts[0]), type, float(result[0]))
+        return result
+
+    def estimated_price(self, **params):
+        """
+        Local counterpart of PrivateApi.estimated_price, takes the same
+        amount and type arguments and returns the same payload.
+        """
+        price = float(self.estimate(params["amount"], params["type"])[0])
+        return {"price": price}
+
+    def _verify(self, amount, type, price):
+        remote = self.api.estimated_price(pair=self.pair, amount=amount, type=type)["price"]
+        self.checks += 1
+        if price != price or abs(price - remote) > self.tolerance * abs(remote):
+            self.mismatches += 1
+            warnings.warn("Local estimated price {} differs from remote {} for {} {}"
+                          .format(price, remote, type, amount), RuntimeWarning)
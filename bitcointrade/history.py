@@ -0,0 +1,188 @@
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from .utils import parse_datetime
+
+COINS = ["bitcoin", "ethereum", "litecoin", "bitcoincash"]
+KINDS = ["deposits", "withdrawals"]
+OVERLAP = timedelta(minutes=5)
+PAGE_SIZE = 1000
+
+# Statuses a record may still leave, such records are fetched again until they settle
+PENDING = {"deposits": ("confirmation_pending",), "withdrawals": ("pending",)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    code TEXT NOT NULL,
+    status TEXT,
+    create_date TEXT,
+    update_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, coin, code)
+);
+CREATE INDEX IF NOT EXISTS records_create_date ON records (kind, coin, create_date);
+CREATE INDEX IF NOT EXISTS records_status ON records (kind, coin, status);
+CREATE TABLE IF NOT EXISTS watermarks (
+    kind TEXT NOT NULL,
+    coin TEXT NOT NULL,
+    update_date TEXT NOT NULL,
+    PRIMARY KEY (kind, coin)
+);
+"""
+
+def normalize_date(value):
+    """
+    :return str: UTC ISO-8601 date with milliseconds, ordered like the dates it represents
+    """
+    if value is None:
+        return None
+    return parse_datetime(value).astimezone(timezone.utc).isoformat(timespec="milliseconds")
+
+def update_date(record):
+    """
+    Date of the last change of a record, deposits have no update_date
+    so their confirmation or creation date is used.
+    """
+    for field in ("update_date", "confirmation_date", "create_date"):
+        if field in record and record[field] is not None:
+            return normalize_date(record[field])
+    return None
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError("{!r} is not JSON serializable".format(value))
+
+class WalletHistory(object):
+    """
+    Local SQLite copy of the deposits and withdrawals of every coin.
+    sync only downloads what changed since the last run: each coin and
+    kind keeps a watermark on update_date, the next run asks for records
+    created since that watermark minus an overlap, or since the oldest
+    record still pending, and upserts them by code. Queries are then
+    served from the indexed local database.
+
+        history = WalletHistory("wallet.db")
+        history.sync(api)
+        history.deposits(coin="bitcoin", status="confirmed")
+    """
+
+    def __init__(self, path, overlap=OVERLAP):
+        """
+        :param str path: SQLite database file, created if needed, ":memory:" for a temporary one
+        :param timedelta overlap: time subtracted from watermarks, covering records saved late by the API
+        """
+        self.path = path
+        self.overlap = overlap
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def watermark(self, kind, coin):
+        """
+        :return str: update_date of the latest change synced, None before the first sync
+        """
+        with self._lock:
+            row = self._connection.execute("SELECT update_date FROM watermarks WHERE kind = ? AND coin = ?",
+                                           (kind, coin)).fetchone()
+        return row[0] if row else None
+
+    def window(self, kind, coin):
+        """
+        :return datetime: start_date of the next sync, None to fetch everything
+        """
+        watermark = self.watermark(kind, coin)
+        if watermark is None:
+            return None
+        start = parse_datetime(watermark) - self.overlap
+        statuses = PENDING[kind]
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT MIN(create_date) FROM records WHERE kind = ? AND coin = ? AND status IN (%s)" %
+                ",".join("?" * len(statuses)), (kind, coin) + statuses).fetchone()
+        if row[0] is not None:
+            start = min(start, parse_datetime(row[0]))
+        return start
+
+    def upsert(self, kind, coin, records):
+        """
+        Inserts or replaces records by code and moves the watermark forward.
+        :return int: number of records written
+        """
+        rows = []
+        latest = self.watermark(kind, coin)
+        for record in records:
+            if hasattr(record, "to_dict"):
+                record = record.to_dict()
+            updated = update_date(record)
+            if updated is not None and (latest is None or updated > latest):
+                latest = updated
+            rows.append((kind, coin, record["code"], record.get("status"), normalize_date(record.get("create_date")),
+                         updated, json.dumps(record, default=_json_default)))
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            if latest is not None:
+                self._connection.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)", (kind, coin, latest))
+        return len(rows)
+
+    def sync(self, api, coins=COINS, kinds=KINDS, page_size=PAGE_SIZE):
+        """
+        Downloads the records changed since the last sync.
+        :param PrivateApi api: client used to fetch records
+        :param list coins: bitcoin / ethereum / litecoin / bitcoincash, all by default
+        :param list kinds: deposits / withdrawals, both by default
+        :param int page_size: (1-1000) records per request
+        :return dict: number of records written by (kind, coin)
+        """
+        written = {}
+        for kind in kinds:
+            iterate = api.iter_deposit_list if kind == "deposits" else api.iter_withdraw_list
+            for coin in coins:
+                params = {"page_size": page_size}
+                start = self.window(kind, coin)
+                if start is not None:
+                    params["start_date"] = start.isoformat()
+                written[(kind, coin)] = self.upsert(kind, coin, list(iterate(coin, **params)))
+        return written
+
+    def _query(self, kind, coin, status, start_date, end_date):
+        query = "SELECT data FROM records WHERE kind = ?"
+        args = [kind]
+        for condition, value in (("coin = ?", coin), ("status = ?", status),
+                                 ("create_date >= ?", normalize_date(start_date)),
+                                 ("create_date < ?", normalize_date(end_date))):
+            if value is not None:
+                query += " AND " + condition
+                args.append(value)
+        with self._lock:
+            rows = self._connection.execute(query + " ORDER BY create_date, code", args).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def deposits(self, coin=None, status=None, start_date=None, end_date=None):
+        """
+        Returns synced deposits with start_date <= create_date < end_date, oldest first.
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash, all by default
+        :param str status: confirmation_pending / confirmed / canceled
+        :param start_date: ISO-8601 string or datetime, None for no bound
+        :param end_date: ISO-8601 string or datetime, None for no bound
+        """
+        return self._query("deposits", coin, status, start_date, end_date)
+
+    def withdrawals(self, coin=None, status=None, start_date=None, end_date=None):
+        """
+        Returns synced withdrawals with start_date <= create_date < end_date, oldest first.
+        Takes the same arguments as deposits, status is pending / confirmed / canceled.
+        """
+        return self._query("withdrawals", coin, status, start_date, end_date)
@@ -0,0 +1,149 @@
+import bisect
+import threading
+from urllib.parse import urlencode
+
+# Upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def query_size(params):
+    """
+    :return int: bytes of params encoded in a url query
+    """
+    return len(urlencode(params)) if params else 0
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(**labels):
+    return "{" + ",".join('{}="{}"'.format(name, _label(value)) for name, value in labels.items()) + "}"
+
+class EndpointStats(object):
+    """
+    Counters of the requests sent to one endpoint with one method.
+    """
+    __slots__ = ("requests", "errors", "buckets", "latency_sum", "request_bytes", "response_bytes")
+
+    def __init__(self, buckets):
+        self.requests = 0
+        self.errors = {}
+        self.buckets = [0] * (len(buckets) + 1)
+        self.latency_sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+class MetricsRegistry(object):
+    """
+    In-process registry of request metrics by method and endpoint:
+    request counts, error counts by exception type, latency histograms
+    and request/response sizes. Clients record every request sent, cache
+    hits are not requests and are not recorded. A registry may be shared
+    by clients, disabled ones cost clients a single attribute check.
+
+        metrics = MetricsRegistry()
+        api = Api(metrics=metrics)
+        api.ticker("BRLBTC")
+        metrics.snapshot()[("GET", "public/ticker")]["requests"]
+        print(metrics.prometheus())
+    """
+
+    def __init__(self, buckets=BUCKETS, enabled=True):
+        """
+        :param tuple buckets: sorted upper bounds in seconds of the latency histogram
+        :param bool enabled: record requests, may be switched at any time
+        """
+        self.buckets = tuple(buckets)
+        self.enabled = enabled
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _get(self, method, endpoint):
+        key = (method, endpoint)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = EndpointStats(self.buckets)
+        return stats
+
+    def observe(self, method, endpoint, seconds, error=None):
+        """
+        Records a request and its latency.
+        :param Exception error: exception raised by the request, None on success
+        """
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            stats = self._get(method, endpoint)
+            stats.requests += 1
+            stats.buckets[index] += 1
+            stats.latency_sum += seconds
+            if error is not None:
+                name = type(error).__name__
+                stats.errors[name] = stats.errors.get(name, 0) + 1
+
+    def observe_bytes(self, method, endpoint, sent, received):
+        """
+        Records sizes of a request: url query or body sent, and body received.
+        """
+        with self._lock:
+            stats = self._get(method, endpoint)
+            stats.request_bytes += sent
+            stats.response_bytes += received
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self):
+        """
+        :return dict: metrics keyed by (method, endpoint), latency buckets are
+                      cumulative (upper bound, count) pairs ending with infinity
+        """
+        with self._lock:
+            items = [(key, stats.requests, dict(stats.errors), list(stats.buckets), stats.latency_sum,
+                      stats.request_bytes, stats.response_bytes) for key, stats in self._stats.items()]
+        result = {}
+        for key, requests, errors, buckets, latency_sum, request_bytes, response_bytes in items:
+            cumulative, total = [], 0
+            for bound, count in zip(self.buckets + (float("inf"),), buckets):
+                total += count
+                cumulative.append((bound, total))
+            result[key] = {"requests": requests,
+                           "errors": errors,
+                           "latency": {"buckets": cumulative, "sum": latency_sum, "count": requests},
+                           "request_bytes": request_bytes,
+                           "response_bytes": response_bytes}
+        return result
+
+    def prometheus(self, prefix="bitcointrade"):
+        """
+        :return str: metrics in Prometheus text exposition format
+        """
+        snapshot = sorted(self.snapshot().items())
+        lines = ["# HELP {}_requests_total Requests sent.".format(prefix),
+                 "# TYPE {}_requests_total counter".format(prefix)]
+        for (method, endpoint), stats in snapshot:
+            lines.append("{}_requests_total{} {}".format(prefix, _labels(method=method, endpoint=endpoint),
+                                                         stats["requests"]))
+        lines += ["# HELP {}_errors_total Requests failed, by exception type.".format(prefix),
+                  "# TYPE {}_errors_total counter".format(prefix)]
+        for (method, endpoint), stats in snapshot:
+            for error, count in sorted(stats["errors"].items()):
+                lines.append("{}_errors_total{} {}".format(
+                    prefix, _labels(method=method, endpoint=endpoint, type=error), count))
+        lines += ["# HELP {}_request_duration_seconds Request latency.".format(prefix),
+                  "# TYPE {}_request_duration_seconds histogram".format(prefix)]
+        for (method, endpoint), stats in snapshot:
+            latency = stats["latency"]
+            for bound, count in latency["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("{}_request_duration_seconds_bucket{} {}".format(
+                    prefix, _labels(method=method, endpoint=endpoint, le=le), count))
+            labels = _labels(method=method, endpoint=endpoint)
+            lines.append("{}_request_duration_seconds_sum{} {!r}".format(prefix, labels, latency["sum"]))
+            lines.append("{}_request_duration_seconds_count{} {}".format(prefix, labels, latency["count"]))
+        for name, help_text in (("request_bytes", "Bytes of url queries and bodies sent."),
+                                ("response_bytes", "Bytes of response bodies received.")):
+            lines += ["# HELP {}_{}_total {}".format(prefix, name, help_text),
+                      "# TYPE {}_{}_total counter".format(prefix, name)]
+            for (method, endpoint), stats in snapshot:
+                lines.append("{}_{}_total{} {}".format(prefix, name, _labels(method=method, endpoint=endpoint),
+                                                      stats[name]))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,155 @@
+from datetime import datetime
+from operator import attrgetter
+from .utils import parse_datetime
+
+COINS = ["bitcoin", "ethereum", "litecoin", "bitcoincash"]
+
+class Model(object):
+    """
+    Compact record of an API object. Values are kept in slots as received
+    and numeric and ISO-8601 fields are parsed on first access. Fields are
+    read as attributes or, like the original dicts, by key.
+    """
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        get = data.get
+        return cls(*[get(field) for field in cls._fields])
+
+    @classmethod
+    def from_list(cls, rows):
+        """
+        Converts a whole page of dicts at once.
+        """
+        fields = cls._fields
+        return [cls(*[row.get(field) for field in fields]) for row in rows]
+
+    def __getitem__(self, field):
+        if field not in self._fields:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in self._fields
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def to_dict(self):
+        return dict((field, getattr(self, field)) for field in self._fields)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__,
+                               ", ".join("{}={!r}".format(field, getattr(self, slot))
+                                         for field, slot in zip(self._fields, self.__slots__)))
+
+def _lazy(slot, parse, parsed_type):
+    def get(self):
+        value = getattr(self, slot)
+        if value is not None and type(value) is not parsed_type:
+            value = parse(value)
+            setattr(self, slot, value)
+        return value
+    return property(get)
+
+def model(name, fields, floats=(), dates=(), doc=None):
+    """
+    Creates a Model subclass with a slot and a property for each field.
+    """
+    namespace = {"__slots__": tuple("_" + field for field in fields),
+                 "_fields": tuple(fields),
+                 "__doc__": doc}
+    for field in fields:
+        if field in floats:
+            namespace[field] = _lazy("_" + field, float, float)
+        elif field in dates:
+            namespace[field] = _lazy("_" + field, parse_datetime, datetime)
+        else:
+            namespace[field] = property(attrgetter("_" + field))
+    return type(name, (Model,), namespace)
+
+Trade = model("Trade",
+              ["type", "amount", "unit_price", "active_order_code", "passive_order_code", "date"],
+              floats=["amount", "unit_price"], dates=["date"],
+              doc="Trade of Api.trades")
+
+BookLevel = model("BookLevel",
+                  ["unit_price", "amount", "code", "stop_limit_price", "id", "user_code"],
+                  floats=["unit_price", "amount", "stop_limit_price"],
+                  doc="Order of Api.orderbook and PrivateApi.orderbook_full")
+
+Order = model("Order",
+              ["id", "code", "pair_code", "type", "subtype", "requested_amount",
+               "executed_amount", "remaining_amount", "remaining_price", "unit_price",
+               "total_price", "status", "create_date", "update_date"],
+              floats=["requested_amount", "executed_amount", "remaining_amount",
+                      "remaining_price", "unit_price", "total_price"],
+              dates=["create_date", "update_date"],
+              doc="Order of PrivateApi.get_user_orders")
+
+Withdrawal = model("Withdrawal",
+                   ["code", "origin_address", "destination_address", "amount", "miner_fee",
+                    "miner_fee_type", "tax_index", "tax_index_calculated", "tax_amount",
+                    "status", "create_date", "update_date", "transaction_id",
+                    "currency_code", "link"],
+                   floats=["amount", "miner_fee", "tax_index", "tax_index_calculated", "tax_amount"],
+                   dates=["create_date", "update_date"],
+                   doc="Withdrawal of the *_withdraw_list and *_create_withdraw methods")
+
+Deposit = model("Deposit",
+                ["code", "currency_code", "hash", "amount", "status", "create_date",
+                 "confirmation_date"],
+                floats=["amount"], dates=["create_date", "confirmation_date"],
+                doc="Deposit of the *_deposit_list methods")
+
+Balance = model("Balance",
+                ["currency_code", "available_amount", "locked_amount"],
+                floats=["available_amount", "locked_amount"],
+                doc="Balance of a currency in PrivateApi.balance")
+
+# Model of each (method, endpoint), by response field holding the records,
+# None when the response itself is the record or the list of records
+CONVERSIONS = {
+    ("GET", "public/trades"): {"trades": Trade},
+    ("GET", "public/orders"): {"bids": BookLevel, "asks": BookLevel},
+    ("GET", "market"): {"buying": BookLevel, "selling": BookLevel},
+    ("GET", "market/user_orders/list"): {"orders": Order},
+    ("GET", "wallets/balance"): {None: Balance},
+}
+for coin in COINS:
+    CONVERSIONS[("GET", "%s/withdraw" % coin)] = {"withdrawals": Withdrawal}
+    CONVERSIONS[("POST", "%s/withdraw" % coin)] = {None: Withdrawal}
+    CONVERSIONS[("GET", "%s/deposits" % coin)] = {"deposits": Deposit}
+
+def _convert_records(cls, records):
+    if isinstance(records, list):
+        return cls.from_list(records)
+    return cls.from_dict(records)
+
+def convert(method, endpoint, data):
+    """
+    Converts the records of a decoded response into models, responses of
+    other endpoints are returned unchanged. Page dicts are kept, only the
+    lists of records in them are converted.
+    """
+    conversion = CONVERSIONS.get((method, endpoint))
+    if conversion is None or data is None:
+        return data
+    if None in conversion:
+        return _convert_records(conversion[None], data)
+    data = dict(data)
+    for field, cls in conversion.items():
+        if data.get(field) is not None:
+            data[field] = cls.from_list(data[field])
+    return data
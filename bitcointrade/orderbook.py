@@ -0,0 +1,194 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+class BookSide(object):
+    """
+    Price levels of one side of the book, kept in compact arrays sorted from
+    the best price to the worst. Orders at the same unit_price are merged in
+    a single level. Bids are stored with negated prices so both sides are
+    ascending and share the same binary searches.
+    """
+
+    def __init__(self, bids):
+        """
+        :param bool bids: True for the buying side, False for the selling side
+        """
+        self.sign = -1.0 if bids else 1.0
+        self._keys = array("d")
+        self._amounts = array("d")
+        self._cumulative = array("d")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        for key, amount in zip(self._keys, self._amounts):
+            yield self.sign * key, amount
+
+    def _index(self, price):
+        key = self.sign * price
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return i
+        return None
+
+    def _refresh(self):
+        if len(self._cumulative) == len(self._amounts):
+            return
+        start = len(self._cumulative)
+        total = self._cumulative[-1] if start else 0.0
+        for amount in self._amounts[start:]:
+            total += amount
+            self._cumulative.append(total)
+
+    def _dirty(self, index):
+        del self._cumulative[index:]
+
+    def best(self):
+        """
+        :return tuple: (price, amount) of the best level, None if the side is empty
+        """
+        if not self._keys:
+            return None
+        return self.sign * self._keys[0], self._amounts[0]
+
+    def level(self, index):
+        """
+        :return tuple: (price, amount) of the index-th best level
+        """
+        return self.sign * self._keys[index], self._amounts[index]
+
+    def depth(self, price):
+        """
+        :return float: amount offered at exactly price, 0 if there is no such level
+        """
+        i = self._index(float(price))
+        return self._amounts[i] if i is not None else 0.0
+
+    def cumulative(self, levels):
+        """
+        :return float: amount offered by the best levels
+        """
+        levels = min(levels, len(self._keys))
+        if levels <= 0:
+            return 0.0
+        self._refresh()
+        return self._cumulative[levels - 1]
+
+    def volume(self, price):
+        """
+        :return float: amount offered at price or better
+        """
+        return self.cumulative(bisect_right(self._keys, self.sign * float(price)))
+
+    def load(self, levels):
+        """
+        Replaces every level.
+        :param dict levels: amount by price
+        """
+        keys = sorted(self.sign * price for price in levels)
+        self._keys = array("d", keys)
+        self._amounts = array("d", (levels[self.sign * key] for key in keys))
+        self._cumulative = array("d")
+
+    def update(self, levels):
+        """
+        Applies a new snapshot as a diff, touching only levels that changed.
+        :param dict levels: amount by price of the new snapshot
+        :return list: (price, old amount, new amount) for each changed level
+        """
+        changes = []
+        first = len(self._keys)
+        for i in range(len(self._keys) - 1, -1, -1):
+            price = self.sign * self._keys[i]
+            if price not in levels:
+                changes.append((price, self._amounts[i], 0.0))
+                del self._keys[i]
+                del self._amounts[i]
+                first = i
+        for price, amount in levels.items():
+            key = self.sign * price
+            i = bisect_left(self._keys, key)
+            if i < len(self._keys) and self._keys[i] == key:
+                if self._amounts[i] != amount:
+                    changes.append((price, self._amounts[i], amount))
+                    self._amounts[i] = amount
+                    first = min(first, i)
+            else:
+                changes.append((price, 0.0, amount))
+                self._keys.insert(i, key)
+                self._amounts.insert(i, amount)
+                first = min(first, i)
+        self._dirty(first)
+        return changes
+
+def aggregate(orders):
+    """
+    Merges orders of a snapshot side into amount by price.
+    """
+    levels = {}
+    for order in orders:
+        price = float(order["unit_price"])
+        levels[price] = levels.get(price, 0.0) + float(order["amount"])
+    return levels
+
+class OrderBook(object):
+    """
+    Local order book built from Api.orderbook or PrivateApi.orderbook_full payloads.
+    Best prices and spread are answered in O(1), depth and cumulative
+    volume at a price in O(log n).
+
+        book = OrderBook(api.orderbook("BRLBTC"))
+        book.spread()
+        book.update(api.orderbook("BRLBTC"))
+    """
+
+    def __init__(self, snapshot=None):
+        """
+        :param dict snapshot: optional payload loaded as the first snapshot
+        """
+        self.bids = BookSide(bids=True)
+        self.asks = BookSide(bids=False)
+        if snapshot is not None:
+            self.load(snapshot)
+
+    @staticmethod
+    def _sides(snapshot):
+        bids = snapshot["bids"] if "bids" in snapshot else snapshot["buying"]
+        asks = snapshot["asks"] if "asks" in snapshot else snapshot["selling"]
+        return aggregate(bids), aggregate(asks)
+
+    def load(self, snapshot):
+        """
+        Rebuilds the book from scratch.
+        """
+        bids, asks = self._sides(snapshot)
+        self.bids.load(bids)
+        self.asks.load(asks)
+
+    def update(self, snapshot):
+        """
+        Applies a new snapshot as a diff against the current book.
+        :return dict: changed levels of each side, see BookSide.update
+        """
+        bids, asks = self._sides(snapshot)
+        return {"bids": self.bids.update(bids), "asks": self.asks.update(asks)}
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def spread(self):
+        """
+        :return float: best ask minus best bid, None if a side is empty
+        """
+        if not self.bids or not self.asks:
+            return None
+        return self.asks.best()[0] - self.bids.best()[0]
+
+    def mid_price(self):
+        if not self.bids or not self.asks:
+            return None
+        return (self.asks.best()[0] + self.bids.best()[0]) / 2.0
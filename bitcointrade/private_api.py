@@ -1,11 +1,57 @@
+import functools
+import operator
 from .errors import ArgumentError
-from .utils import check_args
+from .utils import Schema
 
 from .api import Base
 
+COINS = ["bitcoin", "ethereum", "litecoin", "bitcoincash"]
+
+# Time order of withdrawals and deposits of all coins
+CREATE_DATE = operator.itemgetter("create_date")
+
+# Argument schemas, compiled once at import time
+COIN = Schema({"coin": COINS})
+WITHDRAW_LIST = Schema(optional_parameters={"start_date": str,
+                                            "end_date": str,
+                                            "status": ["pending","confirmed","canceled"],
+                                            "page_size": int,
+                                            "current_page": int})
+DEPOSIT_LIST = Schema(optional_parameters={"start_date": str,
+                                           "end_date": str,
+                                           "status": ["confirmation_pending","confirmed","canceled"],
+                                           "page_size": int,
+                                           "current_page": int})
+CREATE_WITHDRAW = Schema({"destination": str,
+                          "fee_type":["fast","regular","slow"],
+                          "amount": float})
+SYNC_TRANSACTION = Schema({"hash": str})
+ORDERBOOK_FULL = Schema({"pair": ["BRLBTC","BRLLTC","BRLETH","BRLBCH"]})
+SUMMARY = Schema({"pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"]})
+CREATE_ORDER = Schema({"pair": ["BRLBTC","BRLLTC","BRLBCH","BRLETH"],
+                       "amount": float,
+                       "type":["buy","sell"],
+                       "subtype":["market","limited","stopLimit"]},
+                      optional_parameters={"unit_price": float,"request_price": float})
+USER_ORDERS = Schema(optional_parameters={"start_date": str,
+                                          "end_date": str,
+                                          "status": ["executed_completely","executed_partially","waiting","canceled"],
+                                          "type": ["buy","sell"],
+                                          "page_size": int,
+                                          "current_page": int,
+                                          "pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"]})
+CANCEL_ORDER = Schema({"id": str})
+ESTIMATED_PRICE = Schema({"pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"],
+                          "amount": float,
+                          "type": ["buy", "sell"]})
+
 class PrivateApi(Base):
-    def __init__(self, token):
-        Base.__init__(self)
+    def __init__(self, token, **kwargs):
+        """
+        :param str token: ApiToken used to authenticate requests
+        :param \*\*kwargs: connection pool options forwarded to Base
+        """
+        Base.__init__(self, **kwargs)
         self.token = token
         self.headers = {"Content-Type": "application/json",
                         "Authorization": "ApiToken "+self.token}
@@ -17,7 +63,7 @@ class PrivateApi(Base):
         https://apidocs.bitcointrade.com.br/#76927020-dcd0-4fcd-824b-68fad1eef8d9
         Returns fee estimates for each confirmation speed category
         """
-        return self.get_api("bitcoin","withdraw/fee", **params)
+        return self.withdraw_fee("bitcoin", **params)
 
     def bitcoin_withdraw_list(self, **params):
         """
@@ -30,12 +76,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("bitcoin","withdraw", **params)
+        return self.withdraw_list("bitcoin", **params)
+
+    def iter_bitcoin_withdraw_list(self, prefetch=1, **params):
+        """
+        Yields every withdrawal, walking all pages.
+        Takes the same arguments as bitcoin_withdraw_list, see iter_pages for prefetch.
+        """
+        return self.iter_withdraw_list("bitcoin", prefetch, **params)
 
     def bitcoin_create_withdraw(self, **params):
         """
@@ -46,10 +94,7 @@ class PrivateApi(Base):
         :param str fee_type: fast / regular / slow
         :param float amount: amount to send
         """
-        check_args(params, {"destination": str,
-                            "fee_type":["fast","regular","slow"],
-                            "amount": float})
-        return self.post_api("bitcoin","withdraw", **params)
+        return self.create_withdraw("bitcoin", **params)
 
     def bitcoin_deposit_list(self, **params):
         """
@@ -62,12 +107,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["confirmation_pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("bitcoin","deposits", **params)
+        return self.deposit_list("bitcoin", **params)
+
+    def iter_bitcoin_deposit_list(self, prefetch=1, **params):
+        """
+        Yields every deposit, walking all pages.
+        Takes the same arguments as bitcoin_deposit_list, see iter_pages for prefetch.
+        """
+        return self.iter_deposit_list("bitcoin", prefetch, **params)
 
     def bitcoin_sync_transaction(self, **params):
         """
@@ -80,8 +127,7 @@ class PrivateApi(Base):
         Arguments:
         :param str hash: transaction hash to syncronize
         """
-        check_args(params, {"hash": str})
-        return self.post_api("bitcoin","sync_transaction", **params)
+        return self.sync_transaction("bitcoin", **params)
 
     # Market API type
 
@@ -92,7 +138,7 @@ class PrivateApi(Base):
         Arguments:
         :param str pair: BRLBTC/BRLLTC/BRLETH/BRLBCH
         """
-        check_args(params, {"pair": ["BRLBTC","BRLLTC","BRLETH","BRLBCH"]})
+        ORDERBOOK_FULL.check(params)
         return self.request_api_noaction("GET","market",**params)
 
     def summary(self, **params):
@@ -102,9 +148,17 @@ class PrivateApi(Base):
         Arguments:
         :param str pair: BRLBTC / BRLETH / BRLLTC / BRLBCH
         """
-        check_args(params, {"pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"]})
+        SUMMARY.check(params)
         return self.get_api("market","summary", **params)
 
+    def summaries(self, pairs):
+        """
+        Returns market summaries for many pairs, fetched concurrently.
+        :param list pairs: BRLBTC / BRLETH / BRLLTC / BRLBCH
+        :return BatchResult: summaries keyed by pair, failures kept in errors
+        """
+        return self._fan_out(lambda pair: self.summary(pair=pair), pairs)
+
     def create_order(self, **params):
         """
         https://apidocs.bitcointrade.com.br/#9ed16ef6-c2bd-459d-b0a6-9d7a56e944f3
@@ -117,13 +171,26 @@ class PrivateApi(Base):
         :param float unit_price: how much to pay/earn (in BRL) per coin
         :param float request_price: total order value, in limited orders this is ignored
         """
-        check_args(params, { "pair": ["BRLBTC","BRLLTC","BRLBCH","BRLETH"],
-                             "amount": float,
-                             "type":["buy","sell"],
-                             "subtype":["market","limited","stopLimit"]},
-                   optional_parameters={"unit_price": float,"request_price": float})
+        CREATE_ORDER.check(params)
         return self.post_api("market","create_order", **params)
 
+    def create_orders(self, orders, cancel_on_error=False):
+        """
+        Creates many orders concurrently, at most max_workers requests in
+        flight, pool_maxsize (10) by default: a ladder no larger than
+        max_workers is placed in about one round trip, larger ones in
+        successive waves. Every order is validated like create_order
+        before any is sent.
+        :param list orders: dicts of create_order arguments
+        :param bool cancel_on_error: once an order fails, skip the orders not sent yet
+        :return BatchResult: created orders keyed by index in orders, failures kept in errors
+        """
+        orders = list(orders)
+        for params in orders:
+            CREATE_ORDER.check(params)
+        return self._fan_out(lambda index: self.post_api("market","create_order", **orders[index]),
+                             range(len(orders)), cancel_on_error)
+
     def get_user_orders(self, **params):
         """
         https://apidocs.bitcointrade.com.br/#91edc155-a911-46bc-a6e8-dd1f77b23c59
@@ -137,15 +204,16 @@ class PrivateApi(Base):
         :param int current_page: (numeric optional)
         :param str pair: BRLBTC / BRLETH / BRLLTC / BRLBCH
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["executed_completely","executed_partially","waiting","canceled"],
-                                                "type": ["buy","sell"],
-                                                "page_size": int,
-                                                "current_page": int,
-                                                "pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"]})
+        USER_ORDERS.check(params)
         return self.get_api("market","user_orders/list", **params)
 
+    def iter_user_orders(self, prefetch=1, **params):
+        """
+        Yields every user order, walking all pages.
+        Takes the same arguments as get_user_orders, see iter_pages for prefetch.
+        """
+        return self.iter_pages(self.get_user_orders, "orders", prefetch, **params)
+
     def cancel_order(self, **params):
         """
         https://apidocs.bitcointrade.com.br/#4a20e870-18b1-4a3d-ad72-a14ecf449f74
@@ -153,9 +221,23 @@ class PrivateApi(Base):
         Arguments:
         :param str id: order id
         """
-        check_args(params, { "id": str })
+        CANCEL_ORDER.check(params)
         return self.request_api("DELETE","market","user_orders", **params)
 
+    def cancel_orders(self, ids, cancel_on_error=False):
+        """
+        Cancels many orders concurrently. Every id is validated like
+        cancel_order before any request is sent.
+        :param list ids: order ids
+        :param bool cancel_on_error: once a cancellation fails, skip the ones not sent yet
+        :return BatchResult: responses keyed by id, failures kept in errors
+        """
+        ids = list(ids)
+        for id in ids:
+            CANCEL_ORDER.check({"id": id})
+        return self._fan_out(lambda id: self.request_api("DELETE","market","user_orders", id=id),
+                             ids, cancel_on_error)
+
     def estimated_price(self, **params):
         """
         https://apidocs.bitcointrade.com.br/#62e55ae0-0c79-413e-9a87-6fb1b87072fa
@@ -165,9 +247,7 @@ class PrivateApi(Base):
         :param float amount: amount of coins to buy/sell
         :param str type: buy/sell
         """
-        check_args(params, {"pair": ["BRLBTC", "BRLLTC", "BRLBCH", "BRLETH"],
-                            "amount": float,
-                            "type": ["buy", "sell"]})
+        ESTIMATED_PRICE.check(params)
         return self.get_api("market","estimated_price", **params)
 
     #Wallets API type
@@ -179,6 +259,100 @@ class PrivateApi(Base):
         """
         return self.get_api("wallets","balance", **params)
 
+    # Coin parameterized wallet API, the coin methods below delegate to it
+
+    def withdraw_fee(self, coin, **params):
+        """
+        Returns fee estimates for each confirmation speed category
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash
+        """
+        COIN.check({"coin": coin})
+        return self.get_api(coin,"withdraw/fee", **params)
+
+    def withdraw_list(self, coin, **params):
+        """
+        Returns users withdrawals list of a coin
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash
+        Takes the same optional arguments as bitcoin_withdraw_list.
+        """
+        COIN.check({"coin": coin})
+        WITHDRAW_LIST.check(params)
+        return self.get_api(coin,"withdraw", **params)
+
+    def iter_withdraw_list(self, coin, prefetch=1, **params):
+        """
+        Yields every withdrawal of a coin, walking all pages.
+        Takes the same arguments as withdraw_list, see iter_pages for prefetch.
+        """
+        return self.iter_pages(functools.partial(self.withdraw_list, coin), "withdrawals", prefetch, **params)
+
+    def create_withdraw(self, coin, **params):
+        """
+        Withdraws coins to requested address
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash
+        Takes the same arguments as bitcoin_create_withdraw.
+        """
+        COIN.check({"coin": coin})
+        CREATE_WITHDRAW.check(params)
+        return self.post_api(coin,"withdraw", **params)
+
+    def deposit_list(self, coin, **params):
+        """
+        Returns users deposits list of a coin
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash
+        Takes the same optional arguments as bitcoin_deposit_list.
+        """
+        COIN.check({"coin": coin})
+        DEPOSIT_LIST.check(params)
+        return self.get_api(coin,"deposits", **params)
+
+    def iter_deposit_list(self, coin, prefetch=1, **params):
+        """
+        Yields every deposit of a coin, walking all pages.
+        Takes the same arguments as deposit_list, see iter_pages for prefetch.
+        """
+        return self.iter_pages(functools.partial(self.deposit_list, coin), "deposits", prefetch, **params)
+
+    def sync_transaction(self, coin, **params):
+        """
+        Syncronizes a transaction based on its hash, see bitcoin_sync_transaction
+        :param str coin: bitcoin / ethereum / litecoin / bitcoincash
+        :param str hash: transaction hash to syncronize
+        """
+        COIN.check({"coin": coin})
+        SYNC_TRANSACTION.check(params)
+        return self.post_api(coin,"sync_transaction", **params)
+
+    def all_withdraw_fees(self, coins=COINS):
+        """
+        Returns fee estimates of many coins, fetched concurrently.
+        :param list coins: bitcoin / ethereum / litecoin / bitcoincash, all by default
+        :return BatchResult: fees keyed by coin, failures kept in errors
+        """
+        return self._fan_out(self.withdraw_fee, coins)
+
+    def all_withdrawals(self, coins=COINS, **params):
+        """
+        Returns every withdrawal of many coins, oldest first. Coins are
+        fetched concurrently, each one walking all its pages.
+        :param list coins: bitcoin / ethereum / litecoin / bitcoincash, all by default
+        Takes the same optional arguments as withdraw_list, except current_page.
+        """
+        WITHDRAW_LIST.check(params)
+        return self._merge(lambda coin: self._collect(functools.partial(self.withdraw_list, coin),
+                                                      "withdrawals", **params), coins, CREATE_DATE)
+
+    def all_deposits(self, coins=COINS, **params):
+        """
+        Returns every deposit of many coins, oldest first. Coins are
+        fetched concurrently, each one walking all its pages.
+        :param list coins: bitcoin / ethereum / litecoin / bitcoincash, all by default
+        Takes the same optional arguments as deposit_list, except current_page.
+        """
+        DEPOSIT_LIST.check(params)
+        return self._merge(lambda coin: self._collect(functools.partial(self.deposit_list, coin),
+                                                      "deposits", **params), coins, CREATE_DATE)
+
     # Ethereum API type (why arent coins expressed as parameters in a single endpoint? no idea \_("/)_/)
 
     def ethereum_withdraw_fee(self, **params):
@@ -186,7 +360,7 @@ class PrivateApi(Base):
         https://apidocs.bitcointrade.com.br/#c6dd2a46-9e7c-454f-8ecd-b0d04cd844dc
         Returns fee estimates for each confirmation speed category
         """
-        return self.get_api("ethereum","withdraw/fee", **params)
+        return self.withdraw_fee("ethereum", **params)
 
     def ethereum_withdraw_list(self, **params):
         """
@@ -199,12 +373,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("ethereum","withdraw", **params)
+        return self.withdraw_list("ethereum", **params)
+
+    def iter_ethereum_withdraw_list(self, prefetch=1, **params):
+        """
+        Yields every withdrawal, walking all pages.
+        Takes the same arguments as ethereum_withdraw_list, see iter_pages for prefetch.
+        """
+        return self.iter_withdraw_list("ethereum", prefetch, **params)
 
     def ethereum_create_withdraw(self, **params):
         """
@@ -216,10 +392,7 @@ class PrivateApi(Base):
         :param str fee_type: fast / regular / slow
         :param float amount: amount to send
         """
-        check_args(params, {"destination": str,
-                            "fee_type":["fast","regular","slow"],
-                            "amount": float})
-        return self.post_api("ethereum","withdraw", **params)
+        return self.create_withdraw("ethereum", **params)
 
     def ethereum_deposit_list(self, **params):
         """
@@ -232,12 +405,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["confirmation_pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("ethereum","deposits", **params)
+        return self.deposit_list("ethereum", **params)
+
+    def iter_ethereum_deposit_list(self, prefetch=1, **params):
+        """
+        Yields every deposit, walking all pages.
+        Takes the same arguments as ethereum_deposit_list, see iter_pages for prefetch.
+        """
+        return self.iter_deposit_list("ethereum", prefetch, **params)
 
     def ethereum_sync_transaction(self, **params):
         """
@@ -250,8 +425,7 @@ class PrivateApi(Base):
         Arguments:
         :param str hash: transaction hash to syncronize
         """
-        check_args(params, {"hash": str})
-        return self.post_api("ethereum","sync_transaction", **params)
+        return self.sync_transaction("ethereum", **params)
 
     # Litecoin API type
 
@@ -260,7 +434,7 @@ class PrivateApi(Base):
         https://apidocs.bitcointrade.com.br/#f8a4eed1-5ba5-4002-95f4-845414d466ae
         Returns fee estimates for each confirmation speed category
         """
-        return self.get_api("litecoin","withdraw/fee", **params)
+        return self.withdraw_fee("litecoin", **params)
 
     def litecoin_withdraw_list(self, **params):
         """
@@ -273,12 +447,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("litecoin","withdraw", **params)
+        return self.withdraw_list("litecoin", **params)
+
+    def iter_litecoin_withdraw_list(self, prefetch=1, **params):
+        """
+        Yields every withdrawal, walking all pages.
+        Takes the same arguments as litecoin_withdraw_list, see iter_pages for prefetch.
+        """
+        return self.iter_withdraw_list("litecoin", prefetch, **params)
 
     def litecoin_create_withdraw(self, **params):
         """
@@ -289,10 +465,7 @@ class PrivateApi(Base):
         :param str fee_type: fast / regular / slow
         :param float amount: amount to send
         """
-        check_args(params, {"destination": str,
-                            "fee_type":["fast","regular","slow"],
-                            "amount": float})
-        return self.post_api("litecoin","withdraw", **params)
+        return self.create_withdraw("litecoin", **params)
 
     def litecoin_deposit_list(self, **params):
         """
@@ -305,12 +478,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["confirmation_pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("litecoin","deposits", **params)
+        return self.deposit_list("litecoin", **params)
+
+    def iter_litecoin_deposit_list(self, prefetch=1, **params):
+        """
+        Yields every deposit, walking all pages.
+        Takes the same arguments as litecoin_deposit_list, see iter_pages for prefetch.
+        """
+        return self.iter_deposit_list("litecoin", prefetch, **params)
 
     def litecoin_sync_transaction(self, **params):
         """
@@ -323,8 +498,7 @@ class PrivateApi(Base):
         Arguments:
         :param str hash: transaction hash to syncronize
         """
-        check_args(params, {"hash": str})
-        return self.post_api("litecoin","sync_transaction", **params)
+        return self.sync_transaction("litecoin", **params)
 
     # Bitcoin Cash API type
 
@@ -333,7 +507,7 @@ class PrivateApi(Base):
         https://apidocs.bitcointrade.com.br/#ed5a2265-17ed-4da1-89b5-7d3e824c3519
         Returns fee estimates for each confirmation speed category
         """
-        return self.get_api("bitcoincash","withdraw/fee", **params)
+        return self.withdraw_fee("bitcoincash", **params)
 
     def bitcoincash_withdraw_list(self, **params):
         """
@@ -346,12 +520,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("bitcoincash","withdraw", **params)
+        return self.withdraw_list("bitcoincash", **params)
+
+    def iter_bitcoincash_withdraw_list(self, prefetch=1, **params):
+        """
+        Yields every withdrawal, walking all pages.
+        Takes the same arguments as bitcoincash_withdraw_list, see iter_pages for prefetch.
+        """
+        return self.iter_withdraw_list("bitcoincash", prefetch, **params)
 
     def bitcoincash_create_withdraw(self, **params):
         """
@@ -362,10 +538,7 @@ class PrivateApi(Base):
         :param str fee_type: fast / regular / slow
         :param float amount: amount to send
         """
-        check_args(params, {"destination": str,
-                            "fee_type":["fast","regular","slow"],
-                            "amount": float})
-        return self.post_api("bitcoincash","withdraw", **params)
+        return self.create_withdraw("bitcoincash", **params)
 
     def bitcoincash_deposit_list(self, **params):
         """
@@ -378,12 +551,14 @@ class PrivateApi(Base):
         :param int page_size: (1-1000 optional)
         :param int current_page: (numeric optional)
         """
-        check_args(params, optional_parameters={"start_date": str,
-                                                "end_date": str,
-                                                "status": ["confirmation_pending","confirmed","canceled"],
-                                                "page_size": int,
-                                                "current_page": int})
-        return self.get_api("bitcoincash","deposits", **params)
+        return self.deposit_list("bitcoincash", **params)
+
+    def iter_bitcoincash_deposit_list(self, prefetch=1, **params):
+        """
+        Yields every deposit, walking all pages.
+        Takes the same arguments as bitcoincash_deposit_list, see iter_pages for prefetch.
+        """
+        return self.iter_deposit_list("bitcoincash", prefetch, **params)
 
     def bitcoincash_sync_transaction(self, **params):
         """
@@ -396,6 +571,5 @@ class PrivateApi(Base):
         Arguments:
         :param str hash: transaction hash to syncronize
         """
-        check_args(params, {"hash": str})
-        return self.post_api("bitcoincash","sync_transaction", **params)
+        return self.sync_transaction("bitcoincash", **params)
 
@@ -0,0 +1,194 @@
+import time
+import heapq
+import asyncio
+import threading
+import itertools
+
+# Priority classes, lower values are served first
+HIGH = 0
+NORMAL = 1
+LOW = 2
+
+# Bucket shared by every request, where order flow and market data polling compete by priority
+ACCOUNT = "account"
+
+# Requests per second and burst size of the account and of each endpoint family
+DEFAULT_RATES = {
+    ACCOUNT: (15.0, 15),
+    "public": (10.0, 10),
+    "market": (10.0, 10),
+    "wallets": (5.0, 5),
+    "withdraw": (1.0, 1),
+}
+
+COINS = ["bitcoin", "ethereum", "litecoin", "bitcoincash"]
+
+def family(method, endpoint):
+    """
+    Returns the endpoint family sharing a bucket: public, market, wallets or withdraw.
+    """
+    api_type = endpoint.split("/", 1)[0]
+    if api_type in COINS:
+        return "withdraw" if method != "GET" else "wallets"
+    return api_type
+
+def priority(method, endpoint):
+    """
+    Default priority: order placement and cancellation first, public polling last.
+    """
+    if method != "GET":
+        return HIGH
+    if endpoint.startswith("public/"):
+        return LOW
+    return NORMAL
+
+class TokenBucket(object):
+    """
+    Token bucket whose waiting requests are served by priority, then arrival.
+    The rate drops when the server throttles and recovers on successes.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic, backoff=0.5, recovery=0.05, min_rate=0.1):
+        """
+        :param float rate: tokens added per second
+        :param int burst: max tokens kept
+        :param float backoff: factor applied to the rate when throttled
+        :param float recovery: fraction of the configured rate regained per success
+        :param float min_rate: lowest rate reached by backoff
+        """
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.backoff = backoff
+        self.recovery = recovery
+        self.min_rate = min_rate
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.waiting = []
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _try(self, ticket):
+        """
+        Takes a token if ticket is first in line, returns 0 on success,
+        otherwise the seconds to wait before trying again.
+        """
+        self._refill()
+        if self.waiting[0] == ticket and self.tokens >= 1:
+            heapq.heappop(self.waiting)
+            self.tokens -= 1
+            return 0
+        return max((1 - self.tokens) / self.rate, 0.001)
+
+    def throttled(self):
+        self._refill()
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        self.tokens = min(self.tokens, 0.0)
+
+    def succeeded(self):
+        if self.rate < self.max_rate:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate * self.recovery)
+
+class RateLimiter(object):
+    """
+    Client side rate limiter shared by the request path of one or many
+    clients, from threads and asyncio tasks alike. A request takes a token
+    from the account bucket, shared by all endpoints, then from the bucket
+    of its endpoint family. Waiting requests are served by priority in
+    both, so create_order and cancel_order go ahead of ticker and orderbook
+    polling queued on the account bucket. Family rates drop when the server
+    answers with HTTP 429 and slowly recover on successful requests.
+    """
+
+    def __init__(self, rates=None, priority=priority, clock=time.monotonic, **bucket_options):
+        """
+        :param dict rates: (requests per second, burst) by family and for ACCOUNT, defaults to DEFAULT_RATES,
+                           requests are only limited by the account when ACCOUNT is given
+        :param priority: function of (method, endpoint) returning HIGH / NORMAL / LOW
+        :param clock: function returning current time in seconds
+        :param \\*\\*bucket_options: backoff, recovery and min_rate of TokenBucket
+        """
+        rates = DEFAULT_RATES if rates is None else rates
+        self.buckets = dict((name, TokenBucket(rate, burst, clock, **bucket_options))
+                            for name, (rate, burst) in rates.items())
+        self.priority = priority
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+
+    def _path(self, method, endpoint):
+        """
+        :return list: buckets a request takes a token from, in order
+        """
+        names = (ACCOUNT, family(method, endpoint))
+        return [self.buckets[name] for name in names if name in self.buckets]
+
+    def _enqueue(self, bucket, rank):
+        ticket = (rank, next(self._tickets))
+        heapq.heappush(bucket.waiting, ticket)
+        return ticket
+
+    def _cancel(self, bucket, ticket):
+        with self._condition:
+            if ticket in bucket.waiting:
+                bucket.waiting.remove(ticket)
+                heapq.heapify(bucket.waiting)
+                self._condition.notify_all()
+
+    def acquire(self, method, endpoint):
+        """
+        Blocks until the request may be sent.
+        """
+        rank = self.priority(method, endpoint)
+        for bucket in self._path(method, endpoint):
+            with self._condition:
+                ticket = self._enqueue(bucket, rank)
+                try:
+                    delay = bucket._try(ticket)
+                    while delay:
+                        self._condition.wait(delay)
+                        delay = bucket._try(ticket)
+                except BaseException:
+                    bucket.waiting.remove(ticket)
+                    heapq.heapify(bucket.waiting)
+                    raise
+                finally:
+                    self._condition.notify_all()
+
+    async def acquire_async(self, method, endpoint):
+        """
+        Waits without blocking the event loop until the request may be sent.
+        """
+        rank = self.priority(method, endpoint)
+        for bucket in self._path(method, endpoint):
+            with self._condition:
+                ticket = self._enqueue(bucket, rank)
+                delay = bucket._try(ticket)
+            try:
+                while delay:
+                    await asyncio.sleep(delay)
+                    with self._condition:
+                        delay = bucket._try(ticket)
+                        if not delay:
+                            self._condition.notify_all()
+            except BaseException:
+                self._cancel(bucket, ticket)
+                raise
+
+    def feedback(self, method, endpoint, throttled):
+        """
+        Adapts the rate of the request family to the server answer.
+        :param bool throttled: True when the server signaled throttling
+        """
+        bucket = self.buckets.get(family(method, endpoint))
+        if bucket is None:
+            return
+        with self._condition:
+            if throttled:
+                bucket.throttled()
+            else:
+                bucket.succeeded()
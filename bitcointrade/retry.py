@@ -0,0 +1,233 @@
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from .errors import ApiError, RateLimitError
+
+RETRIES = 3
+BACKOFF = 0.1
+MAX_BACKOFF = 5.0
+WINDOW = 200
+MIN_SAMPLES = 20
+HEDGE_WORKERS = 10
+
+class LatencyTracker(object):
+    """
+    Keeps the latest latencies of each endpoint to compute percentiles.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, seconds):
+        with self._lock:
+            if endpoint not in self._samples:
+                self._samples[endpoint] = deque(maxlen=self.window)
+            self._samples[endpoint].append(seconds)
+
+    def count(self, endpoint):
+        return len(self._samples.get(endpoint, ()))
+
+    def percentile(self, endpoint, percentile):
+        """
+        :return float: latency under which percentile % of the samples fall, None without samples
+        """
+        with self._lock:
+            samples = sorted(self._samples.get(endpoint, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100.0))
+        return samples[index]
+
+class RetryPolicy(object):
+    """
+    Retries failed idempotent GET requests with exponential backoff and full
+    jitter, and optionally hedges slow ones: when no answer arrived after
+    the hedge delay, a duplicate request is sent and the first answer wins.
+    The hedge delay is the chosen percentile of recent latencies of the
+    endpoint, or hedge_delay until enough latencies were seen.
+
+    Sync clients send both attempts from a pool of hedge_workers threads,
+    each attempt holds a worker slot so none waits in the executor queue:
+    a request is sent from the calling thread without hedging when no slot
+    is free, and the duplicate is skipped when no slot is free at the delay.
+
+    Clients only apply the policy to GET requests, POST and DELETE are
+    never retried nor hedged.
+    """
+
+    def __init__(self, retries=RETRIES, backoff=BACKOFF, max_backoff=MAX_BACKOFF,
+                 hedge_percentile=None, hedge_delay=None, min_samples=MIN_SAMPLES,
+                 hedge_workers=HEDGE_WORKERS, latencies=None):
+        """
+        :param int retries: retries after the first attempt
+        :param float backoff: base delay in seconds, doubled on each retry
+        :param float max_backoff: max delay in seconds between attempts
+        :param float hedge_percentile: latency percentile (0-100) after which a request is hedged
+        :param float hedge_delay: seconds after which a request is hedged while samples are missing
+        :param int min_samples: latencies needed before the percentile is used
+        :param int hedge_workers: threads sending hedged requests of sync clients
+        :param LatencyTracker latencies: tracker of endpoint latencies
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.hedge_workers = hedge_workers
+        self.latencies = latencies or LatencyTracker()
+        self.retried = 0
+        self.hedged = 0
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._hedge_slots = threading.BoundedSemaphore(hedge_workers)
+
+    @property
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.hedge_workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def delay(self, attempt):
+        """
+        :return float: seconds to sleep before retry number attempt, starting at 0
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def retryable(self, error):
+        """
+        Connection errors, timeouts, HTTP 5xx and 429 are retried, API
+        error messages and invalid arguments are not.
+        """
+        if isinstance(error, RateLimitError):
+            return True
+        if isinstance(error, ApiError):
+            return False
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None) or getattr(error, "status", None)
+        if status is not None:
+            return status >= 500 or status == 429
+        return isinstance(error, (OSError, asyncio.TimeoutError)) or \
+            type(error).__module__.split(".")[0] in ("aiohttp", "httpx", "urllib3")
+
+    def hedge_after(self, endpoint):
+        """
+        :return float: seconds before hedging a request to endpoint, None to never hedge
+        """
+        if self.hedge_percentile is not None and self.latencies.count(endpoint) >= self.min_samples:
+            return self.latencies.percentile(endpoint, self.hedge_percentile)
+        return self.hedge_delay
+
+    def _timed(self, function, endpoint):
+        start = time.monotonic()
+        result = function()
+        self.latencies.record(endpoint, time.monotonic() - start)
+        return result
+
+    def _slotted(self, function, endpoint):
+        try:
+            return self._timed(function, endpoint)
+        finally:
+            self._hedge_slots.release()
+
+    def _submit(self, function, endpoint):
+        """
+        :return Future: attempt sent from the hedge pool, None if every worker is busy
+        """
+        if not self._hedge_slots.acquire(False):
+            return None
+        try:
+            return self.executor.submit(self._slotted, function, endpoint)
+        except Exception:
+            self._hedge_slots.release()
+            raise
+
+    def _hedged(self, function, endpoint, delay):
+        first = self._submit(function, endpoint)
+        if first is None:
+            return self._timed(function, endpoint)
+        futures = [first]
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            hedge = self._submit(function, endpoint)
+            if hedge is not None:
+                self.hedged += 1
+                futures.append(hedge)
+        while True:
+            done, pending = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None or not pending:
+                    return future.result()
+            futures = list(pending)
+
+    def call(self, function, endpoint):
+        """
+        Calls function, retrying and hedging it as configured.
+        :param function: function sending the request and returning its data
+        :param str endpoint: endpoint name, used to track latencies
+        """
+        attempt = 0
+        while True:
+            try:
+                delay = self.hedge_after(endpoint)
+                if delay is None:
+                    return self._timed(function, endpoint)
+                return self._hedged(function, endpoint, delay)
+            except Exception as error:
+                if attempt >= self.retries or not self.retryable(error):
+                    raise
+            time.sleep(self.delay(attempt))
+            attempt += 1
+            self.retried += 1
+
+    async def _timed_async(self, function, endpoint):
+        start = time.monotonic()
+        result = await function()
+        self.latencies.record(endpoint, time.monotonic() - start)
+        return result
+
+    async def _hedged_async(self, function, endpoint, delay):
+        tasks = [asyncio.ensure_future(self._timed_async(function, endpoint))]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self.hedged += 1
+                tasks.append(asyncio.ensure_future(self._timed_async(function, endpoint)))
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None or not pending:
+                        return task.result()
+                tasks = list(pending)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def call_async(self, function, endpoint):
+        """
+        Coroutine counterpart of call, function returns a coroutine.
+        """
+        attempt = 0
+        while True:
+            try:
+                delay = self.hedge_after(endpoint)
+                if delay is None:
+                    return await self._timed_async(function, endpoint)
+                return await self._hedged_async(function, endpoint, delay)
+            except Exception as error:
+                if attempt >= self.retries or not self.retryable(error):
+                    raise
+            await asyncio.sleep(self.delay(attempt))
+            attempt += 1
+            self.retried += 1
@@ -0,0 +1,670 @@
+import json
+import time
+import bisect
+import argparse
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+from .errors import ApiError
+from .utils import parse_datetime
+
+# Traded coin of each pair, prices are in BRL
+PAIRS = {"BRLBTC": "BTC", "BRLETH": "ETH", "BRLLTC": "LTC", "BRLBCH": "BCH"}
+CURRENCIES = ["BRL", "BTC", "ETH", "LTC", "BCH"]
+PAGE_SIZE = 20
+DAY = 24 * 60 * 60
+EPSILON = 1e-10
+POLL_INTERVAL = 0.05
+# Closed orders kept per token and pair, and trades kept per pair
+HISTORY = 10000
+OPEN_STATUSES = ("waiting", "executed_partially")
+
+def format_date(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+def paginate(records, page_size=PAGE_SIZE, current_page=1):
+    """
+    :return dict: one page of records, in the format of paginated endpoints
+    """
+    total_pages = max(1, (len(records) + page_size - 1) // page_size)
+    start = (current_page - 1) * page_size
+    return {"pagination": {"current_page": current_page, "page_size": page_size,
+                           "registers_count": len(records), "total_pages": total_pages},
+            "records": records[start:start + page_size]}
+
+class SimulatedOrder(object):
+    __slots__ = ("id", "code", "token", "pair", "type", "subtype", "unit_price", "requested_amount",
+                 "remaining_amount", "executed_amount", "total_price", "locked", "status",
+                 "create_date", "update_date")
+
+    def __init__(self, id, token, pair, type, subtype, unit_price, amount, now):
+        self.id = id
+        self.code = "C" + id
+        self.token = token
+        self.pair = pair
+        self.type = type
+        self.subtype = subtype
+        self.unit_price = unit_price
+        self.requested_amount = amount
+        self.remaining_amount = amount
+        self.executed_amount = 0.0
+        self.total_price = 0.0
+        self.locked = 0.0
+        self.status = "waiting"
+        self.create_date = now
+        self.update_date = now
+
+    def as_dict(self):
+        unit_price = self.unit_price
+        if unit_price is None:
+            unit_price = self.total_price / self.executed_amount if self.executed_amount else 0
+        return {"code": self.code,
+                "create_date": format_date(self.create_date),
+                "executed_amount": round(self.executed_amount, 8),
+                "id": self.id,
+                "pair_code": self.pair,
+                "remaining_amount": round(self.remaining_amount, 8),
+                "remaining_price": round(self.remaining_amount * (self.unit_price or 0), 8),
+                "requested_amount": self.requested_amount,
+                "status": self.status,
+                "subtype": self.subtype,
+                "total_price": round(self.total_price, 8),
+                "type": self.type,
+                "unit_price": unit_price,
+                "update_date": format_date(self.update_date)}
+
+class BookSide(object):
+    """
+    Resting orders of one side, FIFO queues per price level and sorted
+    level prices, the best one is the last of bids and the first of asks.
+    """
+
+    def __init__(self, bids):
+        self.bids = bids
+        self.prices = []
+        self.levels = {}
+
+    def __bool__(self):
+        return bool(self.prices)
+
+    def best(self):
+        return self.prices[-1] if self.bids else self.prices[0]
+
+    def add(self, order):
+        level = self.levels.get(order.unit_price)
+        if level is None:
+            level = self.levels[order.unit_price] = deque()
+            bisect.insort(self.prices, order.unit_price)
+        level.append(order)
+
+    def remove(self, order):
+        level = self.levels[order.unit_price]
+        level.remove(order)
+        if not level:
+            self._drop(order.unit_price)
+
+    def _drop(self, price):
+        del self.levels[price]
+        del self.prices[bisect.bisect_left(self.prices, price)]
+
+    def pop_filled(self):
+        """
+        Removes the head order of the best level, once it is filled.
+        """
+        price = self.best()
+        level = self.levels[price]
+        level.popleft()
+        if not level:
+            self._drop(price)
+
+    def orders(self):
+        """
+        Yields resting orders by priority: best price first, then arrival.
+        """
+        for price in (reversed(self.prices) if self.bids else self.prices):
+            for order in self.levels[price]:
+                yield order
+
+class RollingWindow(object):
+    """
+    Running statistics of the trades of the last 24 hours. Trades arrive
+    in time order, so expired ones leave from the front and high and low
+    are kept by monotonic queues instead of rescanning the window.
+    """
+
+    def __init__(self, length=DAY):
+        self.length = length
+        self.trades = deque()
+        self.highs = deque()
+        self.lows = deque()
+        self.volume = 0.0
+
+    def add(self, time, price, amount):
+        self.trades.append((time, price, amount))
+        self.volume += amount
+        while self.highs and self.highs[-1][1] <= price:
+            self.highs.pop()
+        self.highs.append((time, price))
+        while self.lows and self.lows[-1][1] >= price:
+            self.lows.pop()
+        self.lows.append((time, price))
+
+    def expire(self, now):
+        start = now - self.length
+        while self.trades and self.trades[0][0] < start:
+            self.volume -= self.trades.popleft()[2]
+        for extremes in (self.highs, self.lows):
+            while extremes and extremes[0][0] < start:
+                extremes.popleft()
+        if not self.trades:
+            self.volume = 0.0
+
+    def high(self):
+        return self.highs[0][1] if self.highs else None
+
+    def low(self):
+        return self.lows[0][1] if self.lows else None
+
+class TradeLog(object):
+    """
+    Trades of a pair in time order, trimmed to the latest history trades.
+    Time ranges are found by binary search on a parallel list of times.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.history = history
+        self.trades = []
+        self.times = []
+
+    def __len__(self):
+        return len(self.trades)
+
+    def append(self, trade, time):
+        self.trades.append(trade)
+        self.times.append(time)
+        if len(self.trades) >= 2 * self.history:
+            del self.trades[:-self.history]
+            del self.times[:-self.history]
+
+    def last(self):
+        return self.trades[-1] if self.trades else None
+
+    def range(self, start=None, end=None):
+        """
+        :return tuple: first and last + 1 indexes of trades with start <= time <= end
+        """
+        first = 0 if start is None else bisect.bisect_left(self.times, start)
+        last = len(self.times) if end is None else bisect.bisect_right(self.times, end)
+        return first, max(first, last)
+
+class UserOrders(object):
+    """
+    Orders of one token: resting orders by pair, and the latest closed
+    orders by pair in bounded queues.
+    """
+
+    def __init__(self, history=HISTORY):
+        self.open = dict((pair, {}) for pair in PAIRS)
+        self.closed = dict((pair, deque(maxlen=history)) for pair in PAIRS)
+
+    def select(self, pair=None, status=None):
+        """
+        Yields orders that may match the filters, reading only the indexes they need.
+        """
+        pairs = PAIRS if pair is None else [pair] if pair in PAIRS else []
+        for name in pairs:
+            if status is None or status in OPEN_STATUSES:
+                for order in self.open[name].values():
+                    yield order
+            if status is None or status not in OPEN_STATUSES or status == "executed_partially":
+                for order in self.closed[name]:
+                    yield order
+
+class MatchingEngine(object):
+    """
+    In-memory exchange: price-time priority order books per pair and
+    available/locked balances per token. Limit orders lock their funds
+    and rest on the book, market orders fill what the book offers and
+    drop their remainder. Trades execute at the resting order price.
+    Only limited and market orders are supported, stopLimit orders are
+    rejected with an ApiError. Every method is thread safe.
+
+    Resting orders are indexed by id and by token and pair, only the
+    latest history closed orders of each token and pair and trades of
+    each pair are kept, and the ticker keeps running 24 hours statistics,
+    so memory and query costs stay bounded under sustained load.
+    """
+
+    def __init__(self, clock=time.time, history=HISTORY):
+        """
+        :param clock: function returning current time in seconds since epoch
+        :param int history: closed orders kept per token and pair, and trades kept per pair
+        """
+        self.clock = clock
+        self.history = history
+        self._books = dict((pair, (BookSide(True), BookSide(False))) for pair in PAIRS)
+        self._trades = dict((pair, TradeLog(history)) for pair in PAIRS)
+        self._windows = dict((pair, RollingWindow()) for pair in PAIRS)
+        self._open = {}
+        self._users = {}
+        self._balances = {}
+        self._last_id = 0
+        self._lock = threading.RLock()
+
+    def _user(self, token):
+        user = self._users.get(token)
+        if user is None:
+            user = self._users[token] = UserOrders(self.history)
+        return user
+
+    def _close(self, order):
+        """
+        Moves an order that no longer rests on the book to the closed history of its token.
+        """
+        self._open.pop(order.id, None)
+        user = self._user(order.token)
+        user.open[order.pair].pop(order.id, None)
+        user.closed[order.pair].append(order)
+
+    def _account(self, token):
+        account = self._balances.get(token)
+        if account is None:
+            account = self._balances[token] = dict((currency, [0.0, 0.0]) for currency in CURRENCIES)
+        return account
+
+    def deposit(self, token, currency, amount):
+        """
+        Credits amount of currency to the available balance of token.
+        """
+        with self._lock:
+            self._account(token)[currency][0] += amount
+
+    def balance(self, token):
+        """
+        :return list: balances in the format of wallets/balance
+        """
+        with self._lock:
+            account = self._account(token)
+            return [{"available_amount": round(available, 8), "currency_code": currency,
+                     "locked_amount": round(locked, 8)}
+                    for currency, (available, locked) in account.items()]
+
+    def _lock_funds(self, account, currency, amount):
+        balance = account[currency]
+        if balance[0] + EPSILON < amount:
+            raise ApiError("Insufficient balance")
+        balance[0] -= amount
+        balance[1] += amount
+
+    def create_order(self, token, pair, type, subtype, amount, unit_price=None, request_price=None):
+        """
+        Places an order and matches it against the book.
+        :param str subtype: limited / market, stopLimit is not simulated and rejected
+        :return dict: order in the format of market/create_order
+        """
+        if pair not in PAIRS:
+            raise ApiError("Invalid pair")
+        if type not in ("buy", "sell"):
+            raise ApiError("Invalid order type")
+        if subtype not in ("limited", "market"):
+            raise ApiError("Invalid order subtype")
+        if not amount or amount <= 0:
+            raise ApiError("Invalid amount")
+        if subtype == "limited" and (not unit_price or unit_price <= 0):
+            raise ApiError("Invalid unit price")
+        coin = PAIRS[pair]
+        with self._lock:
+            now = self.clock()
+            account = self._account(token)
+            self._last_id += 1
+            order = SimulatedOrder(str(self._last_id), token, pair, type, subtype,
+                                   unit_price if subtype == "limited" else None, amount, now)
+            if type == "sell":
+                self._lock_funds(account, coin, amount)
+                order.locked = amount
+            elif subtype == "limited":
+                self._lock_funds(account, "BRL", amount * unit_price)
+                order.locked = amount * unit_price
+            if self._match(order, account, coin):
+                self._open[order.id] = order
+                self._user(token).open[pair][order.id] = order
+            else:
+                self._close(order)
+            origin, destination = ("BRL", coin) if type == "buy" else (coin, "BRL")
+            return {"id": order.id, "code": order.code, "type": type, "unit_price": unit_price,
+                    "origin_currency_code": origin, "destination_currency_code": destination,
+                    "amount": amount, "pair": pair}
+
+    def _match(self, order, account, coin):
+        """
+        :return bool: True if the order rests on the book
+        """
+        bids, asks = self._books[order.pair]
+        book, own = (asks, bids) if order.type == "buy" else (bids, asks)
+        while order.remaining_amount > EPSILON and book:
+            price = book.best()
+            if order.unit_price is not None and \
+                    (price > order.unit_price if order.type == "buy" else price < order.unit_price):
+                break
+            maker = book.levels[price][0]
+            amount = min(order.remaining_amount, maker.remaining_amount)
+            if order.type == "buy" and order.unit_price is None:
+                available = account["BRL"][0]
+                if available < amount * price - EPSILON:
+                    amount = available / price
+                    if amount <= EPSILON:
+                        break
+            self._fill(order, maker, amount, price, coin)
+            if maker.remaining_amount <= EPSILON:
+                book.pop_filled()
+                self._close(maker)
+        if order.remaining_amount <= EPSILON:
+            order.remaining_amount = 0.0
+            order.status = "executed_completely"
+            return False
+        if order.subtype == "limited":
+            own.add(order)
+            order.status = "executed_partially" if order.executed_amount else "waiting"
+            return True
+        self._release(order, coin)
+        order.status = "executed_partially" if order.executed_amount else "canceled"
+        return False
+
+    def _fill(self, taker, maker, amount, price, coin):
+        now = self.clock()
+        cost = amount * price
+        for order in (taker, maker):
+            account = self._account(order.token)
+            if order.type == "buy":
+                if order.unit_price is None:
+                    account["BRL"][0] -= cost
+                else:
+                    account["BRL"][1] -= amount * order.unit_price
+                    account["BRL"][0] += amount * order.unit_price - cost
+                    order.locked -= amount * order.unit_price
+                account[coin][0] += amount
+            else:
+                account[coin][1] -= amount
+                order.locked -= amount
+                account["BRL"][0] += cost
+            order.remaining_amount -= amount
+            order.executed_amount += amount
+            order.total_price += cost
+            order.update_date = now
+            if order.remaining_amount <= EPSILON:
+                order.remaining_amount = 0.0
+                order.status = "executed_completely"
+                self._release(order, coin)
+            else:
+                order.status = "executed_partially"
+        self._trades[taker.pair].append({"type": taker.type, "amount": round(amount, 8), "unit_price": price,
+                                         "active_order_code": taker.code, "passive_order_code": maker.code,
+                                         "date": format_date(now)}, now)
+        self._windows[taker.pair].add(now, price, amount)
+
+    def _release(self, order, coin):
+        if order.locked:
+            balance = self._account(order.token)["BRL" if order.type == "buy" else coin]
+            balance[0] += order.locked
+            balance[1] -= order.locked
+            order.locked = 0.0
+
+    def cancel_order(self, token, id):
+        """
+        Cancels a resting order of token and unlocks its remaining funds.
+        """
+        with self._lock:
+            order = self._open.get(id)
+            if order is None or order.token != token:
+                if order is None and id.isdigit() and 0 < int(id) <= self._last_id:
+                    raise ApiError("Order can not be canceled")
+                raise ApiError("Order not found")
+            bids, asks = self._books[order.pair]
+            (bids if order.type == "buy" else asks).remove(order)
+            self._release(order, PAIRS[order.pair])
+            order.status = "canceled"
+            order.update_date = self.clock()
+            self._close(order)
+
+    def user_orders(self, token, pair=None, status=None, type=None, start_date=None, end_date=None,
+                    page_size=PAGE_SIZE, current_page=1):
+        """
+        :return dict: orders of token, newest first, in the format of market/user_orders/list
+        """
+        start = parse_datetime(start_date).timestamp() if start_date else None
+        end = parse_datetime(end_date).timestamp() if end_date else None
+        with self._lock:
+            user = self._users.get(token)
+            orders = [] if user is None else \
+                [order for order in user.select(pair, status)
+                 if (status is None or order.status == status)
+                 and (type is None or order.type == type)
+                 and (start is None or order.create_date >= start)
+                 and (end is None or order.create_date <= end)]
+            orders.sort(key=lambda order: int(order.id), reverse=True)
+            page = paginate(orders, page_size, current_page)
+            records = [order.as_dict() for order in page["records"]]
+        return {"pagination": page["pagination"], "orders": records}
+
+    def estimated_price(self, pair, amount, type):
+        """
+        :return dict: average price of a market order of amount, in the format of market/estimated_price
+        """
+        if pair not in PAIRS:
+            raise ApiError("Invalid pair")
+        if amount <= 0:
+            raise ApiError("Invalid amount")
+        with self._lock:
+            bids, asks = self._books[pair]
+            remaining, total = amount, 0.0
+            for order in (asks if type == "buy" else bids).orders():
+                filled = min(remaining, order.remaining_amount)
+                total += filled * order.unit_price
+                remaining -= filled
+                if remaining <= EPSILON:
+                    return {"price": total / amount}
+        raise ApiError("Insufficient liquidity")
+
+    def orderbook(self, pair, full=False):
+        """
+        :param bool full: format of market (buying/selling with ids) instead of public orders
+        :return dict: resting orders by priority
+        """
+        if pair not in PAIRS:
+            raise ApiError("Invalid pair")
+        with self._lock:
+            sides = []
+            for side in self._books[pair]:
+                orders = []
+                for order in side.orders():
+                    entry = {"unit_price": order.unit_price, "code": order.code, "stop_limit_price": None,
+                             "amount": round(order.remaining_amount, 8)}
+                    if full:
+                        entry["id"] = order.id
+                        entry["user_code"] = order.token
+                    orders.append(entry)
+                sides.append(orders)
+        if full:
+            return {"buying": sides[0], "selling": sides[1], "executed": []}
+        return {"bids": sides[0], "asks": sides[1]}
+
+    def trades(self, pair, start_time=None, end_time=None, page_size=PAGE_SIZE, current_page=1):
+        """
+        :return dict: trades newest first, in the format of public trades
+        """
+        if pair not in PAIRS:
+            raise ApiError("Invalid pair")
+        start = parse_datetime(start_time).timestamp() if start_time else None
+        end = parse_datetime(end_time).timestamp() if end_time else None
+        with self._lock:
+            log = self._trades[pair]
+            first, last = log.range(start, end)
+            page = paginate(range(last - 1, first - 1, -1), page_size, current_page)
+            trades = [dict(log.trades[index]) for index in page["records"]]
+        return {"pagination": page["pagination"], "trades": trades}
+
+    def ticker(self, pair):
+        """
+        :return dict: last 24 hours statistics, in the format of public ticker
+        """
+        if pair not in PAIRS:
+            raise ApiError("Invalid pair")
+        with self._lock:
+            now = self.clock()
+            window = self._windows[pair]
+            window.expire(now)
+            last = self._trades[pair].last()
+            bids, asks = self._books[pair]
+            return {"buy": bids.best() if bids else None,
+                    "sell": asks.best() if asks else None,
+                    "high": window.high(),
+                    "low": window.low(),
+                    "last": last["unit_price"] if last else None,
+                    "trades_quantity": len(window.trades),
+                    "volume": round(window.volume, 8),
+                    "date": format_date(now)}
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        parts = urlsplit(self.path)
+        try:
+            params = dict(parse_qsl(parts.query))
+            if body:
+                params.update(json.loads(body.decode("utf-8")))
+            status, data = 200, self.server.exchange.route(self.command, parts.path, params,
+                                                           self.headers.get("Authorization"))
+            payload = {"message": None, "data": data}
+        except ApiError as e:
+            status, payload = 400, {"message": e.error, "data": None}
+        except (ValueError, TypeError, KeyError) as e:
+            status, payload = 400, {"message": "Invalid request: {}".format(e), "data": None}
+        response = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    do_GET = do_POST = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+class SimulatedExchange(object):
+    """
+    Local http server implementing the v2 endpoints used by Api and
+    PrivateApi on top of a MatchingEngine, for load and integration tests.
+    Private endpoints need an ApiToken header, each token has its own balances.
+
+        with SimulatedExchange() as exchange:
+            exchange.engine.deposit("token", "BRL", 100000)
+            api = exchange.client(bitcointrade.PrivateApi, "token")
+            api.create_order(pair="BRLBTC", type="buy", subtype="limited", amount=0.1, unit_price=30000.0)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, engine=None):
+        """
+        :param MatchingEngine engine: exchange state, a new one by default
+        """
+        self.engine = engine or MatchingEngine()
+        self._server = ThreadingHTTPServer((host, port), SimulatorHandler)
+        self._server.daemon_threads = True
+        self._server.exchange = self
+        self._thread = None
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return "%s:%d" % (host, port)
+
+    def route(self, method, path, params, authorization):
+        """
+        Calls the engine method of an endpoint.
+        :return: data field of the response
+        """
+        parts = path.strip("/").split("/")[1:]
+        engine = self.engine
+        if len(parts) == 3 and parts[0] == "public" and method == "GET":
+            pair, action = parts[1].upper(), parts[2]
+            if action == "ticker":
+                return engine.ticker(pair)
+            if action == "orders":
+                return engine.orderbook(pair)
+            if action == "trades":
+                return engine.trades(pair, params.get("start_time"), params.get("end_time"),
+                                     int(params.get("page_size", PAGE_SIZE)), int(params.get("current_page", 1)))
+        if not authorization or not authorization.startswith("ApiToken "):
+            raise ApiError("Unauthorized")
+        token = authorization[len("ApiToken "):]
+        endpoint = (method, "/".join(parts))
+        if endpoint == ("POST", "market/create_order"):
+            return engine.create_order(token, params["pair"], params["type"], params["subtype"],
+                                       float(params["amount"]), params.get("unit_price"), params.get("request_price"))
+        if endpoint == ("DELETE", "market/user_orders"):
+            engine.cancel_order(token, params["id"])
+            return None
+        if endpoint == ("GET", "market/user_orders/list"):
+            return engine.user_orders(token, params.get("pair"), params.get("status"), params.get("type"),
+                                      params.get("start_date"), params.get("end_date"),
+                                      int(params.get("page_size", PAGE_SIZE)), int(params.get("current_page", 1)))
+        if endpoint == ("GET", "market/estimated_price"):
+            return engine.estimated_price(params["pair"], float(params["amount"]), params["type"])
+        if endpoint == ("GET", "market"):
+            return engine.orderbook(params["pair"], full=True)
+        if endpoint == ("GET", "wallets/balance"):
+            return engine.balance(token)
+        raise ApiError("Endpoint not found")
+
+    def client(self, cls, *args, **kwargs):
+        """
+        :return: client of class cls sending its requests to this exchange
+        """
+        api = cls(*args, **kwargs)
+        api.scheme = "http"
+        api.host = self.address
+        return api
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(POLL_INTERVAL,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local simulated Bitcointrade exchange")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--deposit", action="append", default=[], metavar="TOKEN:CURRENCY:AMOUNT",
+                        help="initial balance, may be repeated")
+    args = parser.parse_args(argv)
+    exchange = SimulatedExchange(args.host, args.port)
+    for deposit in args.deposit:
+        token, currency, amount = deposit.rsplit(":", 2)
+        exchange.engine.deposit(token, currency.upper(), float(amount))
+    print("Simulated exchange listening on http://%s" % exchange.address)
+    try:
+        exchange._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        exchange._server.server_close()
+
+if __name__ == "__main__":
+    main()
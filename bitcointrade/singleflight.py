@@ -0,0 +1,90 @@
+import asyncio
+import threading
+
+class Flight(object):
+    """
+    Request in flight, waited on by the calls sharing it.
+    """
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight(object):
+    """
+    Coalesces identical concurrent requests: the first call of a key
+    sends the request, calls of the same key made while it is in flight
+    wait for it and receive its result or exception instead of sending
+    their own. Nothing is kept once the request is done, a later call
+    sends a new request, so it works alongside or without a ResponseCache.
+
+    Clients only coalesce GET requests, keyed by method, url, parameters,
+    token and typed, POST and DELETE are always sent. Callers sharing a
+    request receive the same data object.
+
+        flights = bitcointrade.SingleFlight()
+        api = bitcointrade.Api(single_flight=flights)
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._flights = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._flights) + len(self._tasks)
+
+    def call(self, key, function):
+        """
+        Calls function, or waits for the call of the same key already in flight.
+        :return: result of function, its exception is raised by every caller
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+            else:
+                self.shared += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = function()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    async def call_async(self, key, function):
+        """
+        Coroutine counterpart of call, function returns a coroutine.
+        The request runs in its own task, cancelling a caller does not
+        cancel it for the others.
+        """
+        key = (asyncio.get_running_loop(), key)
+        with self._lock:
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(function())
+                task.add_done_callback(lambda task: self._land(key, task))
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _land(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            # Retrieved so that a failure awaited by no caller is not logged as unhandled
+            task.exception()
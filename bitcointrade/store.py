@@ -0,0 +1,174 @@
+import os
+from .utils import parse_datetime, require_numpy
+
+CODE_SIZE = 32
+SIDES = ("buy", "sell")
+
+# Column name and numpy dtype of each file kept per pair
+COLUMNS = [("timestamp", "<i8"),
+           ("unit_price", "<f8"),
+           ("amount", "<f8"),
+           ("side", "i1"),
+           ("active_order_code", "S%d" % CODE_SIZE),
+           ("passive_order_code", "S%d" % CODE_SIZE)]
+
+def parse_timestamps(numpy, dates):
+    """
+    Converts trade dates to milliseconds since epoch.
+    """
+    if all(isinstance(date, str) and date.endswith("Z") for date in dates):
+        return numpy.array([date[:-1] for date in dates], dtype="datetime64[ms]").astype("<i8")
+    return numpy.array([int(parse_datetime(date).timestamp() * 1000) for date in dates], dtype="<i8")
+
+def timestamp(value):
+    """
+    :param value: ISO-8601 string, datetime or milliseconds since epoch
+    :return int: milliseconds since epoch
+    """
+    if isinstance(value, int):
+        return value
+    return int(parse_datetime(value).timestamp() * 1000)
+
+class TradeStore(object):
+    """
+    Append-only columnar trade history, one directory per pair holding a
+    fixed-width binary file per column. Trades are kept sorted by
+    timestamp so a time range query is a binary search returning
+    zero-copy slices of memory-mapped columns.
+
+        store = TradeStore("trades")
+        store.ingest(api, "BRLBTC", start_time="2019-01-01T00:00:00Z", end_time="2019-02-01T00:00:00Z")
+        columns = store.query("BRLBTC", "2019-01-10T00:00:00Z", "2019-01-11T00:00:00Z")
+    """
+
+    def __init__(self, path):
+        """
+        :param str path: directory holding the store, created if needed
+        """
+        self.path = path
+        self._maps = {}
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _file(self, pair, column):
+        return os.path.join(self.path, pair.upper(), column + ".bin")
+
+    def __len__(self):
+        return sum(self.count(pair) for pair in self.pairs())
+
+    def pairs(self):
+        return sorted(name for name in os.listdir(self.path)
+                      if os.path.isdir(os.path.join(self.path, name)))
+
+    def count(self, pair):
+        """
+        :return int: number of trades stored for pair
+        """
+        numpy = require_numpy("TradeStore")
+        sizes = []
+        for column, dtype in COLUMNS:
+            name = self._file(pair, column)
+            size = os.path.getsize(name) if os.path.exists(name) else 0
+            sizes.append(size // numpy.dtype(dtype).itemsize)
+        return min(sizes)
+
+    def columns(self, pair):
+        """
+        Returns read-only memory-mapped columns of every trade of pair.
+        A column write interrupted by a crash is ignored, every column
+        is cut to the length of the shortest one.
+        :return dict: numpy array by column name
+        """
+        count = self.count(pair)
+        cached = self._maps.get(pair.upper())
+        if cached is not None and len(cached["timestamp"]) == count:
+            return cached
+        numpy = require_numpy("TradeStore")
+        columns = {}
+        for column, dtype in COLUMNS:
+            if count:
+                columns[column] = numpy.memmap(self._file(pair, column), dtype=dtype,
+                                               mode="r", shape=(count,))
+            else:
+                columns[column] = numpy.empty(0, dtype=dtype)
+        self._maps[pair.upper()] = columns
+        return columns
+
+    def query(self, pair, start_time=None, end_time=None):
+        """
+        Returns trades with start_time <= date < end_time as zero-copy column slices.
+        :param start_time: ISO-8601 string, datetime or milliseconds, None for no bound
+        :param end_time: ISO-8601 string, datetime or milliseconds, None for no bound
+        :return dict: numpy array by column name, side holds indexes of SIDES
+        """
+        numpy = require_numpy("TradeStore")
+        columns = self.columns(pair)
+        timestamps = columns["timestamp"]
+        start = 0 if start_time is None else numpy.searchsorted(timestamps, timestamp(start_time), "left")
+        end = len(timestamps) if end_time is None else numpy.searchsorted(timestamps, timestamp(end_time), "left")
+        return dict((column, values[start:end]) for column, values in columns.items())
+
+    def append(self, pair, trades):
+        """
+        Appends trades, as returned by Api.trades, in time order. Trades
+        older than the last stored one or already stored are skipped.
+        :param list trades: trade dicts or models
+        :return int: number of trades appended
+        """
+        if not trades:
+            return 0
+        numpy = require_numpy("TradeStore")
+        batch = {"timestamp": parse_timestamps(numpy, [trade["date"] for trade in trades]),
+                 "unit_price": numpy.array([trade["unit_price"] for trade in trades], dtype="<f8"),
+                 "amount": numpy.array([trade["amount"] for trade in trades], dtype="<f8"),
+                 "side": numpy.array([SIDES.index(trade["type"]) for trade in trades], dtype="i1"),
+                 "active_order_code": numpy.array([trade["active_order_code"].encode("ascii") for trade in trades],
+                                                  dtype="S%d" % CODE_SIZE),
+                 "passive_order_code": numpy.array([trade["passive_order_code"].encode("ascii") for trade in trades],
+                                                   dtype="S%d" % CODE_SIZE)}
+        order = numpy.argsort(batch["timestamp"], kind="stable")
+        keep = numpy.ones(len(order), dtype=bool)
+        stored = self.columns(pair)
+        if len(stored["timestamp"]):
+            last = stored["timestamp"][-1]
+            first_last = numpy.searchsorted(stored["timestamp"], last, "left")
+            seen = set(zip(stored["active_order_code"][first_last:].tolist(),
+                           stored["passive_order_code"][first_last:].tolist()))
+            timestamps = batch["timestamp"][order]
+            keep = timestamps > last
+            for i in numpy.nonzero(timestamps == last)[0]:
+                j = order[i]
+                keep[i] = (batch["active_order_code"][j], batch["passive_order_code"][j]) not in seen
+        order = order[keep]
+        if not len(order):
+            return 0
+        directory = os.path.join(self.path, pair.upper())
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        count = len(stored["timestamp"])
+        for column, dtype in COLUMNS:
+            with open(self._file(pair, column), "r+b" if count else "wb") as f:
+                f.seek(count * numpy.dtype(dtype).itemsize)
+                f.truncate()
+                f.write(batch[column][order].tobytes())
+        self._maps.pop(pair.upper(), None)
+        return len(order)
+
+    def ingest(self, api, pair, page_size=1000, **params):
+        """
+        Downloads and appends the trades of Api.trades for a period.
+        Pages come newest first, so they are walked from the last page
+        to the first. The period should be closed, with end_time in the
+        past, otherwise new trades shift pages while they are walked.
+        :param Api api: client used to fetch trades
+        :param int page_size: (1-1000) trades per request
+        :param \\*\\*params: start_time and end_time, as in Api.trades
+        :return int: number of trades appended
+        """
+        first = api.trades(pair, page_size=page_size, **params)
+        total_pages = first["pagination"]["total_pages"]
+        appended = 0
+        for page in range(total_pages, 1, -1):
+            appended += self.append(pair, api.trades(pair, page_size=page_size, current_page=page,
+                                                     **params)["trades"])
+        return appended + self.append(pair, first["trades"])
@@ -0,0 +1,342 @@
+import time
+import asyncio
+import threading
+from datetime import datetime, timezone
+from .utils import parse_datetime
+from .errors import ArgumentError
+
+# Kinds of OrderEvent
+PARTIAL_FILL = "partial_fill"
+COMPLETE = "complete"
+CANCELED = "canceled"
+
+OPEN_STATUSES = ("waiting", "executed_partially")
+MIN_INTERVAL = 0.5
+MAX_INTERVAL = 10.0
+BACKOFF = 1.5
+OVERLAP = 5.0
+# Largest page of get_user_orders, so a poll usually takes one request per query
+PAGE_SIZE = 1000
+# Min seconds around the creation of an order searched when it left the open set
+LOOKUP_MARGIN = 1.0
+
+class OrderEvent(object):
+    """
+    Change of a tracked order seen between two polls.
+    filled is the amount executed since the previous state.
+    """
+    __slots__ = ("kind", "order", "previous", "filled")
+
+    def __init__(self, kind, order, previous=None):
+        self.kind = kind
+        self.order = order
+        self.previous = previous
+        self.filled = order["executed_amount"] - (previous["executed_amount"] if previous else 0)
+
+    def __repr__(self):
+        return "OrderEvent({!r}, id={!r}, filled={!r})".format(self.kind, self.order["id"], self.filled)
+
+class OrderTracker(object):
+    """
+    Follows open orders of a PrivateApi by polling get_user_orders and
+    emits only their changes: partial fills, completions and cancellations.
+
+    Open orders are indexed by id and code. Each poll asks for the waiting
+    and partially executed orders, and for orders created since the
+    previous poll with a small overlap, which may have closed in between.
+    It diffs them page by page on status and executed_amount, keeping the
+    indexed remaining_amount up to date. An indexed order missing from the
+    answers is looked up by a narrow query around its creation to learn
+    whether it completed or was canceled, so idle polls cost three
+    requests however long the order history is. Orders opened before the
+    tracker started are indexed on the first poll without events for
+    their past fills.
+    The poll interval drops to min_interval after an order is tracked or
+    changes, and grows by backoff up to max_interval while nothing happens.
+    Callbacks run once the poll is recorded, every callback gets every
+    event even if one raises, the first error is raised after all of them.
+
+        tracker = OrderTracker(api, pair="BRLBTC", callbacks=[print])
+        tracker.start()
+        tracker.create_order(pair="BRLBTC", type="buy", subtype="limited", amount=0.1, unit_price=30000.0)
+
+    With AsyncPrivateApi, run_async polls from the event loop and puts
+    events in an asyncio.Queue.
+    """
+
+    def __init__(self, api, pair=None, callbacks=(), min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 backoff=BACKOFF, overlap=OVERLAP, clock=time.time):
+        """
+        :param PrivateApi api: client polled for orders
+        :param str pair: only track orders of this pair, all pairs by default
+        :param list callbacks: functions called with each OrderEvent
+        :param float min_interval: seconds between polls while orders change
+        :param float max_interval: seconds between polls while idle
+        :param float backoff: factor applied to the interval after a poll without changes
+        :param float overlap: seconds subtracted from the window of each poll
+        :param clock: function returning current time in seconds since epoch
+        """
+        self.api = api
+        self.pair = pair
+        self.callbacks = list(callbacks)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.overlap = overlap
+        self.clock = clock
+        self.interval = min_interval
+        self.polls = 0
+        self.last_error = None
+        self._orders = {}
+        self._codes = {}
+        self._closed = {}
+        self._tracked = {}
+        self._started = clock()
+        self._last_poll = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._orders)
+
+    def get(self, key):
+        """
+        :param str key: id or code of an open order
+        :return: last known state of the order, None if it is not open
+        """
+        with self._lock:
+            return self._orders.get(self._codes.get(key, key))
+
+    def open_orders(self):
+        with self._lock:
+            return list(self._orders.values())
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def track(self, order, pair=None):
+        """
+        Adds an order returned by create_order to the index and polls fast again.
+        :param str pair: pair of the order, read from the order by default
+        :raise ArgumentError: if the tracker follows another pair, the order would never be polled
+        """
+        pair = self._check_pair(pair or order.get("pair"))
+        state = {"id": order["id"], "code": order["code"], "pair_code": pair,
+                 "executed_amount": 0.0, "remaining_amount": order["amount"], "status": "waiting",
+                 "create_date": None}
+        with self._lock:
+            if order["id"] not in self._orders:
+                self._index(state)
+                self._tracked[order["id"]] = self.clock()
+            self.interval = self.min_interval
+        self._wake.set()
+
+    def create_order(self, **params):
+        """
+        Creates an order with the sync client and tracks it.
+        """
+        pair = self._check_pair(params.get("pair"))
+        order = self.api.create_order(**params)
+        self.track(order, pair)
+        return order
+
+    def _check_pair(self, pair):
+        if self.pair is not None and pair != self.pair:
+            raise ArgumentError(u"Order pair {} is not tracked, the tracker follows {}".format(pair, self.pair))
+        return pair
+
+    def _index(self, order):
+        self._orders[order["id"]] = order
+        self._codes[order["code"]] = order["id"]
+
+    def _forget(self, order):
+        self._orders.pop(order["id"], None)
+        self._codes.pop(order["code"], None)
+        self._tracked.pop(order["id"], None)
+
+    def _queries(self):
+        """
+        :return tuple: start of the window of the poll and its get_user_orders arguments,
+                       the open orders and orders created since the previous poll
+        """
+        start = self._last_poll if self._last_poll is not None else self._started
+        window = datetime.fromtimestamp(start - self.overlap, timezone.utc)
+        queries = [{"status": status} for status in OPEN_STATUSES] + [{"start_date": window.isoformat()}]
+        for query in queries:
+            query["page_size"] = PAGE_SIZE
+            if self.pair is not None:
+                query["pair"] = self.pair
+        return window, queries
+
+    def _lookups(self, seen):
+        """
+        :param set seen: ids of the orders answered by the poll
+        :return list: id and get_user_orders arguments of each indexed order that left the open set
+        """
+        margin = max(self.overlap, LOOKUP_MARGIN)
+        lookups = []
+        with self._lock:
+            for order in self._orders.values():
+                if order["id"] in seen:
+                    continue
+                if order["create_date"] is not None:
+                    created = parse_datetime(order["create_date"]).timestamp()
+                else:
+                    created = self._tracked.get(order["id"], self._started)
+                query = {"start_date": datetime.fromtimestamp(created - margin, timezone.utc).isoformat(),
+                         "end_date": datetime.fromtimestamp(created + margin, timezone.utc).isoformat(),
+                         "page_size": PAGE_SIZE}
+                pair = order.get("pair_code") or self.pair
+                if pair is not None:
+                    query["pair"] = pair
+                lookups.append((order["id"], query))
+        return lookups
+
+    def _diff(self, order):
+        """
+        Compares a polled order with its indexed state.
+        :return OrderEvent: change of the order, None if nothing changed
+        """
+        previous = self._orders.get(order["id"])
+        closed = order["status"] not in OPEN_STATUSES
+        if previous is None:
+            recent = parse_datetime(order["create_date"]).timestamp() >= self._started - self.overlap
+            if not closed:
+                self._index(order)
+                return OrderEvent(PARTIAL_FILL, order) if recent and order["executed_amount"] else None
+            if order["id"] in self._closed or not recent:
+                return None
+            self._closed[order["id"]] = order["create_date"]
+            return OrderEvent(COMPLETE if order["status"] == "executed_completely" else CANCELED, order)
+        if closed:
+            self._forget(order)
+            self._closed[order["id"]] = order["create_date"]
+            return OrderEvent(COMPLETE if order["status"] == "executed_completely" else CANCELED, order, previous)
+        self._index(order)
+        if order["executed_amount"] != previous["executed_amount"]:
+            return OrderEvent(PARTIAL_FILL, order, previous)
+        return None
+
+    def _begin(self):
+        with self._lock:
+            window, queries = self._queries()
+            self._closed = dict((id, date) for id, date in self._closed.items()
+                                if parse_datetime(date) >= window)
+        return queries, self.clock()
+
+    def _apply(self, orders):
+        events = []
+        with self._lock:
+            for order in orders:
+                event = self._diff(order)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def _end(self, started, events):
+        with self._lock:
+            self._last_poll = started
+            self.polls += 1
+            if events:
+                self.interval = self.min_interval
+            elif not self._orders:
+                self.interval = self.max_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+        return events
+
+    def _dispatch(self, events):
+        """
+        Calls every callback with every event, then raises the first callback error.
+        """
+        error = None
+        for event in events:
+            for callback in self.callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+
+    def poll(self):
+        """
+        Fetches orders created since the window start and emits their changes.
+        :return list: OrderEvent of every change, in the order pages were read
+        """
+        queries, started = self._begin()
+        events, seen = [], set()
+        for query in queries:
+            for order in self.api.iter_user_orders(**query):
+                seen.add(order["id"])
+                events += self._apply([order])
+        for id, query in self._lookups(seen):
+            events += self._apply([order for order in self.api.iter_user_orders(**query) if order["id"] == id])
+        self._end(started, events)
+        self._dispatch(events)
+        return events
+
+    async def poll_async(self, queue=None):
+        """
+        Coroutine counterpart of poll for AsyncPrivateApi.
+        :param asyncio.Queue queue: queue receiving the events
+        """
+        queries, started = self._begin()
+        events, seen = [], set()
+        for query in queries:
+            async for order in self.api.iter_user_orders(**query):
+                seen.add(order["id"])
+                events += self._apply([order])
+        for id, query in self._lookups(seen):
+            events += self._apply([order async for order in self.api.iter_user_orders(**query) if order["id"] == id])
+        self._end(started, events)
+        if queue is not None:
+            for event in events:
+                queue.put_nowait(event)
+        self._dispatch(events)
+        return events
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """
+        Polls in a background thread until stop is called.
+        """
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    async def run_async(self, queue):
+        """
+        Polls from the event loop until stop is called or the task is cancelled.
+        :param asyncio.Queue queue: queue receiving the events
+        """
+        self._stop.clear()
+        while not self._stop.is_set():
+            try:
+                await self.poll_async(queue)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+            deadline = self.clock() + self.interval
+            while not self._stop.is_set() and not self._wake.is_set() and self.clock() < deadline:
+                await asyncio.sleep(min(self.min_interval, max(0.0, deadline - self.clock())))
+            self._wake.clear()
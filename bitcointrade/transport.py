@@ -0,0 +1,186 @@
+from urllib.parse import urlencode
+from .errors import ArgumentError
+
+class Response(object):
+    """
+    Status and raw body of an http answer.
+    """
+    __slots__ = ("status_code", "content")
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+class Transport(object):
+    """
+    Sends the http requests of a client. request returns an object with
+    status_code and content (raw body bytes), transports keep their
+    connections pooled until close is called, they are opened again if the
+    transport is used after that. Clients raise HTTPError for error
+    statuses answered without a valid API body, whatever the transport.
+    """
+    name = None
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, max_retries=0, keep_alive=True):
+        """
+        :param int pool_connections: number of host pools kept
+        :param int pool_maxsize: max connections kept open per host
+        :param int max_retries: retries per connection on connection errors
+        :param bool keep_alive: reuse connections between calls
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_retries = max_retries
+        self.keep_alive = keep_alive
+
+    def request(self, method, url, params=None, body=None, headers=None, timeout=None):
+        """
+        :param str method: Http method used
+        :param dict params: query string parameters
+        :param body: request body, str or bytes
+        :param dict headers: request headers
+        :param float timeout: seconds to wait for the server
+        """
+        raise NotImplementedError
+
+    @property
+    def pool(self):
+        """
+        Connection pool of the underlying http library, None if there is none.
+        """
+        return None
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return "{}()".format(type(self).__name__)
+
+class RequestsTransport(Transport):
+    """
+    Default transport, a pooled requests session.
+    """
+    name = "requests"
+
+    def __init__(self, *args, **kwargs):
+        Transport.__init__(self, *args, **kwargs)
+        self._session = None
+
+    @property
+    def session(self):
+        """
+        Pooled http session, created on first use.
+        """
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=self.pool_connections,
+                                  pool_maxsize=self.pool_maxsize,
+                                  max_retries=self.max_retries)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if not self.keep_alive:
+                session.headers["Connection"] = "close"
+            self._session = session
+        return self._session
+
+    @property
+    def pool(self):
+        return self.session
+
+    def request(self, method, url, params=None, body=None, headers=None, timeout=None):
+        if method == "GET":
+            return self.session.get(url, params=params, timeout=timeout, headers=headers)
+        return self.session.request(method, url, params=params, data=body, timeout=timeout, headers=headers)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+class Urllib3Transport(Transport):
+    """
+    Lightweight transport sending requests straight through a urllib3
+    pool manager, without the session layer of requests.
+    """
+    name = "urllib3"
+
+    def __init__(self, *args, **kwargs):
+        Transport.__init__(self, *args, **kwargs)
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            import urllib3
+            self._pool = urllib3.PoolManager(num_pools=self.pool_connections, maxsize=self.pool_maxsize,
+                                             block=False, retries=urllib3.Retry(self.max_retries, read=False,
+                                                                                redirect=False))
+        return self._pool
+
+    def request(self, method, url, params=None, body=None, headers=None, timeout=None):
+        if params:
+            url += "?" + urlencode(params, doseq=True)
+        if not self.keep_alive:
+            headers = dict(headers or {}, Connection="close")
+        response = self.pool.request(method, url, body=body, headers=headers, timeout=timeout)
+        return Response(response.status, response.data)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.clear()
+            self._pool = None
+
+class Http2Transport(Transport):
+    """
+    Transport on httpx with HTTP/2 enabled. Over https, servers offering
+    HTTP/2 can multiplex concurrent requests to a host as streams of one
+    connection, other servers and plain http are answered over HTTP/1.1.
+    The simulated exchange only speaks HTTP/1.1, so the tests cover the
+    fallback and not the multiplexing itself.
+    Needs httpx with http2 support (pip install bitcointrade[http2]).
+    """
+    name = "http2"
+
+    def __init__(self, *args, **kwargs):
+        Transport.__init__(self, *args, **kwargs)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            try:
+                import httpx
+            except ImportError:
+                raise ImportError("Http2Transport requires httpx, install it with pip install bitcointrade[http2]")
+            keep_alive = self.pool_maxsize if self.keep_alive else 0
+            limits = httpx.Limits(max_connections=self.pool_maxsize, max_keepalive_connections=keep_alive)
+            transport = httpx.HTTPTransport(http2=True, limits=limits, retries=self.max_retries)
+            self._client = httpx.Client(transport=transport)
+        return self._client
+
+    @property
+    def pool(self):
+        return self.client
+
+    def request(self, method, url, params=None, body=None, headers=None, timeout=None):
+        return self.client.request(method, url, params=params, content=body, headers=headers, timeout=timeout)
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+# Transports selectable by name, see get_transport
+TRANSPORTS = {"requests": RequestsTransport, "urllib3": Urllib3Transport, "http2": Http2Transport}
+
+def get_transport(name, **kwargs):
+    """
+    :param str name: requests / urllib3 / http2
+    :param kwargs: pool settings, see Transport
+    :return Transport: new transport of the named kind
+    """
+    if name not in TRANSPORTS:
+        raise ArgumentError(u"Transport {} is invalid. It should be one of {}".format(name, list(TRANSPORTS)))
+    return TRANSPORTS[name](**kwargs)
@@ -1,5 +1,46 @@
+from datetime import datetime, timezone
 from .errors import ArgumentError
 
+def parse_datetime(value):
+    """
+    Parses ISO-8601 dates as sent and returned by the API, such as
+    2019-02-04T14:21:38.560Z or 2018-10-10T23:59:59-03:00.
+    Dates without timezone are taken as UTC.
+    :param value: ISO-8601 string or datetime
+    :return datetime: timezone aware datetime
+    """
+    if not isinstance(value, datetime):
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+def require_numpy(feature):
+    """
+    Imports numpy for features that need it.
+    :param str feature: name shown in the error when numpy is missing
+    """
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("{} requires numpy, install it with pip install bitcointrade[numpy]".format(feature))
+    return numpy
+
+# Argument validation switch, see set_validation
+VALIDATE = True
+
+def set_validation(enabled):
+    """
+    Enables or disables argument validation of every client method.
+    Trusted callers that already build valid arguments may disable it
+    to save its cost on hot paths such as create_order.
+    :param bool enabled: validate arguments
+    """
+    global VALIDATE
+    VALIDATE = enabled
+
 def check_values(value, arg, arg_value):
     if type(value) == type:
         if type(arg_value) != value:
@@ -8,6 +49,8 @@ def check_values(value, arg, arg_value):
         raise ArgumentError(u"Value of argument {} is invalid. It should be one of {}".format(arg, value))
 
 def check_args(kwargs, required_parameters={}, optional_parameters={}):
+    if not VALIDATE:
+        return
     args = kwargs.keys()
     required_args = required_parameters.keys()
     optional_args = optional_parameters.keys()
@@ -23,3 +66,60 @@ def check_args(kwargs, required_parameters={}, optional_parameters={}):
         elif arg_name in required_args:
             required_value = required_parameters[arg_name]
             check_values(required_value, arg_name, arg_value)
+
+class Schema(object):
+    """
+    check_args specification compiled once, usually at import time, into
+    a frozenset of required names and a lookup of the check of each
+    argument. Calling check validates like check_args, with the same errors.
+    """
+    __slots__ = ("required", "checks")
+
+    def __init__(self, required_parameters={}, optional_parameters={}):
+        self.required = frozenset(required_parameters)
+        self.checks = {}
+        for parameters in (required_parameters, optional_parameters):
+            for name, value in parameters.items():
+                if type(value) == type:
+                    self.checks[name] = (value, None)
+                else:
+                    self.checks[name] = (value, frozenset(value))
+
+    def check(self, kwargs):
+        if not VALIDATE:
+            return
+        if not self.required.issubset(kwargs):
+            raise ArgumentError(u"Parameter {} is required".format(list(self.required.difference(kwargs))))
+        checks = self.checks
+        for arg, arg_value in kwargs.items():
+            check = checks.get(arg)
+            if check is None:
+                continue
+            value, allowed = check
+            if allowed is None:
+                if type(arg_value) is not value:
+                    raise ArgumentError(u"Type of argument {} is invalid. It should be {}".format(arg, value))
+            else:
+                try:
+                    valid = arg_value in allowed
+                except TypeError:
+                    valid = False
+                if not valid:
+                    raise ArgumentError(u"Value of argument {} is invalid. It should be one of {}".format(arg, value))
+
+class BatchResult(dict):
+    """
+    Results of a batch of concurrent calls keyed by the request key, in input order.
+    Keys whose call failed are left out and their exception is kept in errors.
+    """
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.errors = {}
+
+    def raise_for_errors(self):
+        """
+        Raises the exception of the first failed key, if any.
+        """
+        for error in self.errors.values():
+            raise error
@@ -25,6 +25,12 @@ import setuptools
 from distutils.core import setup
 
 INSTALL_REQUIREMENTS = ['requests']
+EXTRAS_REQUIREMENTS = {
+    'async': ['aiohttp'],
+    'numpy': ['numpy'],
+    'fast': ['orjson'],
+    'http2': ['httpx[http2]'],
+}
 
 setup(
     name = 'bitcointrade',
@@ -37,6 +43,8 @@ setup(
     download_url = 'https://github.com/Megarushing/python-bitcointrade-api/tarball/0.7.0',
     keywords = ['bitcoin', 'litecoin', 'ethereum', 'bitcoin cash','bitcointrade', 'trade', 'orderbook', 'cryptocurrency','ticker'],
     install_requires=INSTALL_REQUIREMENTS,
+    extras_require=EXTRAS_REQUIREMENTS,
+    python_requires='>=3.7',
     classifiers = [
         'Development Status :: 4 - Beta',
         'Environment :: Console',
@@ -47,7 +55,6 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Natural Language :: English',
         'Operating System :: OS Independent',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3.7',
         'Topic :: Software Development :: Libraries :: Python Modules',
         'Topic :: Utilities'
@@ -46,3 +46,71 @@ class ApiTestCase(unittest.TestCase):
             assert "active_order_code" in r
             assert "passive_order_code" in r
             assert "date" in r
+
+class PoolTestCase(unittest.TestCase):
+    def test_session_is_shared(self):
+        api = bitcointrade.Api(pool_maxsize=4, max_retries=2)
+        assert api.session is api.session
+        adapter = api.session.get_adapter("https://api.bitcointrade.com.br")
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 2
+
+    def test_keep_alive_disabled(self):
+        api = bitcointrade.Api(keep_alive=False)
+        assert api.session.headers["Connection"] == "close"
+
+    def test_close(self):
+        with bitcointrade.Api() as api:
+            session = api.session
+        assert api.transport._session is None
+        assert api.session is not session
+
+class StubApi(bitcointrade.Api):
+    pages = 3
+    page_size = 2
+
+    def _send(self, method, endpoint, url, params):
+        if "BRLXXX" in url:
+            raise bitcointrade.errors.ApiError("Invalid pair")
+        if url.endswith("/trades"):
+            page = params.get("current_page", 1)
+            self.requested_pages.append(page)
+            return {"pagination": {"current_page": page, "total_pages": self.pages},
+                    "trades": [{"page": page, "index": i} for i in range(self.page_size)]}
+        return {"url": url}
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = StubApi(max_workers=2)
+        self.api.requested_pages = []
+
+    def tearDown(self):
+        self.api.close()
+
+    def test_tickers(self):
+        response = self.api.tickers(["BRLBTC", "BRLETH", "BRLLTC"])
+        assert list(response.keys()) == ["BRLBTC", "BRLETH", "BRLLTC"]
+        assert response["BRLETH"]["url"].endswith("/public/BRLETH/ticker")
+        assert response.errors == {}
+
+    def test_orderbooks_errors(self):
+        response = self.api.orderbooks(["BRLBTC", "BRLXXX"])
+        assert list(response.keys()) == ["BRLBTC"]
+        assert type(response.errors["BRLXXX"]) == bitcointrade.errors.ApiError
+        self.assertRaises(bitcointrade.errors.ApiError, response.raise_for_errors)
+
+    def test_iter_trades(self):
+        trades = list(self.api.iter_trades("BRLBTC", page_size=2))
+        assert [(t["page"], t["index"]) for t in trades] == [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 1)]
+        assert sorted(self.api.requested_pages) == [1, 2, 3]
+
+    def test_iter_trades_no_prefetch(self):
+        trades = self.api.iter_trades("BRLBTC", prefetch=0, current_page=2)
+        assert next(trades)["page"] == 2
+        assert self.api.requested_pages == [2]
+        assert len(list(trades)) == 3
+        assert self.api.requested_pages == [2, 3]
+
+    def test_iter_trades_check_args(self):
+        trades = self.api.iter_trades("BRLBTC", page_size="2")
+        self.assertRaises(bitcointrade.errors.ArgumentError, next, trades)
@@ -0,0 +1,101 @@
+import asyncio
+import tests
+import unittest
+from concurrent.futures import CancelledError
+import bitcointrade
+from bitcointrade.errors import ApiError, ArgumentError
+from bitcointrade.simulator import SimulatedExchange
+from tests.tests_private_api import StubWalletApi
+
+class AsyncApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.api = bitcointrade.AsyncApi()
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.api.close())
+        self.loop.close()
+
+    @tests.vcr.use_cassette("tests_api/test_ticker.yml")
+    def test_ticker(self):
+        response = self.loop.run_until_complete(self.api.ticker("BRLBTC"))
+        assert type(response) == dict
+        assert 'last' in response
+        assert 'date' in response
+
+    @tests.vcr.use_cassette("tests_api/test_orderbook.yml")
+    def test_orderbook(self):
+        response = self.loop.run_until_complete(self.api.orderbook("BRLBTC"))
+        assert type(response["asks"]) == list
+        assert type(response["bids"]) == list
+
+    @tests.vcr.use_cassette("tests_api/test_ticker.yml")
+    def test_tickers(self):
+        response = self.loop.run_until_complete(self.api.tickers(["BRLBTC"]))
+        assert 'last' in response["BRLBTC"]
+        assert response.errors == {}
+
+    def test_check_args(self):
+        self.assertRaises(ArgumentError, self.api.trades, "BRLBTC", page_size="10")
+
+    def test_iter_trades(self):
+        pages = {1: ["a", "b"], 2: ["c"]}
+
+        def trades(pair, **params):
+            page = params.get("current_page", 1)
+            future = self.loop.create_future()
+            future.set_result({"pagination": {"total_pages": 2}, "trades": pages[page]})
+            return future
+        self.api.trades = trades
+        iterator = self.api.iter_trades("BRLBTC")
+        records = []
+        while True:
+            try:
+                records.append(self.loop.run_until_complete(iterator.__anext__()))
+            except StopAsyncIteration:
+                break
+        assert records == ["a", "b", "c"]
+
+    def test_sync_context_manager(self):
+        self.assertRaises(TypeError, self.api.__enter__)
+
+class AsyncPrivateApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.api = bitcointrade.AsyncPrivateApi("42")
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.api.close())
+        self.loop.close()
+
+    @tests.vcr.use_cassette("tests_private_api/test_balance.yml")
+    def test_balance(self):
+        response = self.loop.run_until_complete(self.api.balance())
+        assert type(response) == list
+        for r in response:
+            assert "currency_code" in r
+
+    def test_check_args(self):
+        self.assertRaises(ArgumentError, self.api.cancel_order)
+
+    def test_create_orders(self):
+        orders = [{"pair": "BRLBTC", "type": "sell", "subtype": "limited", "amount": amount,
+                   "unit_price": 100.0} for amount in (0.1, 100.0, 0.1)]
+        with SimulatedExchange() as exchange:
+            exchange.engine.deposit("42", "BTC", 1.0)
+            api = exchange.client(bitcointrade.AsyncPrivateApi, "42", max_workers=1)
+            try:
+                created = self.loop.run_until_complete(api.create_orders(orders, cancel_on_error=True))
+            finally:
+                self.loop.run_until_complete(api.close())
+        assert list(created.keys()) == [0]
+        assert type(created.errors[1]) == ApiError
+        assert type(created.errors[2]) == CancelledError
+
+    def test_all_deposits(self):
+        class StubAsyncWalletApi(bitcointrade.AsyncPrivateApi, StubWalletApi):
+            async def _send(self, method, endpoint, url, params):
+                return StubWalletApi._send(self, method, endpoint, url, params)
+        api = StubAsyncWalletApi("42")
+        deposits = self.loop.run_until_complete(api.all_deposits(coins=["ethereum", "bitcoin"]))
+        assert [d["code"] for d in deposits] == ["bitcoin-1", "bitcoin-2", "ethereum-1", "ethereum-2"]
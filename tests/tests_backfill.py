@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import bitcointrade
+from bitcointrade.utils import parse_datetime
+from bitcointrade.errors import ArgumentError
+
+START = datetime(2019, 1, 1, 0, 0, 0)
+
+def make_trade(minute, code):
+    date = (START + timedelta(minutes=minute)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    return {"type": "buy", "amount": 0.1, "unit_price": 10000.0,
+            "active_order_code": code, "passive_order_code": "P" + code, "date": date}
+
+class HistoryApi(bitcointrade.Api):
+    """Serves a fixed trade history, newest first, inclusive on both ends"""
+    history = [make_trade(minute, "C%d" % minute) for minute in range(0, 240, 15)]
+
+    def __init__(self):
+        bitcointrade.Api.__init__(self)
+        self.windows = []
+
+    def trades(self, pair, **params):
+        start = parse_datetime(params["start_time"])
+        end = parse_datetime(params["end_time"])
+        self.windows.append((start, end))
+        trades = [t for t in self.history if start <= parse_datetime(t["date"]) <= end]
+        trades.reverse()
+        page = params.get("current_page", 1)
+        size = params["page_size"]
+        total_pages = max(1, (len(trades) + size - 1) // size)
+        return {"pagination": {"current_page": page, "total_pages": total_pages},
+                "trades": trades[(page - 1) * size:page * size]}
+
+class TradeBackfillTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = HistoryApi()
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def backfill(self, **kwargs):
+        return bitcointrade.TradeBackfill(self.api, "BRLBTC",
+                                          "2019-01-01T00:00:00Z", "2019-01-01T03:45:00Z",
+                                          shard_size=timedelta(hours=1), page_size=2, **kwargs)
+
+    def test_shards(self):
+        shards = self.backfill().shards()
+        assert len(shards) == 4
+        assert shards[-1][1] == parse_datetime("2019-01-01T03:45:00Z")
+
+    def test_time_ordered_without_duplicates(self):
+        trades = list(self.backfill())
+        assert trades == self.api.history
+
+    def test_resume(self):
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        iterator = iter(self.backfill(checkpoint=checkpoint, max_workers=1))
+        consumed = [next(iterator) for _ in range(5)]
+        iterator.close()
+        assert self.backfill(checkpoint=checkpoint).completed_shards() == 1
+        resumed = list(self.backfill(checkpoint=checkpoint))
+        assert consumed[:4] + resumed == self.api.history
+        assert self.backfill(checkpoint=checkpoint).completed_shards() == 4
+
+    def test_checkpoint_mismatch(self):
+        checkpoint = os.path.join(self.directory, "checkpoint.json")
+        list(self.backfill(checkpoint=checkpoint))
+        other = bitcointrade.TradeBackfill(self.api, "BRLETH",
+                                           "2019-01-01T00:00:00Z", "2019-01-01T03:45:00Z",
+                                           checkpoint=checkpoint)
+        self.assertRaises(ArgumentError, other.completed_shards)
+
+    def test_invalid_period(self):
+        self.assertRaises(ArgumentError, bitcointrade.TradeBackfill, self.api, "BRLBTC",
+                          "2019-01-02T00:00:00Z", "2019-01-01T00:00:00Z")
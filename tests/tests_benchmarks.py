@@ -0,0 +1,50 @@
+import os
+import unittest
+import bitcointrade
+from benchmarks import run, importtime
+from benchmarks.replay import ReplayServer
+
+class ReplayServerTestCase(unittest.TestCase):
+    def test_replay(self):
+        with ReplayServer() as server:
+            api = server.client(bitcointrade.Api)
+            try:
+                assert "last" in api.ticker("BRLETH")
+                assert len(api.trades("BRLBTC", page_size=50)["trades"]) == 50
+            finally:
+                api.close()
+
+class RunTestCase(unittest.TestCase):
+    def test_run(self):
+        current = run.run(iterations=3, names=["ticker", "create_order"])
+        assert [result["name"] for result in current["results"]] == ["ticker", "create_order"]
+        for result in current["results"]:
+            assert result["throughput"] > 0
+            assert result["p50_ms"] <= result["p99_ms"]
+
+    def test_compare(self):
+        previous = {"results": [{"name": "ticker", "throughput": 100.0, "p99_ms": 1.0}]}
+        current = {"results": [{"name": "ticker", "throughput": 70.0, "p99_ms": 2.0},
+                               {"name": "orderbook", "throughput": 50.0, "p99_ms": 2.0}]}
+        rows, regressions = run.compare(previous, current, threshold=0.2)
+        assert regressions == ["ticker"]
+        assert [(row["name"], row["ratio"], row["previous_p99_ms"]) for row in rows] == [("ticker", 0.7, 1.0)]
+        assert run.compare(previous, current, threshold=0.5)[1] == []
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_lazy_imports(self):
+        for name, statement in importtime.SCENARIOS[:2]:
+            modules = importtime.measure(statement)["modules"]
+            assert [module for module in importtime.FORBIDDEN[name] if module in modules] == [], name
+
+    @unittest.skipUnless(os.environ.get("BITCOINTRADE_IMPORT_BUDGET"), "set BITCOINTRADE_IMPORT_BUDGET=1 to check")
+    def test_cold_start_budget(self):
+        results = importtime.run(repeat=3, names=["import", "client"])
+        assert importtime.over_budget(results) == [], results
+
+    def test_lazy_exports(self):
+        measured = importtime.measure("import bitcointrade; bitcointrade.OrderBook; bitcointrade.errors.ApiError")
+        assert "bitcointrade.orderbook" in measured["modules"]
+        assert "bitcointrade.history" not in measured["modules"]
+        assert sorted(bitcointrade.__all__) == sorted(bitcointrade.EXPORTS)
+        self.assertRaises(AttributeError, getattr, bitcointrade, "Missing")
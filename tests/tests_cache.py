@@ -0,0 +1,100 @@
+import unittest
+import bitcointrade
+from bitcointrade.cache import ResponseCache
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class CountingApi(bitcointrade.PrivateApi):
+    def __init__(self, *args, **kwargs):
+        bitcointrade.PrivateApi.__init__(self, *args, **kwargs)
+        self.sent = []
+
+    def _send(self, method, endpoint, url, params):
+        self.sent.append((method, url))
+        return {"count": len(self.sent)}
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = ResponseCache(ttls={"a": 1.0, "b": 10.0}, maxsize=2, clock=self.clock)
+
+    def test_ttl(self):
+        self.cache.set("a", "key", 1)
+        assert self.cache.get("a", "key") == (True, 1)
+        self.clock.now = 1.5
+        assert self.cache.get("a", "key") == (False, None)
+        assert self.cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 0}
+
+    def test_lru_eviction(self):
+        self.cache.set("b", "first", 1)
+        self.cache.set("b", "second", 2)
+        self.cache.get("b", "first")
+        self.cache.set("b", "third", 3)
+        assert self.cache.get("b", "second") == (False, None)
+        assert self.cache.get("b", "first") == (True, 1)
+        assert self.cache.evictions == 1
+
+    def test_invalidate(self):
+        self.cache.set("a", "key", 1)
+        self.cache.set("b", "key2", 2)
+        self.cache.invalidate("a")
+        assert self.cache.get("a", "key") == (False, None)
+        assert self.cache.get("b", "key2") == (True, 2)
+        self.cache.invalidate()
+        assert len(self.cache) == 0
+
+    def test_stale_set_is_dropped(self):
+        generation = self.cache.generation("a")
+        self.cache.invalidate("a")
+        self.cache.set("a", "key", 1, generation)
+        assert self.cache.get("a", "key") == (False, None)
+
+class CachedApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.api = CountingApi("42", cache=self.cache)
+
+    def test_cached_endpoints(self):
+        assert self.api.balance() == self.api.balance()
+        assert self.api.bitcoin_withdraw_fee() == self.api.bitcoin_withdraw_fee()
+        assert len(self.api.sent) == 2
+        assert self.cache.hits == 2
+
+    def test_uncached_endpoints(self):
+        self.api.estimated_price(pair="BRLBTC", amount=0.1, type="buy")
+        self.api.estimated_price(pair="BRLBTC", amount=0.1, type="buy")
+        assert len(self.api.sent) == 2
+
+    def test_params_and_token_in_key(self):
+        self.api.summary(pair="BRLBTC")
+        self.api.summary(pair="BRLETH")
+        CountingApi("43", cache=self.cache).summary(pair="BRLBTC")
+        assert self.cache.misses == 3
+
+    def test_typed_in_key(self):
+        class BalanceApi(CountingApi):
+            def _send(self, method, endpoint, url, params):
+                CountingApi._send(self, method, endpoint, url, params)
+                return [{"currency_code": "BTC", "available_amount": 1.0, "locked_amount": 0.0}]
+        typed = BalanceApi("42", cache=self.cache, typed=True)
+        plain = BalanceApi("42", cache=self.cache)
+        assert isinstance(plain.balance()[0], dict)
+        assert isinstance(typed.balance()[0], bitcointrade.models.Balance)
+        assert isinstance(plain.balance()[0], dict)
+        assert self.cache.misses == 2 and self.cache.hits == 1
+
+    def test_mutation_invalidates(self):
+        self.api.balance()
+        self.api.get_user_orders(status="waiting")
+        self.api.create_order(pair="BRLBTC", amount=0.1, type="buy", subtype="limited", unit_price=10000.0)
+        self.api.balance()
+        self.api.get_user_orders(status="waiting")
+        assert [method for method, url in self.api.sent] == ["GET", "GET", "POST", "GET", "GET"]
+        self.api.cancel_order(id="42")
+        self.api.balance()
+        assert len(self.api.sent) == 7
@@ -0,0 +1,73 @@
+import shutil
+import tempfile
+import unittest
+import bitcointrade
+
+def make_trade(seconds, price, amount=1.0):
+    return {"type": "buy", "amount": amount, "unit_price": price,
+            "active_order_code": "A%d" % seconds, "passive_order_code": "P%d" % seconds,
+            "date": "2019-01-01T00:%02d:%02d.000Z" % (seconds // 60, seconds % 60)}
+
+class CandleEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = bitcointrade.CandleEngine(["1m", "5m"])
+
+    def test_update(self):
+        trades = [make_trade(10, 100.0), make_trade(50, 105.0), make_trade(20, 98.0),
+                  make_trade(70, 101.0, 2.0), make_trade(310, 99.0)]
+        assert self.engine.update(trades) == 5
+        minute = self.engine.candles("1m")
+        assert minute["open"].tolist() == [100.0, 101.0, 99.0]
+        assert minute["high"].tolist() == [105.0, 101.0, 99.0]
+        assert minute["low"].tolist() == [98.0, 101.0, 99.0]
+        assert minute["close"].tolist() == [105.0, 101.0, 99.0]
+        assert minute["volume"].tolist() == [3.0, 2.0, 1.0]
+        assert minute["trades"].tolist() == [3, 1, 1]
+        assert (minute["time"][1] - minute["time"][0]) == 60000
+        five = self.engine.candles("5m")
+        assert five["open"].tolist() == [100.0, 99.0]
+        assert five["close"].tolist() == [101.0, 99.0]
+        assert five["volume"].tolist() == [5.0, 1.0]
+
+    def test_incremental(self):
+        self.engine.update([make_trade(10, 100.0), make_trade(70, 101.0)])
+        self.engine.update([make_trade(80, 110.0), make_trade(5, 1.0), make_trade(200, 90.0)])
+        minute = self.engine.candles("1m")
+        assert minute["open"].tolist() == [100.0, 101.0, 90.0]
+        assert minute["high"].tolist() == [100.0, 110.0, 90.0]
+        assert minute["close"].tolist() == [100.0, 110.0, 90.0]
+        assert self.engine.late == 1
+        assert self.engine.candles("5m")["trades"].tolist() == [4]
+
+    def test_overlapping_pages(self):
+        self.engine.update([make_trade(10, 100.0), make_trade(20, 101.0)])
+        assert self.engine.update([make_trade(10, 100.0), make_trade(20, 101.0), make_trade(30, 102.0)]) == 1
+        assert self.engine.candles("1m")["volume"].tolist() == [3.0]
+        assert self.engine.candles("5m")["trades"].tolist() == [3]
+        assert self.engine.duplicates == 2
+        # Once the candle rolled over, its trades are late instead of duplicates
+        self.engine.update([make_trade(30, 102.0), make_trade(70, 103.0)])
+        self.engine.update([make_trade(30, 102.0), make_trade(70, 103.0)])
+        assert self.engine.candles("1m")["volume"].tolist() == [3.0, 1.0]
+        assert self.engine.late == 1
+        assert self.engine.duplicates == 4
+
+    def test_matches_single_update(self):
+        trades = [make_trade(s * 7, 100.0 + s % 13, 0.5 * (s % 5 + 1)) for s in range(300)]
+        engine = bitcointrade.CandleEngine(["1m", "5m"])
+        engine.update(trades)
+        for i in range(0, 300, 40):
+            self.engine.update(trades[i:i + 40])
+        for interval in ("1m", "5m"):
+            for field, values in engine.candles(interval).items():
+                assert self.engine.candles(interval)[field].tolist() == values.tolist()
+
+    def test_store_columns(self):
+        directory = tempfile.mkdtemp()
+        try:
+            store = bitcointrade.TradeStore(directory)
+            store.append("BRLBTC", [make_trade(10, 100.0), make_trade(70, 101.0)])
+            self.engine.update(store.query("BRLBTC"))
+            assert self.engine.candles("1m")["close"].tolist() == [100.0, 101.0]
+        finally:
+            shutil.rmtree(directory)
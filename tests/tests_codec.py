@@ -0,0 +1,52 @@
+import tests
+import unittest
+import requests
+import bitcointrade
+from bitcointrade import codec
+from bitcointrade.errors import ApiError, ArgumentError, HTTPError
+
+def make_response(body, status_code=200):
+    response = requests.models.Response()
+    response._content = body
+    response.status_code = status_code
+    return response
+
+class CodecTestCase(unittest.TestCase):
+    def test_json_codec(self):
+        json_codec = codec.get_codec("json")
+        assert json_codec.loads(b'{"a": [1, 2.5]}') == {"a": [1, 2.5]}
+        assert json_codec.loads(json_codec.dumps({"a": 1})) == {"a": 1}
+
+    def test_default_codec(self):
+        default = codec.default_codec()
+        assert default.name in codec.PREFERENCE
+        assert default.loads(b'{"message":null,"data":1}') == {"message": None, "data": 1}
+
+    def test_invalid_codec(self):
+        self.assertRaises(ArgumentError, codec.get_codec, "yaml")
+
+class CheckResponseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = bitcointrade.Api()
+
+    def test_data(self):
+        assert self.api._check_response(make_response(b'{"message":null,"data":{"a":1}}')) == {"a": 1}
+
+    def test_message(self):
+        self.assertRaises(ApiError, self.api._check_response,
+                          make_response(b'{"message":"Too many requests","data":null}'))
+
+    def test_invalid_body(self):
+        self.assertRaises(ApiError, self.api._check_response, make_response(b'<html></html>'))
+        self.assertRaises(ApiError, self.api._check_response, make_response(b'[1, 2]'))
+        self.assertRaises(ApiError, self.api._check_response, make_response(b'{"data":1}'))
+
+    def test_http_error(self):
+        with self.assertRaises(HTTPError) as context:
+            self.api._check_response(make_response(b'<html></html>', 502))
+        assert context.exception.status == 502
+
+    @tests.vcr.use_cassette("tests_api/test_ticker.yml")
+    def test_stdlib_codec(self):
+        api = bitcointrade.Api(codec=codec.get_codec("json"))
+        assert "last" in api.ticker("BRLBTC")
@@ -0,0 +1,68 @@
+import math
+import unittest
+import warnings
+import bitcointrade
+from bitcointrade.errors import ArgumentError, StaleBookError
+
+def order(price, amount):
+    return {"unit_price": price, "amount": amount, "code": "XXXXXXXXX", "stop_limit_price": None}
+
+SNAPSHOT = {"bids": [order(100, 1.0), order(99, 2.0)],
+            "asks": [order(101, 1.0), order(102, 2.0)]}
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class RemoteApi(bitcointrade.PrivateApi):
+    price = 101.5
+
+    def _send(self, method, endpoint, url, params):
+        return {"price": self.price}
+
+class PriceEstimatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.estimator = bitcointrade.PriceEstimator(SNAPSHOT, max_age=5.0, clock=self.clock)
+
+    def test_estimate(self):
+        prices = self.estimator.estimate([0.5, 1.0, 2.0, 3.0, 4.0], "buy")
+        assert list(prices[:4]) == [101.0, 101.0, 101.5, (101.0 + 204.0) / 3.0]
+        assert math.isnan(prices[4])
+        assert list(self.estimator.estimate([1.5], "sell")) == [(100.0 + 49.5) / 1.5]
+
+    def test_estimated_price(self):
+        assert self.estimator.estimated_price(pair="BRLBTC", amount=2.0, type="buy") == {"price": 101.5}
+
+    def test_stale(self):
+        self.clock.now = 6.0
+        self.assertRaises(StaleBookError, self.estimator.estimate, 1.0, "buy")
+        self.estimator.update(SNAPSHOT)
+        assert self.estimator.estimate(1.0, "buy")[0] == 101.0
+
+    def test_update(self):
+        self.estimator.estimate(1.0, "buy")
+        self.estimator.update({"bids": [], "asks": [order(105, 1.0)]})
+        assert self.estimator.estimate(1.0, "buy")[0] == 105.0
+        assert math.isnan(self.estimator.estimate(1.0, "sell")[0])
+
+    def test_invalid_type(self):
+        self.assertRaises(ArgumentError, self.estimator.estimate, 1.0, "hold")
+
+    def test_cross_check(self):
+        api = RemoteApi("42")
+        estimator = bitcointrade.PriceEstimator(SNAPSHOT, api=api, pair="BRLBTC", cross_check=1.0)
+        estimator.estimate([2.0], "buy")
+        assert (estimator.checks, estimator.mismatches) == (1, 0)
+        api.price = 120.0
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            estimator.estimate([2.0], "buy")
+        assert estimator.mismatches == 1
+        assert caught[0].category == RuntimeWarning
+
+    def test_cross_check_requires_api(self):
+        self.assertRaises(ArgumentError, bitcointrade.PriceEstimator, SNAPSHOT, cross_check=0.1)
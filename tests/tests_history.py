@@ -0,0 +1,109 @@
+import os
+import shutil
+import tempfile
+import unittest
+import bitcointrade
+from bitcointrade.history import WalletHistory, normalize_date
+from bitcointrade.utils import parse_datetime
+
+def make_deposit(day, code, status="confirmed", coin="bitcoin"):
+    return {"code": code, "currency_code": coin, "amount": 0.1, "status": status,
+            "create_date": "2019-01-%02dT00:00:00.000Z" % day,
+            "confirmation_date": "2019-01-%02dT01:00:00.000Z" % day if status != "confirmation_pending" else None}
+
+class LedgerApi(bitcointrade.PrivateApi):
+    """Serves deposits and withdrawals created since start_date, newest first, and records queries"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.records = {"deposits": {}, "withdrawals": {}}
+        self.queries = []
+
+    def _send(self, method, endpoint, url, params):
+        coin = endpoint.split("/")[0]
+        key = "deposits" if endpoint.endswith("deposits") else "withdrawals"
+        self.queries.append((key, coin, params.get("start_date")))
+        start = parse_datetime(params["start_date"]) if "start_date" in params else None
+        records = sorted((record for record in self.records[key].get(coin, [])
+                          if start is None or parse_datetime(record["create_date"]) >= start),
+                         key=lambda record: record["create_date"], reverse=True)
+        return {"pagination": {"current_page": 1, "total_pages": 1}, key: records}
+
+class WalletHistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.history = WalletHistory(os.path.join(self.directory, "wallet.db"))
+        self.api = LedgerApi("42")
+        self.api.records["deposits"]["bitcoin"] = [make_deposit(1, "D1"), make_deposit(3, "D3", "confirmation_pending")]
+        self.api.records["withdrawals"]["ethereum"] = [
+            {"code": "W2", "amount": 1.0, "status": "confirmed", "create_date": "2019-01-02T00:00:00.000Z",
+             "update_date": "2019-01-02T06:00:00.000Z"}]
+
+    def tearDown(self):
+        self.history.close()
+        self.api.close()
+        shutil.rmtree(self.directory)
+
+    def test_first_sync_fetches_everything(self):
+        written = self.history.sync(self.api)
+        assert written[("deposits", "bitcoin")] == 2
+        assert written[("withdrawals", "ethereum")] == 1
+        assert all(start is None for _, _, start in self.api.queries)
+        assert [d["code"] for d in self.history.deposits()] == ["D1", "D3"]
+        assert self.history.withdrawals(coin="ethereum")[0]["update_date"] == "2019-01-02T06:00:00.000Z"
+        assert self.history.watermark("deposits", "bitcoin") == "2019-01-03T00:00:00.000+00:00"
+        assert self.history.watermark("deposits", "litecoin") is None
+
+    def test_incremental_sync(self):
+        self.history.sync(self.api, coins=["bitcoin"], kinds=["deposits"])
+        self.api.records["deposits"]["bitcoin"][1] = make_deposit(3, "D3")
+        self.api.records["deposits"]["bitcoin"].append(make_deposit(4, "D4"))
+        self.api.queries = []
+        written = self.history.sync(self.api, coins=["bitcoin"], kinds=["deposits"])
+        # Window starts at the watermark minus the overlap, so D1 is not downloaded again
+        assert self.api.queries == [("deposits", "bitcoin", "2019-01-02T23:55:00+00:00")]
+        assert written[("deposits", "bitcoin")] == 2
+        assert [d["status"] for d in self.history.deposits(coin="bitcoin")] == ["confirmed"] * 3
+        assert self.history.watermark("deposits", "bitcoin") == "2019-01-04T01:00:00.000+00:00"
+
+        self.api.queries = []
+        self.history.sync(self.api, coins=["bitcoin"], kinds=["deposits"])
+        assert self.api.queries == [("deposits", "bitcoin", "2019-01-04T00:55:00+00:00")]
+
+    def test_window_keeps_pending_records(self):
+        self.api.records["deposits"]["bitcoin"].append(make_deposit(5, "D5"))
+        self.history.sync(self.api, coins=["bitcoin"], kinds=["deposits"])
+        # D3 is still pending, so it is fetched again even though the watermark moved past it
+        assert self.history.window("deposits", "bitcoin") == parse_datetime("2019-01-03T00:00:00Z")
+
+    def test_queries(self):
+        self.history.sync(self.api)
+        assert [d["code"] for d in self.history.deposits(status="confirmation_pending")] == ["D3"]
+        assert [d["code"] for d in self.history.deposits(start_date="2019-01-02T00:00:00Z")] == ["D3"]
+        assert [d["code"] for d in self.history.deposits(end_date="2019-01-03T00:00:00Z")] == ["D1"]
+        assert self.history.deposits(coin="ethereum") == []
+
+    def test_persistence(self):
+        self.history.sync(self.api)
+        self.history.close()
+        self.history = WalletHistory(os.path.join(self.directory, "wallet.db"))
+        assert len(self.history.deposits()) == 2
+        assert self.history.watermark("withdrawals", "ethereum") == "2019-01-02T06:00:00.000+00:00"
+
+    def test_typed_records(self):
+        api = LedgerApi("42", typed=True)
+        api.records = self.api.records
+        try:
+            self.history.sync(api, coins=["bitcoin"], kinds=["deposits"])
+        finally:
+            api.close()
+        deposits = self.history.deposits()
+        assert [d["code"] for d in deposits] == ["D1", "D3"]
+        assert parse_datetime(deposits[0]["create_date"]) == parse_datetime("2019-01-01T00:00:00Z")
+
+    def test_normalize_date(self):
+        assert normalize_date("2019-01-01T02:00:00-02:00") == "2019-01-01T04:00:00.000+00:00"
+        assert normalize_date(None) is None
+
+if __name__ == "__main__":
+    unittest.main()
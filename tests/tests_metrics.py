@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+import tests
+import bitcointrade
+from bitcointrade.metrics import MetricsRegistry
+from bitcointrade.errors import ApiError
+
+class FailingApi(bitcointrade.Api):
+    def _send(self, method, endpoint, url, params):
+        if "BRLXXX" in url:
+            raise ApiError("Invalid pair")
+        return {}
+
+class MetricsRegistryTestCase(unittest.TestCase):
+    def test_histogram(self):
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            metrics.observe("GET", "public/ticker", seconds)
+        latency = metrics.snapshot()[("GET", "public/ticker")]["latency"]
+        assert latency["buckets"] == [(0.1, 2), (1.0, 3), (float("inf"), 4)]
+        assert latency["count"] == 4
+        assert abs(latency["sum"] - 2.65) < 1e-9
+
+    def test_errors_and_bytes(self):
+        metrics = MetricsRegistry()
+        metrics.observe("POST", "market/create_order", 0.2, ApiError("Insufficient balance"))
+        metrics.observe("POST", "market/create_order", 0.2, ValueError())
+        metrics.observe_bytes("POST", "market/create_order", 10, 20)
+        stats = metrics.snapshot()[("POST", "market/create_order")]
+        assert stats["requests"] == 2
+        assert stats["errors"] == {"ApiError": 1, "ValueError": 1}
+        assert (stats["request_bytes"], stats["response_bytes"]) == (10, 20)
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_prometheus(self):
+        metrics = MetricsRegistry(buckets=(0.1,))
+        metrics.observe("GET", "public/ticker", 0.05, ApiError("x"))
+        text = metrics.prometheus()
+        assert '# TYPE bitcointrade_request_duration_seconds histogram' in text
+        assert 'bitcointrade_requests_total{method="GET",endpoint="public/ticker"} 1' in text
+        assert 'bitcointrade_errors_total{method="GET",endpoint="public/ticker",type="ApiError"} 1' in text
+        assert 'bitcointrade_request_duration_seconds_bucket{method="GET",endpoint="public/ticker",le="0.1"} 1' in text
+        assert 'bitcointrade_request_duration_seconds_bucket{method="GET",endpoint="public/ticker",le="+Inf"} 1' in text
+        assert text.endswith("\n")
+
+class ClientMetricsTestCase(unittest.TestCase):
+    def test_client(self):
+        metrics = MetricsRegistry()
+        api = FailingApi(metrics=metrics)
+        api.ticker("BRLBTC")
+        api.ticker("BRLETH")
+        self.assertRaises(ApiError, api.ticker, "BRLXXX")
+        stats = metrics.snapshot()[("GET", "public/ticker")]
+        assert stats["requests"] == 3
+        assert stats["errors"] == {"ApiError": 1}
+
+    def test_disabled(self):
+        metrics = MetricsRegistry(enabled=False)
+        FailingApi(metrics=metrics).ticker("BRLBTC")
+        assert metrics.snapshot() == {}
+
+    @tests.vcr.use_cassette("tests_api/test_ticker.yml")
+    def test_bytes(self):
+        metrics = MetricsRegistry()
+        bitcointrade.Api(metrics=metrics).ticker("BRLBTC")
+        stats = metrics.snapshot()[("GET", "public/ticker")]
+        assert stats["request_bytes"] == 0
+        assert stats["response_bytes"] > 0
+
+    def test_async_client(self):
+        class FailingAsyncApi(bitcointrade.AsyncApi, FailingApi):
+            async def _send(self, method, endpoint, url, params):
+                return FailingApi._send(self, method, endpoint, url, params)
+        metrics = MetricsRegistry()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(FailingAsyncApi(metrics=metrics).ticker("BRLBTC"))
+        finally:
+            loop.close()
+        assert metrics.snapshot()[("GET", "public/ticker")]["requests"] == 1
@@ -0,0 +1,67 @@
+import tests
+import unittest
+from datetime import datetime
+import bitcointrade
+from bitcointrade import models
+
+class ModelsTestCase(unittest.TestCase):
+    def test_lazy_parsing(self):
+        trade = models.Trade.from_dict({"type": "buy", "amount": 1, "unit_price": 12615,
+                                        "active_order_code": "A", "passive_order_code": "P",
+                                        "date": "2019-02-04T14:21:38.560Z", "extra": True})
+        assert trade._date == "2019-02-04T14:21:38.560Z"
+        assert trade.date == bitcointrade.utils.parse_datetime("2019-02-04T14:21:38.560Z")
+        assert type(trade._date) == datetime
+        assert type(trade.amount) == float
+        assert trade["unit_price"] == 12615.0
+        assert "extra" not in trade
+        self.assertRaises(KeyError, trade.__getitem__, "extra")
+        self.assertRaises(AttributeError, setattr, trade, "extra", True)
+
+    def test_missing_fields(self):
+        deposit = models.Deposit.from_dict({"code": "X"})
+        assert deposit.amount is None
+        assert deposit.create_date is None
+
+    def test_convert_unknown_endpoint(self):
+        data = {"price": 1.0}
+        assert models.convert("GET", "market/estimated_price", data) is data
+
+class TypedApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = bitcointrade.Api(typed=True)
+        self.private_api = bitcointrade.PrivateApi("42", typed=True)
+
+    @tests.vcr.use_cassette("tests_api/test_trades.yml")
+    def test_trades(self):
+        response = self.api.trades("BRLBTC")
+        assert "pagination" in response
+        assert all(type(t) == models.Trade for t in response["trades"])
+        assert type(response["trades"][0].date) == datetime
+
+    @tests.vcr.use_cassette("tests_api/test_orderbook.yml")
+    def test_orderbook(self):
+        response = self.api.orderbook("BRLBTC")
+        assert type(response["bids"][0]) == models.BookLevel
+        book = bitcointrade.OrderBook(response)
+        assert book.spread() > 0
+
+    @tests.vcr.use_cassette("tests_private_api/test_get_user_orders.yml")
+    def test_get_user_orders(self):
+        response = self.private_api.get_user_orders(pair="BRLBTC")
+        order = response["orders"][0]
+        assert type(order) == models.Order
+        assert order.status == "executed_completely"
+        assert order.create_date < order.update_date
+
+    @tests.vcr.use_cassette("tests_private_api/test_balance.yml")
+    def test_balance(self):
+        response = self.private_api.balance()
+        assert [b.currency_code for b in response] == ["BRL", "BTC", "ETH", "LTC", "BCH"]
+        assert response[0].to_dict() == {"available_amount": 10000.01, "currency_code": "BRL",
+                                          "locked_amount": 0.0}
+
+    @tests.vcr.use_cassette("tests_private_api/test_bitcoin_deposit_list.yml")
+    def test_deposit_list(self):
+        response = self.private_api.bitcoin_deposit_list()
+        assert type(response["deposits"][0]) == models.Deposit
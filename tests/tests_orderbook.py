@@ -0,0 +1,60 @@
+import tests
+import unittest
+import bitcointrade
+from bitcointrade.orderbook import OrderBook
+
+def order(price, amount):
+    return {"unit_price": price, "amount": amount, "code": "XXXXXXXXX", "stop_limit_price": None}
+
+SNAPSHOT = {"bids": [order(100, 1.0), order(99, 2.0), order(100, 0.5), order(97, 1.0)],
+            "asks": [order(101, 1.0), order(103, 3.0), order(102, 2.0)]}
+
+class OrderBookTestCase(unittest.TestCase):
+    def setUp(self):
+        self.book = OrderBook(SNAPSHOT)
+
+    def test_best(self):
+        assert self.book.best_bid() == (100.0, 1.5)
+        assert self.book.best_ask() == (101.0, 1.0)
+        assert self.book.spread() == 1.0
+        assert self.book.mid_price() == 100.5
+
+    def test_levels_sorted(self):
+        assert list(self.book.bids) == [(100.0, 1.5), (99.0, 2.0), (97.0, 1.0)]
+        assert list(self.book.asks) == [(101.0, 1.0), (102.0, 2.0), (103.0, 3.0)]
+
+    def test_depth_and_volume(self):
+        assert self.book.bids.depth(99) == 2.0
+        assert self.book.bids.depth(98) == 0.0
+        assert self.book.bids.volume(98) == 3.5
+        assert self.book.asks.volume(102) == 3.0
+        assert self.book.asks.volume(100) == 0.0
+        assert self.book.asks.cumulative(2) == 3.0
+        assert self.book.asks.cumulative(10) == 6.0
+
+    def test_update(self):
+        self.book.asks.volume(103)
+        changes = self.book.update({"bids": [order(100, 1.5), order(98, 1.0), order(97, 1.0)],
+                                    "asks": [order(101, 1.0), order(102, 0.5), order(103, 3.0)]})
+        assert sorted(changes["bids"]) == [(98.0, 0.0, 1.0), (99.0, 2.0, 0.0)]
+        assert changes["asks"] == [(102.0, 2.0, 0.5)]
+        assert list(self.book.bids) == [(100.0, 1.5), (98.0, 1.0), (97.0, 1.0)]
+        assert self.book.asks.volume(103) == 4.5
+        assert self.book.bids.cumulative(3) == 3.5
+        assert self.book.update(SNAPSHOT)["bids"] != []
+        assert list(self.book.bids) == list(OrderBook(SNAPSHOT).bids)
+
+    def test_empty(self):
+        book = OrderBook({"bids": [], "asks": []})
+        assert book.best_bid() is None
+        assert book.spread() is None
+
+    @tests.vcr.use_cassette("tests_api/test_orderbook.yml")
+    def test_orderbook_payload(self):
+        book = OrderBook(bitcointrade.Api().orderbook("BRLBTC"))
+        assert book.spread() > 0
+
+    @tests.vcr.use_cassette("tests_private_api/test_orderbook_full.yml")
+    def test_orderbook_full_payload(self):
+        book = OrderBook(bitcointrade.PrivateApi("42").orderbook_full(pair="BRLBTC"))
+        assert book.best_bid()[0] == 12707.99
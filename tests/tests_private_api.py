@@ -1,6 +1,10 @@
 import tests
+import time
 import unittest
+import threading
+from concurrent.futures import CancelledError
 import bitcointrade
+from bitcointrade.simulator import SimulatedExchange
 
 def assert_order_response(response):
     assert type(response) == dict
@@ -183,6 +187,12 @@ class PrivateApiTestCase(unittest.TestCase):
         for r in response["selling"]:
             assert_order_response(r)
 
+    @tests.vcr.use_cassette("tests_private_api/test_summary.yml")
+    def test_summaries(self):
+        response = self.api.summaries(["BRLBTC", "BRLXXX"])
+        assert type(response["BRLBTC"]) == list
+        assert type(response.errors["BRLXXX"]) == bitcointrade.errors.ArgumentError
+
     @tests.vcr.use_cassette
     def test_summary(self):
         response = self.api.summary(pair="BRLBTC")
@@ -206,6 +216,12 @@ class PrivateApiTestCase(unittest.TestCase):
             request_price=70000.0*0.1)
         assert_order_response(response)
 
+    @tests.vcr.use_cassette("tests_private_api/test_bitcoin_deposit_list.yml")
+    def test_iter_bitcoin_deposit_list(self):
+        deposits = list(self.api.iter_bitcoin_deposit_list())
+        assert len(deposits) == 1
+        assert deposits[0]["currency_code"] == "BTC"
+
     @tests.vcr.use_cassette
     def test_get_user_orders(self):
         response = self.api.get_user_orders(pair="BRLBTC")
@@ -238,3 +254,111 @@ class PrivateApiTestCase(unittest.TestCase):
             assert "locked_amount" in r
             assert "currency_code" in r
 
+
+class BulkOrdersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.exchange = SimulatedExchange().start()
+        self.exchange.engine.deposit("42", "BTC", 10.0)
+        self.api = self.exchange.client(bitcointrade.PrivateApi, "42")
+
+    def tearDown(self):
+        self.api.close()
+        self.exchange.stop()
+
+    def ladder(self, levels, amount=0.1):
+        return [{"pair": "BRLBTC", "type": "sell", "subtype": "limited", "amount": amount,
+                 "unit_price": 100.0 + level} for level in range(levels)]
+
+    def test_create_and_cancel_orders(self):
+        created = self.api.create_orders(self.ladder(20))
+        assert list(created.keys()) == list(range(20))
+        assert [order["unit_price"] for order in created.values()] == [100.0 + level for level in range(20)]
+        ids = [order["id"] for order in created.values()]
+        cancelled = self.api.cancel_orders(ids + ["unknown"])
+        assert list(cancelled.keys()) == ids
+        assert type(cancelled.errors["unknown"]) == bitcointrade.errors.ApiError
+        assert self.exchange.engine.orderbook("BRLBTC")["asks"] == []
+
+    def test_single_wave(self):
+        api = bitcointrade.PrivateApi("42", pool_maxsize=20)
+        in_flight, peak, lock = [0], [0], threading.Lock()
+
+        def send(method, endpoint, url, params):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.1)
+            with lock:
+                in_flight[0] -= 1
+            return {"id": "1"}
+        api._send = send
+        try:
+            assert len(api.create_orders(self.ladder(20))) == 20
+        finally:
+            api.close()
+        assert api.max_workers == 20 and peak[0] == 20
+
+    def test_validated_up_front(self):
+        orders = self.ladder(3)
+        orders[2]["type"] = "hold"
+        self.assertRaises(bitcointrade.errors.ArgumentError, self.api.create_orders, orders)
+        self.assertRaises(bitcointrade.errors.ArgumentError, self.api.cancel_orders, ["1", 2])
+        assert self.exchange.engine.user_orders("42")["orders"] == []
+
+    def test_cancel_on_error(self):
+        api = self.exchange.client(bitcointrade.PrivateApi, "42", max_workers=1)
+        try:
+            created = api.create_orders(self.ladder(1, amount=100.0) + self.ladder(10), cancel_on_error=True)
+        finally:
+            api.close()
+        assert type(created.errors[0]) == bitcointrade.errors.ApiError
+        assert any(type(error) == CancelledError for error in created.errors.values())
+        assert len(created) + len(created.errors) == 11
+
+class StubWalletApi(bitcointrade.PrivateApi):
+    """Two pages of deposits and withdrawals per coin, dated by coin and page"""
+
+    def _send(self, method, endpoint, url, params):
+        coin = endpoint.split("/")[0]
+        if endpoint.endswith("withdraw/fee"):
+            if coin == "litecoin":
+                raise bitcointrade.errors.ApiError("Unavailable")
+            return [{"name": "fast", "amount": 0.0001}]
+        key = "deposits" if endpoint.endswith("deposits") else "withdrawals"
+        page = params.get("current_page", 1)
+        day = bitcointrade.private_api.COINS.index(coin) * 2 + page
+        return {"pagination": {"current_page": page, "total_pages": 2},
+                key: [{"code": "%s-%d" % (coin, page), "currency_code": coin,
+                       "create_date": "2019-01-%02dT00:00:00.000Z" % day}]}
+
+class CoinWalletTestCase(unittest.TestCase):
+    def setUp(self):
+        self.api = StubWalletApi("42", max_workers=2)
+
+    def tearDown(self):
+        self.api.close()
+
+    @tests.vcr.use_cassette("tests_private_api/test_bitcoin_withdraw_list.yml")
+    def test_withdraw_list(self):
+        response = bitcointrade.PrivateApi("42").withdraw_list("bitcoin")
+        assert "withdrawals" in response
+
+    def test_invalid_coin(self):
+        self.assertRaises(bitcointrade.errors.ArgumentError, self.api.deposit_list, "dogecoin")
+        self.assertRaises(bitcointrade.errors.ArgumentError, self.api.all_deposits, status="lost")
+
+    def test_coin_methods_delegate(self):
+        assert self.api.ethereum_deposit_list() == self.api.deposit_list("ethereum")
+        assert [d["code"] for d in self.api.iter_litecoin_withdraw_list()] == ["litecoin-1", "litecoin-2"]
+
+    def test_all_deposits(self):
+        deposits = self.api.all_deposits()
+        assert len(deposits) == 8
+        assert [d["create_date"] for d in deposits] == sorted(d["create_date"] for d in deposits)
+        assert [d["code"] for d in self.api.all_withdrawals(coins=["litecoin", "bitcoin"])] == \
+            ["bitcoin-1", "bitcoin-2", "litecoin-1", "litecoin-2"]
+
+    def test_all_withdraw_fees(self):
+        fees = self.api.all_withdraw_fees()
+        assert list(fees.keys()) == ["bitcoin", "ethereum", "bitcoincash"]
+        assert type(fees.errors["litecoin"]) == bitcointrade.errors.ApiError
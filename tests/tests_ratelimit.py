@@ -0,0 +1,127 @@
+import time
+import asyncio
+import threading
+import unittest
+import requests
+import bitcointrade
+from bitcointrade import ratelimit
+from bitcointrade.ratelimit import RateLimiter, HIGH, NORMAL, LOW
+from bitcointrade.errors import ApiError, RateLimitError
+
+class ThrottledApi(bitcointrade.Api):
+    throttle = False
+
+    def _send(self, method, endpoint, url, params):
+        if self.throttle:
+            raise RateLimitError("Too many requests")
+        return {}
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_family_and_priority(self):
+        assert ratelimit.family("GET", "public/ticker") == "public"
+        assert ratelimit.family("GET", "market") == "market"
+        assert ratelimit.family("GET", "bitcoin/withdraw/fee") == "wallets"
+        assert ratelimit.family("POST", "bitcoin/withdraw") == "withdraw"
+        limiter = RateLimiter()
+        assert limiter._path("GET", "public/ticker") == [limiter.buckets["account"], limiter.buckets["public"]]
+        assert limiter._path("POST", "market/create_order") == [limiter.buckets["account"], limiter.buckets["market"]]
+        assert ratelimit.priority("POST", "market/create_order") == HIGH
+        assert ratelimit.priority("DELETE", "market/user_orders") == HIGH
+        assert ratelimit.priority("GET", "market/user_orders/list") == NORMAL
+        assert ratelimit.priority("GET", "public/orders") == LOW
+
+    def test_burst(self):
+        limiter = RateLimiter({"public": (20.0, 2)})
+        start = time.time()
+        for _ in range(3):
+            limiter.acquire("GET", "public/ticker")
+        assert 0.03 < time.time() - start < 0.5
+
+    def test_unknown_family(self):
+        limiter = RateLimiter({"public": (1.0, 1)})
+        for _ in range(3):
+            limiter.acquire("GET", "wallets/balance")
+
+    def test_priority(self):
+        limiter = RateLimiter({"public": (20.0, 1)},
+                              priority=lambda method, endpoint: HIGH if endpoint == "public/ticker" else LOW)
+        limiter.acquire("GET", "public/trades")
+        served = []
+
+        def request(endpoint):
+            limiter.acquire("GET", endpoint)
+            served.append(endpoint)
+        low = threading.Thread(target=request, args=("public/orders",))
+        high = threading.Thread(target=request, args=("public/ticker",))
+        low.start()
+        time.sleep(0.01)
+        high.start()
+        low.join()
+        high.join()
+        assert served == ["public/ticker", "public/orders"]
+
+    def test_orders_ahead_of_polling(self):
+        limiter = RateLimiter(dict(ratelimit.DEFAULT_RATES, account=(20.0, 1)))
+        api = ThrottledApi(rate_limiter=limiter)
+        private = bitcointrade.PrivateApi("42", rate_limiter=limiter)
+        private._send = lambda method, endpoint, url, params: {}
+        api.ticker("BRLBTC")
+        served = []
+
+        def poll():
+            api.ticker("BRLBTC")
+            served.append("ticker")
+        polls = [threading.Thread(target=poll) for _ in range(3)]
+        for thread in polls:
+            thread.start()
+        time.sleep(0.01)
+        assert len(limiter.buckets["account"].waiting) == 3
+        private.create_order(pair="BRLBTC", amount=0.1, type="buy", subtype="limited", unit_price=10000.0)
+        served.append("create_order")
+        for thread in polls:
+            thread.join()
+        assert served[0] == "create_order"
+        assert len(limiter.buckets["account"].waiting) == 0
+
+    def test_feedback(self):
+        limiter = RateLimiter({"public": (10.0, 1)}, recovery=0.1)
+        bucket = limiter.buckets["public"]
+        limiter.feedback("GET", "public/ticker", throttled=True)
+        assert bucket.rate == 5.0
+        limiter.feedback("GET", "public/ticker", throttled=False)
+        assert bucket.rate == 6.0
+        for _ in range(10):
+            limiter.feedback("GET", "public/ticker", throttled=False)
+        assert bucket.rate == 10.0
+
+    def test_acquire_async(self):
+        limiter = RateLimiter({"public": (50.0, 1)})
+
+        async def requests():
+            await asyncio.gather(*[limiter.acquire_async("GET", "public/ticker") for _ in range(3)])
+        start = time.time()
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(requests())
+        loop.close()
+        assert 0.03 < time.time() - start < 0.5
+
+class LimitedApiTestCase(unittest.TestCase):
+    def test_throttling_feedback(self):
+        limiter = RateLimiter({"public": (100.0, 5)})
+        api = ThrottledApi(rate_limiter=limiter)
+        api.ticker("BRLBTC")
+        api.throttle = True
+        self.assertRaises(ApiError, api.ticker, "BRLBTC")
+        assert limiter.buckets["public"].rate == 50.0
+
+    def test_too_many_requests_status(self):
+        api = bitcointrade.Api()
+        response = requests.models.Response()
+        response.status_code = 429
+        response._content = b'<html>Too Many Requests</html>'
+        self.assertRaises(RateLimitError, api._check_response, response)
+        response._content = b'{"message":"Limit exceeded","data":null}'
+        try:
+            api._check_response(response)
+        except RateLimitError as e:
+            assert e.error == "Limit exceeded"
@@ -0,0 +1,124 @@
+import time
+import asyncio
+import threading
+import unittest
+import requests
+import bitcointrade
+from bitcointrade.retry import RetryPolicy, LatencyTracker
+from bitcointrade.errors import ApiError, RateLimitError
+
+class FlakyApi(bitcointrade.PrivateApi):
+    """Fails the first attempts, then answers after a delay"""
+
+    def __init__(self, failures=(), delays=(), **kwargs):
+        bitcointrade.PrivateApi.__init__(self, "42", **kwargs)
+        self.failures = list(failures)
+        self.delays = list(delays)
+        self.attempts = 0
+        self.lock = threading.Lock()
+
+    def _send(self, method, endpoint, url, params):
+        with self.lock:
+            attempt = self.attempts
+            self.attempts += 1
+        if attempt < len(self.delays):
+            time.sleep(self.delays[attempt])
+        if attempt < len(self.failures):
+            raise self.failures[attempt]
+        return {"attempt": attempt}
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_retry(self):
+        api = FlakyApi([requests.ConnectionError(), RateLimitError("Too many requests")],
+                       retry_policy=RetryPolicy(retries=2, backoff=0.001))
+        assert api.balance() == {"attempt": 2}
+        assert api.retry_policy.retried == 2
+
+    def test_retries_exhausted(self):
+        api = FlakyApi([requests.Timeout()] * 3, retry_policy=RetryPolicy(retries=1, backoff=0.001))
+        self.assertRaises(requests.Timeout, api.balance)
+        assert api.attempts == 2
+
+    def test_api_error_not_retried(self):
+        api = FlakyApi([ApiError("Invalid pair")], retry_policy=RetryPolicy(backoff=0.001))
+        self.assertRaises(ApiError, api.summary, pair="BRLBTC")
+        assert api.attempts == 1
+
+    def test_mutations_not_retried(self):
+        api = FlakyApi([requests.ConnectionError()], retry_policy=RetryPolicy(backoff=0.001))
+        self.assertRaises(requests.ConnectionError, api.cancel_order, id="42")
+        assert api.attempts == 1
+
+    def test_retryable(self):
+        policy = RetryPolicy()
+        response = requests.models.Response()
+        response.status_code = 503
+        assert policy.retryable(requests.HTTPError(response=response))
+        response.status_code = 404
+        assert not policy.retryable(requests.HTTPError(response=response))
+        assert not policy.retryable(bitcointrade.errors.ArgumentError("Parameter is required"))
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff=0.1, max_backoff=0.3)
+        assert all(0 <= policy.delay(attempt) <= 0.3 for attempt in range(10))
+
+    def test_hedge(self):
+        policy = RetryPolicy(hedge_delay=0.02)
+        api = FlakyApi(delays=[0.5], retry_policy=policy)
+        start = time.time()
+        assert api.balance() == {"attempt": 1}
+        assert time.time() - start < 0.4
+        assert policy.hedged == 1
+        policy.close()
+
+    def test_hedge_failed_attempt(self):
+        policy = RetryPolicy(hedge_delay=0.02, backoff=1.0)
+        api = FlakyApi(failures=[requests.Timeout()], delays=[0.2], retry_policy=policy)
+        assert api.balance() == {"attempt": 1}
+        assert (policy.hedged, policy.retried) == (1, 0)
+        policy.close()
+
+    def test_hedge_workers_busy(self):
+        # The only worker sends the first attempt, the duplicate is skipped
+        policy = RetryPolicy(hedge_delay=0.02, hedge_workers=1)
+        api = FlakyApi(delays=[0.1], retry_policy=policy)
+        assert api.balance() == {"attempt": 0}
+        assert policy.hedged == 0 and api.attempts == 1
+        # Without a free worker the request is sent from the calling thread
+        policy._hedge_slots.acquire()
+        caller = threading.current_thread()
+        api._send = lambda *args: {"caller": threading.current_thread() is caller}
+        assert api.balance() == {"caller": True}
+        policy._hedge_slots.release()
+        policy.close()
+
+    def test_hedge_percentile(self):
+        policy = RetryPolicy(hedge_percentile=90, min_samples=5)
+        for seconds in [0.01, 0.01, 0.02, 0.02, 0.03]:
+            policy.latencies.record("wallets/balance", seconds)
+        assert policy.hedge_after("wallets/balance") == 0.03
+        assert policy.hedge_after("public/ticker") is None
+
+    def test_hedge_async(self):
+        policy = RetryPolicy(hedge_delay=0.02)
+        calls = []
+
+        async def request():
+            calls.append(len(calls))
+            await asyncio.sleep(0.5 if len(calls) == 1 else 0)
+            return len(calls)
+        loop = asyncio.new_event_loop()
+        start = time.time()
+        assert loop.run_until_complete(policy.call_async(request, "wallets/balance")) == 2
+        loop.close()
+        assert time.time() - start < 0.4
+
+class LatencyTrackerTestCase(unittest.TestCase):
+    def test_window(self):
+        tracker = LatencyTracker(window=3)
+        for seconds in [5.0, 1.0, 2.0, 3.0]:
+            tracker.record("public/ticker", seconds)
+        assert tracker.count("public/ticker") == 3
+        assert tracker.percentile("public/ticker", 0) == 1.0
+        assert tracker.percentile("public/ticker", 100) == 3.0
+        assert tracker.percentile("public/orders", 50) is None
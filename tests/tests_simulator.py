@@ -0,0 +1,138 @@
+import unittest
+import bitcointrade
+from bitcointrade.simulator import MatchingEngine, SimulatedExchange
+from bitcointrade.errors import ApiError
+
+def balances(engine, token):
+    return dict((balance["currency_code"], (balance["available_amount"], balance["locked_amount"]))
+                for balance in engine.balance(token))
+
+class MatchingEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = MatchingEngine(clock=lambda: 1549290000.0)
+        self.engine.deposit("buyer", "BRL", 10000.0)
+        self.engine.deposit("seller", "BTC", 10.0)
+
+    def sell(self, amount, unit_price, token="seller"):
+        return self.engine.create_order(token, "BRLBTC", "sell", "limited", amount, unit_price)
+
+    def test_price_time_priority(self):
+        first = self.sell(1.0, 101.0)
+        second = self.sell(1.0, 100.0)
+        third = self.sell(1.0, 100.0)
+        self.engine.create_order("buyer", "BRLBTC", "buy", "limited", 1.5, 101.0)
+        trades = self.engine.trades("BRLBTC")["trades"]
+        assert [(trade["passive_order_code"], trade["amount"], trade["unit_price"]) for trade in reversed(trades)] == \
+            [(second["code"], 1.0, 100.0), (third["code"], 0.5, 100.0)]
+        book = self.engine.orderbook("BRLBTC")
+        assert [(order["code"], order["amount"]) for order in book["asks"]] == [(third["code"], 0.5), (first["code"], 1.0)]
+        assert book["bids"] == []
+
+    def test_balances(self):
+        self.sell(1.0, 100.0)
+        assert balances(self.engine, "seller")["BTC"] == (9.0, 1.0)
+        self.engine.create_order("buyer", "BRLBTC", "buy", "limited", 2.0, 110.0)
+        assert balances(self.engine, "buyer")["BRL"] == (9790.0, 110.0)
+        assert balances(self.engine, "buyer")["BTC"] == (1.0, 0.0)
+        assert balances(self.engine, "seller")["BRL"] == (100.0, 0.0)
+        assert balances(self.engine, "seller")["BTC"] == (9.0, 0.0)
+
+    def test_cancel(self):
+        order = self.sell(1.0, 100.0)
+        self.engine.cancel_order("seller", order["id"])
+        assert balances(self.engine, "seller")["BTC"] == (10.0, 0.0)
+        assert self.engine.orderbook("BRLBTC")["asks"] == []
+        self.assertRaises(ApiError, self.engine.cancel_order, "seller", order["id"])
+        self.assertRaises(ApiError, self.engine.cancel_order, "buyer", "unknown")
+
+    def test_market_order(self):
+        self.sell(1.0, 100.0)
+        self.sell(1.0, 200.0)
+        assert self.engine.estimated_price("BRLBTC", 1.5, "buy") == {"price": 400.0 / 3}
+        self.engine.create_order("buyer", "BRLBTC", "buy", "market", 3.0)
+        order = self.engine.user_orders("buyer")["orders"][0]
+        assert order["status"] == "executed_partially"
+        assert (order["executed_amount"], order["total_price"]) == (2.0, 300.0)
+        assert balances(self.engine, "buyer")["BRL"] == (9700.0, 0.0)
+        self.assertRaises(ApiError, self.engine.estimated_price, "BRLBTC", 1.0, "buy")
+
+    def test_insufficient_balance(self):
+        self.assertRaises(ApiError, self.engine.create_order, "buyer", "BRLBTC", "buy", "limited", 1.0, 20000.0)
+        self.assertRaises(ApiError, self.sell, 11.0, 100.0)
+
+    def test_ticker(self):
+        self.sell(1.0, 100.0)
+        self.sell(1.0, 120.0)
+        self.engine.create_order("buyer", "BRLBTC", "buy", "limited", 1.0, 90.0)
+        self.engine.create_order("buyer", "BRLBTC", "buy", "market", 1.5)
+        ticker = self.engine.ticker("BRLBTC")
+        assert (ticker["buy"], ticker["sell"], ticker["last"]) == (90.0, 120.0, 120.0)
+        assert (ticker["high"], ticker["low"], ticker["volume"], ticker["trades_quantity"]) == (120.0, 100.0, 1.5, 2)
+
+    def test_ticker_window(self):
+        now = [1549290000.0]
+        engine = MatchingEngine(clock=lambda: now[0])
+        engine.deposit("buyer", "BRL", 10000.0)
+        engine.deposit("seller", "BTC", 10.0)
+        for price, hours in [(130.0, 0), (100.0, 12), (110.0, 20)]:
+            now[0] = 1549290000.0 + hours * 3600
+            engine.create_order("seller", "BRLBTC", "sell", "limited", 1.0, price)
+            engine.create_order("buyer", "BRLBTC", "buy", "market", 1.0)
+        now[0] = 1549290000.0 + 25 * 3600
+        ticker = engine.ticker("BRLBTC")
+        assert (ticker["high"], ticker["low"], ticker["last"]) == (110.0, 100.0, 110.0)
+        assert (ticker["volume"], ticker["trades_quantity"]) == (2.0, 2)
+        now[0] = 1549290000.0 + 45 * 3600
+        ticker = engine.ticker("BRLBTC")
+        assert (ticker["high"], ticker["low"], ticker["volume"], ticker["last"]) == (None, None, 0.0, 110.0)
+
+    def test_history_bounded(self):
+        engine = MatchingEngine(clock=lambda: 1549290000.0, history=3)
+        engine.deposit("buyer", "BRL", 10000.0)
+        engine.deposit("seller", "BTC", 10.0)
+        resting = engine.create_order("seller", "BRLBTC", "sell", "limited", 1.0, 200.0)
+        for _ in range(5):
+            order = engine.create_order("seller", "BRLBTC", "sell", "limited", 0.1, 100.0)
+            engine.cancel_order("seller", order["id"])
+        orders = engine.user_orders("seller", pair="BRLBTC")["orders"]
+        assert [order["status"] for order in orders] == ["canceled"] * 3 + ["waiting"]
+        assert engine.user_orders("seller", status="waiting")["orders"][0]["id"] == resting["id"]
+        assert engine.user_orders("seller", pair="BRLETH")["orders"] == []
+        for _ in range(8):
+            engine.create_order("seller", "BRLBTC", "sell", "limited", 0.1, 100.0)
+            engine.create_order("buyer", "BRLBTC", "buy", "market", 0.1)
+        assert len(engine._trades["BRLBTC"]) < 2 * 3
+        assert engine.trades("BRLBTC", page_size=2)["pagination"]["registers_count"] == len(engine._trades["BRLBTC"])
+        assert engine.ticker("BRLBTC")["trades_quantity"] == 8
+        self.assertRaises(ApiError, engine.cancel_order, "seller", "2")
+
+    def test_stop_limit_rejected(self):
+        with self.assertRaises(ApiError) as context:
+            self.engine.create_order("seller", "BRLBTC", "sell", "stopLimit", 1.0, 100.0)
+        assert "subtype" in str(context.exception)
+
+class SimulatedExchangeTestCase(unittest.TestCase):
+    def test_clients(self):
+        with SimulatedExchange() as exchange:
+            exchange.engine.deposit("buyer", "BRL", 10000.0)
+            exchange.engine.deposit("seller", "BTC", 1.0)
+            buyer = exchange.client(bitcointrade.PrivateApi, "buyer")
+            seller = exchange.client(bitcointrade.PrivateApi, "seller")
+            api = exchange.client(bitcointrade.Api)
+            try:
+                order = seller.create_order(pair="BRLBTC", type="sell", subtype="limited",
+                                            amount=1.0, unit_price=100.0)
+                assert order["origin_currency_code"] == "BTC"
+                assert api.orderbook("BRLBTC")["asks"][0]["code"] == order["code"]
+                assert buyer.estimated_price(pair="BRLBTC", amount=0.5, type="buy") == {"price": 100.0}
+                buyer.create_order(pair="BRLBTC", type="buy", subtype="market", amount=0.5)
+                assert api.ticker("BRLBTC")["last"] == 100.0
+                assert len(api.trades("BRLBTC")["trades"]) == 1
+                seller.cancel_order(id=order["id"])
+                assert seller.get_user_orders(pair="BRLBTC")["orders"][0]["status"] == "canceled"
+                assert dict((balance["currency_code"], balance["available_amount"])
+                            for balance in seller.balance())["BTC"] == 0.5
+                self.assertRaises(ApiError, seller.cancel_order, id=order["id"])
+            finally:
+                for client in (buyer, seller, api):
+                    client.close()
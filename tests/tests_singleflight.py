@@ -0,0 +1,124 @@
+import time
+import asyncio
+import threading
+import unittest
+import bitcointrade
+from bitcointrade.singleflight import SingleFlight
+from bitcointrade.cache import ResponseCache
+from bitcointrade.errors import ApiError
+
+class SlowApi(bitcointrade.PrivateApi):
+    """Answers after a delay, counting requests sent"""
+
+    def __init__(self, delay=0.1, error=None, **kwargs):
+        bitcointrade.PrivateApi.__init__(self, "42", **kwargs)
+        self.delay = delay
+        self.error = error
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def _send(self, method, endpoint, url, params):
+        with self.lock:
+            self.sent.append((method, endpoint))
+            number = len(self.sent)
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"request": number}
+
+class SlowAsyncApi(bitcointrade.AsyncPrivateApi, SlowApi):
+    async def _send(self, method, endpoint, url, params):
+        with self.lock:
+            self.sent.append((method, endpoint))
+            number = len(self.sent)
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {"request": number}
+
+def concurrently(function, count=8):
+    results = [None] * count
+    def call(index):
+        try:
+            results[index] = function()
+        except Exception as error:
+            results[index] = error
+    threads = [threading.Thread(target=call, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class SingleFlightTestCase(unittest.TestCase):
+    def test_threads_share_request(self):
+        flights = SingleFlight()
+        api = SlowApi(single_flight=flights)
+        results = concurrently(api.balance)
+        assert len(api.sent) == 1
+        assert all(result is results[0] for result in results)
+        assert flights.shared == 7
+        assert len(flights) == 0
+        # Nothing is kept once the request landed
+        assert api.balance() == {"request": 2}
+
+    def test_threads_share_error(self):
+        api = SlowApi(error=ApiError("Unavailable"), single_flight=SingleFlight())
+        results = concurrently(api.balance)
+        assert len(api.sent) == 1
+        assert all(isinstance(result, ApiError) for result in results)
+
+    def test_distinct_params(self):
+        api = SlowApi(single_flight=SingleFlight())
+        concurrently(lambda: api.summary(pair="BRLBTC"), 4)
+        concurrently(lambda: [api.summary(pair="BRLBTC"), api.summary(pair="BRLETH")], 1)
+        assert len(api.sent) == 3
+
+    def test_mutations_not_coalesced(self):
+        api = SlowApi(delay=0.05, single_flight=SingleFlight())
+        concurrently(lambda: api.cancel_order(id="42"), 4)
+        assert len(api.sent) == 4
+
+    def test_disabled(self):
+        api = SlowApi(delay=0.05)
+        concurrently(api.balance, 4)
+        assert len(api.sent) == 4
+
+    def test_with_cache(self):
+        api = SlowApi(single_flight=SingleFlight(), cache=ResponseCache())
+        results = concurrently(lambda: api.summary(pair="BRLBTC"))
+        assert len(api.sent) == 1
+        assert api.summary(pair="BRLBTC") is results[0]
+
+    def test_asyncio(self):
+        flights = SingleFlight()
+        api = SlowAsyncApi(single_flight=flights)
+        async def calls():
+            return await asyncio.gather(*[api.balance() for _ in range(8)], api.cancel_order(id="42"))
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(calls())
+        finally:
+            loop.close()
+        assert api.sent.count(("GET", "wallets/balance")) == 1
+        assert api.sent.count(("DELETE", "market/user_orders")) == 1
+        assert all(result is results[0] for result in results[:8])
+        assert flights.shared == 7
+        assert len(flights) == 0
+
+    def test_asyncio_cancelled_caller(self):
+        api = SlowAsyncApi(single_flight=SingleFlight())
+        async def calls():
+            first = asyncio.ensure_future(api.balance())
+            second = asyncio.ensure_future(api.balance())
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+        loop = asyncio.new_event_loop()
+        try:
+            assert loop.run_until_complete(calls()) == {"request": 1}
+        finally:
+            loop.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+import unittest
+import bitcointrade
+from bitcointrade.store import TradeStore, timestamp
+
+def make_trade(second, code, type="buy"):
+    return {"type": type, "amount": 0.5, "unit_price": 10000.0 + second,
+            "active_order_code": code, "passive_order_code": "P" + code,
+            "date": "2019-01-01T00:00:%02d.000Z" % second}
+
+class PagedApi(bitcointrade.Api):
+    """Serves trades newest first in pages"""
+    history = [make_trade(second, "C%d" % second) for second in range(10)]
+
+    def trades(self, pair, **params):
+        trades = list(reversed(self.history))
+        page = params.get("current_page", 1)
+        size = params["page_size"]
+        return {"pagination": {"current_page": page, "total_pages": (len(trades) + size - 1) // size},
+                "trades": trades[(page - 1) * size:page * size]}
+
+class TradeStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = TradeStore(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_append_and_query(self):
+        assert self.store.append("BRLBTC", [make_trade(3, "C"), make_trade(1, "A", "sell"), make_trade(2, "B")]) == 3
+        columns = self.store.query("brlbtc", "2019-01-01T00:00:02Z", "2019-01-01T00:00:03Z")
+        assert columns["active_order_code"].tolist() == [b"B"]
+        columns = self.store.query("BRLBTC")
+        assert columns["timestamp"].tolist() == [timestamp("2019-01-01T00:00:0%dZ" % s) for s in (1, 2, 3)]
+        assert columns["side"].tolist() == [1, 0, 0]
+        assert columns["unit_price"].tolist() == [10001.0, 10002.0, 10003.0]
+        assert self.store.pairs() == ["BRLBTC"]
+
+    def test_skips_stored_trades(self):
+        self.store.append("BRLBTC", [make_trade(1, "A"), make_trade(2, "B")])
+        assert self.store.append("BRLBTC", [make_trade(1, "A"), make_trade(2, "B"), make_trade(2, "D"),
+                                            make_trade(4, "E")]) == 2
+        assert self.store.query("BRLBTC")["active_order_code"].tolist() == [b"A", b"B", b"D", b"E"]
+
+    def test_persistence_and_truncated_column(self):
+        self.store.append("BRLBTC", [make_trade(1, "A"), make_trade(2, "B")])
+        with open(os.path.join(self.directory, "BRLBTC", "amount.bin"), "ab") as f:
+            f.write(b"\0" * 4)
+        store = TradeStore(self.directory)
+        assert store.count("BRLBTC") == 2
+        store.append("BRLBTC", [make_trade(3, "C")])
+        assert store.query("BRLBTC")["amount"].tolist() == [0.5, 0.5, 0.5]
+
+    def test_empty(self):
+        assert self.store.count("BRLETH") == 0
+        assert len(self.store.query("BRLETH")["timestamp"]) == 0
+
+    def test_ingest(self):
+        assert self.store.ingest(PagedApi(), "BRLBTC", page_size=3) == 10
+        timestamps = self.store.query("BRLBTC")["timestamp"]
+        assert timestamps.tolist() == sorted(timestamps.tolist())
+        assert self.store.ingest(PagedApi(), "BRLBTC", page_size=4) == 0
+        assert len(self.store) == 10
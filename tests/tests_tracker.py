@@ -0,0 +1,142 @@
+import time
+import asyncio
+import unittest
+import bitcointrade
+from bitcointrade.tracker import OrderTracker, PARTIAL_FILL, COMPLETE, CANCELED
+from bitcointrade.simulator import SimulatedExchange
+from bitcointrade.errors import ArgumentError
+from bitcointrade.metrics import MetricsRegistry
+
+def sell(amount, unit_price=100.0):
+    return {"pair": "BRLBTC", "type": "sell", "subtype": "limited", "amount": amount, "unit_price": unit_price}
+
+class OrderTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.exchange = SimulatedExchange().start()
+        engine = self.exchange.engine
+        engine.deposit("maker", "BTC", 10.0)
+        engine.deposit("taker", "BRL", 10000.0)
+        self.api = self.exchange.client(bitcointrade.PrivateApi, "maker")
+        self.events = []
+
+    def tearDown(self):
+        self.api.close()
+        self.exchange.stop()
+
+    def take(self, amount):
+        self.exchange.engine.create_order("taker", "BRLBTC", "buy", "market", amount)
+
+    def test_change_events(self):
+        self.api.create_order(**sell(1.0, 90.0))
+        self.take(0.5)
+        tracker = OrderTracker(self.api, pair="BRLBTC", callbacks=[self.events.append], overlap=0)
+        assert tracker.poll() == []
+        assert len(tracker) == 1
+        order = tracker.create_order(**sell(1.0))
+        assert tracker.get(order["code"])["status"] == "waiting"
+        assert tracker.poll() == []
+        self.take(0.75)
+        events = tracker.poll()
+        assert [(event.kind, event.filled) for event in events] == [(PARTIAL_FILL, 0.25), (COMPLETE, 0.5)]
+        assert tracker.interval == tracker.min_interval
+        self.take(0.75)
+        assert [(event.kind, event.filled) for event in tracker.poll()] == [(COMPLETE, 0.75)]
+        assert len(tracker) == 0
+        canceled = tracker.create_order(**sell(1.0))
+        self.api.cancel_order(id=canceled["id"])
+        assert [event.kind for event in tracker.poll()] == [CANCELED]
+        assert [event.kind for event in self.events] == [PARTIAL_FILL, COMPLETE, COMPLETE, CANCELED]
+        assert tracker.poll() == []
+        assert tracker.interval == tracker.max_interval
+
+    def test_untracked_orders(self):
+        tracker = OrderTracker(self.api, callbacks=[self.events.append])
+        tracker.poll()
+        self.api.create_order(**sell(1.0))
+        self.take(1.0)
+        assert [event.kind for event in tracker.poll()] == [COMPLETE]
+        assert tracker.poll() == []
+
+    def test_long_history(self):
+        metrics = MetricsRegistry()
+        api = self.exchange.client(bitcointrade.PrivateApi, "maker", metrics=metrics)
+        tracker = OrderTracker(api, overlap=0)
+        resting = tracker.create_order(**sell(1.0, 200.0))
+        engine = self.exchange.engine
+        for _ in range(400):
+            engine.cancel_order("maker", engine.create_order("maker", "BRLBTC", "sell", "limited", 0.01, 300.0)["id"])
+        tracker.poll()
+        time.sleep(0.01)
+
+        def requests():
+            return metrics.snapshot()[("GET", "market/user_orders/list")]["requests"]
+        metrics.reset()
+        assert tracker.poll() == []
+        assert requests() == 3
+        # The resting order closes outside the window, a narrow lookup finds how
+        self.take(1.0)
+        metrics.reset()
+        assert [(event.kind, event.order["id"]) for event in tracker.poll()] == [(COMPLETE, resting["id"])]
+        assert requests() == 4 and len(tracker) == 0
+        api.close()
+
+    def test_raising_callback(self):
+        def fail(event):
+            raise ValueError(event.kind)
+        tracker = OrderTracker(self.api, callbacks=[fail, self.events.append])
+        tracker.poll()
+        tracker.create_order(**sell(1.0))
+        tracker.create_order(**sell(1.0))
+        self.take(1.5)
+        self.assertRaises(ValueError, tracker.poll)
+        assert [event.kind for event in self.events] == [PARTIAL_FILL, COMPLETE]
+        assert len(tracker) == 1
+        assert tracker.poll() == []
+
+    def test_other_pair_rejected(self):
+        tracker = OrderTracker(self.api, pair="BRLETH")
+        self.assertRaises(ArgumentError, tracker.create_order, **sell(1.0))
+        self.assertRaises(ArgumentError, tracker.track, self.api.create_order(**sell(1.0)))
+        assert len(tracker) == 0
+        assert self.api.get_user_orders(pair="BRLBTC")["orders"][0]["status"] == "waiting"
+
+    def test_backoff(self):
+        tracker = OrderTracker(self.api, min_interval=1.0, max_interval=3.0, backoff=2.0)
+        tracker.create_order(**sell(1.0))
+        tracker.poll()
+        assert tracker.interval == 2.0
+        tracker.poll()
+        assert tracker.interval == 3.0
+
+    def test_background_thread(self):
+        tracker = OrderTracker(self.api, callbacks=[self.events.append], min_interval=0.01).start()
+        try:
+            tracker.create_order(**sell(1.0))
+            self.take(1.0)
+            for _ in range(200):
+                if self.events:
+                    break
+                time.sleep(0.01)
+        finally:
+            tracker.stop()
+        assert [event.kind for event in self.events] == [COMPLETE]
+
+    def test_async(self):
+        loop = asyncio.new_event_loop()
+        api = self.exchange.client(bitcointrade.AsyncPrivateApi, "maker")
+        tracker = OrderTracker(api)
+
+        async def scenario():
+            queue = asyncio.Queue()
+            await tracker.poll_async(queue)
+            tracker.track(await api.create_order(**sell(1.0)))
+            self.take(0.4)
+            await tracker.poll_async(queue)
+            return queue.get_nowait()
+
+        try:
+            event = loop.run_until_complete(scenario())
+            loop.run_until_complete(api.close())
+        finally:
+            loop.close()
+        assert (event.kind, event.filled) == (PARTIAL_FILL, 0.4)
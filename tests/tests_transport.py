@@ -0,0 +1,132 @@
+import json
+import unittest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bitcointrade
+from bitcointrade.simulator import SimulatedExchange
+from bitcointrade.transport import (Transport, Response, RequestsTransport, Urllib3Transport, Http2Transport,
+                                    get_transport)
+from bitcointrade.retry import RetryPolicy
+from bitcointrade.errors import ApiError, ArgumentError, HTTPError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+class RecordingTransport(Transport):
+    """Answers every request with an empty ticker and records it"""
+    name = "recording"
+
+    def __init__(self, status_code=200, content=b'{"message": null, "data": {"last": 1.0}}'):
+        Transport.__init__(self)
+        self.status_code = status_code
+        self.content = content
+        self.requests = []
+
+    def request(self, method, url, params=None, body=None, headers=None, timeout=None):
+        self.requests.append((method, url, params, body))
+        return Response(self.status_code, self.content)
+
+class UnavailableHandler(BaseHTTPRequestHandler):
+    """Answers every request with a plain text 502"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(502)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", "11")
+        self.end_headers()
+        self.wfile.write(b"Bad Gateway")
+
+    def log_message(self, format, *args):
+        pass
+
+class TransportTestCase(unittest.TestCase):
+    def test_get_transport(self):
+        assert isinstance(bitcointrade.Api().transport, RequestsTransport)
+        assert isinstance(bitcointrade.Api(transport="urllib3").transport, Urllib3Transport)
+        transport = get_transport("http2", pool_maxsize=4)
+        assert isinstance(transport, Http2Transport) and transport.pool_maxsize == 4
+
+    def test_async_clients(self):
+        assert bitcointrade.AsyncApi().transport is None
+        self.assertRaises(ArgumentError, bitcointrade.AsyncPrivateApi, "42", transport="urllib3")
+        self.assertRaises(ArgumentError, bitcointrade.AsyncApi, transport=RecordingTransport())
+        self.assertRaises(ArgumentError, get_transport, "carrier_pigeon")
+
+    def test_custom_transport(self):
+        transport = RecordingTransport()
+        assert bitcointrade.Api(transport=transport).ticker("BRLBTC") == {"last": 1.0}
+        bitcointrade.PrivateApi("42", transport=transport).cancel_order(id="7")
+        assert transport.requests[0] == ("GET", "https://api.bitcointrade.com.br/v2/public/BRLBTC/ticker", {}, None)
+        assert transport.requests[1][0] == "DELETE" and json.loads(transport.requests[1][3]) == {"id": "7"}
+
+    def test_http_error(self):
+        api = bitcointrade.Api(transport=RecordingTransport(503, b"Service Unavailable"))
+        with self.assertRaises(HTTPError) as context:
+            api.ticker("BRLBTC")
+        assert context.exception.status == 503
+        assert RetryPolicy().retryable(context.exception)
+
+    def test_pool(self):
+        assert bitcointrade.Api(transport=RecordingTransport()).session is None
+        api = bitcointrade.Api(transport="urllib3")
+        assert api.session is api.transport.pool is not None
+
+class ExchangeTransportTestCase(unittest.TestCase):
+    """Same calls against the simulated exchange through each transport"""
+    transport = "urllib3"
+
+    def setUp(self):
+        self.exchange = SimulatedExchange().start()
+        self.exchange.engine.deposit("42", "BRL", 100000.0)
+        self.api = self.exchange.client(bitcointrade.PrivateApi, "42", transport=self.transport)
+        self.public = self.exchange.client(bitcointrade.Api, transport=self.transport, max_workers=4)
+
+    def tearDown(self):
+        self.api.close()
+        self.public.close()
+        self.exchange.stop()
+
+    def test_http_error(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), UnavailableHandler)
+        thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+        thread.start()
+        api = bitcointrade.Api(transport=self.transport)
+        api.scheme, api.host = "http", "%s:%d" % server.server_address[:2]
+        try:
+            with self.assertRaises(HTTPError) as context:
+                api.ticker("BRLBTC")
+            assert context.exception.status == 502
+        finally:
+            api.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_calls(self):
+        order = self.api.create_order(pair="BRLBTC", type="buy", subtype="limited", amount=0.1, unit_price=30000.0)
+        assert self.api.get_user_orders(pair="BRLBTC", status="waiting")["orders"][0]["id"] == order["id"]
+        self.api.cancel_order(id=order["id"])
+        assert self.public.orderbook("BRLBTC")["bids"] == []
+        self.assertRaises(ApiError, self.api.cancel_order, id="missing")
+
+    def test_concurrent(self):
+        results = self.public.tickers(["BRLBTC", "BRLETH", "BRLLTC", "BRLBCH"])
+        results.raise_for_errors()
+        assert len(results) == 4
+
+    def test_close(self):
+        self.public.ticker("BRLBTC")
+        self.public.close()
+        assert self.public.ticker("BRLBTC") is not None
+
+class RequestsExchangeTransportTestCase(ExchangeTransportTestCase):
+    transport = "requests"
+
+@unittest.skipIf(httpx is None, "httpx is not installed")
+class Http2ExchangeTransportTestCase(ExchangeTransportTestCase):
+    transport = "http2"
+
+if __name__ == "__main__":
+    unittest.main()
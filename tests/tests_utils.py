@@ -0,0 +1,46 @@
+import unittest
+from bitcointrade import utils
+from bitcointrade.utils import Schema, check_args, set_validation
+from bitcointrade.errors import ArgumentError
+
+REQUIRED = {"pair": ["BRLBTC", "BRLLTC"], "amount": float}
+OPTIONAL = {"unit_price": float, "status": ["waiting", "canceled"]}
+
+def error(function, *args):
+    try:
+        function(*args)
+    except ArgumentError as e:
+        return str(e)
+    raise AssertionError("ArgumentError not raised")
+
+class SchemaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.schema = Schema(REQUIRED, OPTIONAL)
+
+    def tearDown(self):
+        set_validation(True)
+
+    def test_valid(self):
+        self.schema.check({"pair": "BRLBTC", "amount": 1.0})
+        self.schema.check({"pair": "BRLLTC", "amount": 1.0, "unit_price": 2.0, "status": "waiting", "other": 1})
+
+    def test_same_errors_as_check_args(self):
+        invalid = [{"amount": 1.0},
+                   {"pair": "BRLETH", "amount": 1.0},
+                   {"pair": "BRLBTC", "amount": 1},
+                   {"pair": "BRLBTC", "amount": 1.0, "status": "executed"},
+                   {"pair": "BRLBTC", "amount": 1.0, "unit_price": "2"}]
+        for params in invalid:
+            assert error(self.schema.check, params) == error(check_args, params, REQUIRED, OPTIONAL)
+
+    def test_unhashable_value(self):
+        self.assertRaises(ArgumentError, self.schema.check, {"pair": ["BRLBTC"], "amount": 1.0})
+
+    def test_exact_type(self):
+        self.assertRaises(ArgumentError, Schema({"page_size": int}).check, {"page_size": True})
+
+    def test_disabled(self):
+        set_validation(False)
+        assert not utils.VALIDATE
+        self.schema.check({"pair": "BRLETH"})
+        check_args({}, REQUIRED)